@@ -0,0 +1,311 @@
+# Description:
+#     An optional bitboard backend for the board core. Along with the mailbox, it keeps the squares of each piece, of
+#     each player and of all the pieces as 90-bit Python ints, where bit row * 9 + column stands for a square. The
+#     occupancy is also kept rotated, with bit column * 10 + row standing for a square, so that the pieces on a column
+#     are next to each other like the pieces on a row.
+#
+#     The chariot and cannon moves, which are the most expensive to find by walking the board, are looked up in tables
+#     indexed by a square's position in its row or column and the occupancy of that row or column.
+
+from JanggiBoard import JanggiBoard, CANNON, CHARIOT, EMPTY, FROM_MAILBOX, INDEX_ROW_COLUMNS, \
+    PALACE_DIAGONALS, PIECE_TYPE, ROW_STEP
+
+# The bit of each mailbox square in the normal and rotated bitboards, and its row and column. Border squares have no
+# bit.
+MAILBOX_BITS = tuple(1 << square if square >= 0 else 0 for square in FROM_MAILBOX)
+MAILBOX_ROTATED_BITS = tuple(1 << (INDEX_ROW_COLUMNS[square][1] * 10 + INDEX_ROW_COLUMNS[square][0])
+                             if square >= 0 else 0 for square in FROM_MAILBOX)
+MAILBOX_ROWS = tuple(INDEX_ROW_COLUMNS[square][0] if square >= 0 else -1 for square in FROM_MAILBOX)
+MAILBOX_COLUMNS = tuple(INDEX_ROW_COLUMNS[square][1] if square >= 0 else -1 for square in FROM_MAILBOX)
+
+
+def _build_line_tables(length, step):
+    """
+    Builds the move tables for one row or one column. Each table is indexed by the position of the piece in the line
+    and then by the occupancy of the line, with bit i set if there is a piece at position i. The moves are given as
+    the steps from the piece's square to the new square, so the same tables work for every row or every column.
+
+    Takes the number of squares in the line and the step between neighbouring squares of the line on the mailbox.
+    Returns a tuple of three tables. The slides table gives the steps to the empty squares up to and including the
+    first piece in each direction. The jumps table gives a (screen step, landing steps, target step) tuple for each
+    direction with a piece to jump over, where the landing steps lead to the empty squares after the screen and the
+    target step leads to the next piece, or is None. The blockers table gives a (first step, second step) tuple for
+    each direction with a piece in it, leading to the first and second pieces, where the second step can be None.
+    """
+
+    shared_tuples = {}
+    slides_table = []
+    jumps_table = []
+    blockers_table = []
+
+    for position in range(length):
+        slides_list = []
+        jumps_list = []
+        blockers_list = []
+
+        for occupancy in range(1 << length):
+            slides = []
+            jumps = []
+            blockers = []
+
+            for direction in (-1, 1):
+                pieces_list = []
+                empty_squares_list = [[], []]
+                current = position + direction
+
+                # Walk to the end of the line, keeping the first two pieces and the empty squares before each.
+                while 0 <= current < length and len(pieces_list) < 2:
+                    if occupancy >> current & 1:
+                        pieces_list.append((current - position) * step)
+
+                    else:
+                        empty_squares_list[len(pieces_list)].append((current - position) * step)
+
+                    current += direction
+
+                slides.extend(empty_squares_list[0])
+                slides.extend(pieces_list[:1])
+
+                if pieces_list:
+                    blockers.append((pieces_list[0], pieces_list[1] if len(pieces_list) == 2 else None))
+                    jumps.append((pieces_list[0], tuple(empty_squares_list[1]),
+                                  pieces_list[1] if len(pieces_list) == 2 else None))
+
+            # Many positions share the same moves, so each different tuple is only stored once.
+            slides_list.append(shared_tuples.setdefault(tuple(slides), tuple(slides)))
+            jumps_list.append(shared_tuples.setdefault(tuple(jumps), tuple(jumps)))
+            blockers_list.append(shared_tuples.setdefault(tuple(blockers), tuple(blockers)))
+
+        slides_table.append(tuple(slides_list))
+        jumps_table.append(tuple(jumps_list))
+        blockers_table.append(tuple(blockers_list))
+
+    return tuple(slides_table), tuple(jumps_table), tuple(blockers_table)
+
+
+def _build_palace_tables():
+    """
+    Builds the move tables for the diagonal lines of the palaces. Each table is indexed by a palace corner or center
+    and then by whether the center of that palace holds a piece.
+
+    Returns a tuple of two dictionaries. The first gives the squares a chariot can move to along the diagonals, up to
+    and including the first piece. The second gives a (screen square, new square) tuple for a cannon in a corner that
+    can jump over a piece in the center, or None.
+    """
+
+    palace_slides = {}
+    palace_jumps = {}
+
+    for square, lines in PALACE_DIAGONALS.items():
+        if len(lines) == 1:
+            center, opposite_corner = lines[0]
+            palace_slides[square] = ((center, opposite_corner), (center,))
+            palace_jumps[square] = (None, (center, opposite_corner))
+
+        else:
+            corners = tuple(line[0] for line in lines)
+            palace_slides[square] = (corners, corners)
+
+    return palace_slides, palace_jumps
+
+
+RANK_SLIDES, RANK_JUMPS, RANK_BLOCKERS = _build_line_tables(9, 1)
+FILE_SLIDES, FILE_JUMPS, FILE_BLOCKERS = _build_line_tables(10, ROW_STEP)
+PALACE_SLIDES, PALACE_JUMPS = _build_palace_tables()
+
+# The bit of the center of the palace that each palace corner or center is on.
+PALACE_CENTER_BITS = {square: MAILBOX_BITS[lines[0][0]] if len(lines) == 1 else MAILBOX_BITS[square]
+                      for square, lines in PALACE_DIAGONALS.items()}
+
+
+class JanggiBitboard(JanggiBoard):
+    """
+    A JanggiBoard that also keeps bitboards of the pieces, and uses them to look up the chariot and cannon moves and
+    attacks instead of walking along the rows and columns.
+    """
+
+    __slots__ = ("_piece_bitboards", "_occupancy", "_rotated_occupancy")
+
+    def __init__(self):
+        """
+        Creates an empty board with blue to move.
+        """
+
+        super().__init__()
+        self._piece_bitboards = [0] * 32
+        self._occupancy = 0
+        self._rotated_occupancy = 0
+
+    def get_piece_bitboard(self, piece):
+        """
+        Returns the bitboard of the squares holding the piece code. The bitboard of a player's code holds all of that
+        player's pieces.
+        """
+
+        return self._piece_bitboards[piece]
+
+    def get_occupancy(self):
+        """
+        Returns the bitboard of all the pieces.
+        """
+
+        return self._occupancy
+
+    def put_piece(self, square, piece):
+        """
+        Places a piece on an empty square, while setting up a board.
+
+        Takes the square and the code of the piece.
+        """
+
+        super().put_piece(square, piece)
+        self._toggle_piece(square, piece)
+
+    def push_move(self, piece_square, new_square):
+        """
+        Moves a piece without checking if the move is valid, and records it on the undo stack so that it can be taken
+        back with pop_move. The bitboards are updated along with the mailbox.
+
+        Takes the square of the piece to be moved and the square to move it to.
+        """
+
+        if piece_square != new_square:
+            self._toggle_move(self._squares[piece_square], self._squares[new_square], piece_square, new_square)
+
+        super().push_move(piece_square, new_square)
+
+    def pop_move(self):
+        """
+        Takes back the last move on the undo stack, along with its changes to the bitboards.
+        """
+
+        piece_square, new_square, captured_piece = self._move_stack[-1][:3]
+
+        if piece_square != new_square:
+            self._toggle_move(self._squares[new_square], captured_piece, piece_square, new_square)
+
+        super().pop_move()
+
+    def _toggle_piece(self, square, piece):
+        """
+        Adds a piece to the bitboards, or removes it if it is already there.
+        """
+
+        bit = MAILBOX_BITS[square]
+        self._piece_bitboards[piece] ^= bit
+        self._piece_bitboards[piece & ~PIECE_TYPE] ^= bit
+        self._occupancy ^= bit
+        self._rotated_occupancy ^= MAILBOX_ROTATED_BITS[square]
+
+    def _toggle_move(self, piece, captured_piece, piece_square, new_square):
+        """
+        Changes the bitboards for a piece moving between two squares, possibly capturing a piece. Making the same
+        change again takes the move back.
+
+        Takes the code of the moving piece, the code of the captured piece or EMPTY, and the two squares.
+        """
+
+        bits = MAILBOX_BITS[piece_square] | MAILBOX_BITS[new_square]
+        piece_bitboards = self._piece_bitboards
+        piece_bitboards[piece] ^= bits
+        piece_bitboards[piece & ~PIECE_TYPE] ^= bits
+
+        if captured_piece == EMPTY:
+            self._occupancy ^= bits
+            self._rotated_occupancy ^= MAILBOX_ROTATED_BITS[piece_square] | MAILBOX_ROTATED_BITS[new_square]
+
+        else:
+            piece_bitboards[captured_piece] ^= MAILBOX_BITS[new_square]
+            piece_bitboards[captured_piece & ~PIECE_TYPE] ^= MAILBOX_BITS[new_square]
+            self._occupancy ^= MAILBOX_BITS[piece_square]
+            self._rotated_occupancy ^= MAILBOX_ROTATED_BITS[piece_square]
+
+    def _add_chariot_movements(self, square, player, movements_list):
+        """
+        Adds the squares a chariot can move to vertically and horizontally, looked up from the occupancy of its row
+        and column.
+
+        Takes the square of the chariot, its player and the list to add the squares to.
+        """
+
+        squares = self._squares
+        row = MAILBOX_ROWS[square]
+        column = MAILBOX_COLUMNS[square]
+
+        for step in RANK_SLIDES[column][self._occupancy >> (row * 9) & 511]:
+            if not squares[square + step] & player:
+                movements_list.append(square + step)
+
+        for step in FILE_SLIDES[row][self._rotated_occupancy >> (column * 10) & 1023]:
+            if not squares[square + step] & player:
+                movements_list.append(square + step)
+
+        if square in PALACE_SLIDES:
+            for new_square in PALACE_SLIDES[square][self._occupancy & PALACE_CENTER_BITS[square] != 0]:
+                if not squares[new_square] & player:
+                    movements_list.append(new_square)
+
+    def _add_cannon_movements(self, square, player, movements_list):
+        """
+        Adds the squares a cannon can move to vertically and horizontally, looked up from the occupancy of its row and
+        column. The screen it jumps over cannot be a cannon, and it cannot capture a cannon.
+
+        Takes the square of the cannon, its player and the list to add the squares to.
+        """
+
+        squares = self._squares
+        row = MAILBOX_ROWS[square]
+        column = MAILBOX_COLUMNS[square]
+
+        for jumps in (RANK_JUMPS[column][self._occupancy >> (row * 9) & 511],
+                      FILE_JUMPS[row][self._rotated_occupancy >> (column * 10) & 1023]):
+            for screen_step, landing_steps, target_step in jumps:
+                if squares[square + screen_step] & PIECE_TYPE == CANNON:
+                    continue
+
+                for step in landing_steps:
+                    movements_list.append(square + step)
+
+                if target_step is not None:
+                    target = squares[square + target_step]
+
+                    if not target & player and target & PIECE_TYPE != CANNON:
+                        movements_list.append(square + target_step)
+
+        # From a corner of the palace, the cannon can jump over a piece in the middle that is not a cannon. Unlike its
+        # other moves, it can capture a cannon in the opposite corner.
+        if square in PALACE_JUMPS:
+            palace_jump = PALACE_JUMPS[square][self._occupancy & PALACE_CENTER_BITS[square] != 0]
+
+            if palace_jump is not None and squares[palace_jump[0]] & PIECE_TYPE != CANNON:
+                if not squares[palace_jump[1]] & player:
+                    movements_list.append(palace_jump[1])
+
+    def _is_attacked_on_lines(self, square, by_player, target_is_cannon):
+        """
+        Looks up the first and second pieces in each direction along the square's row and column. A chariot attacks
+        if it is the first piece, and a cannon attacks if it is the second piece and the first is not a cannon.
+
+        Takes the square, the attacking player and whether there is a cannon on the square.
+        Returns True if a chariot or cannon attacks the square vertically or horizontally.
+        """
+
+        squares = self._squares
+        chariot = by_player | CHARIOT
+        cannon = by_player | CANNON
+        row = MAILBOX_ROWS[square]
+        column = MAILBOX_COLUMNS[square]
+
+        for blockers in (RANK_BLOCKERS[column][self._occupancy >> (row * 9) & 511],
+                         FILE_BLOCKERS[row][self._rotated_occupancy >> (column * 10) & 1023]):
+            for first_step, second_step in blockers:
+                piece = squares[square + first_step]
+
+                if piece == chariot:
+                    return True
+
+                if second_step is not None and not target_is_cannon and piece & PIECE_TYPE != CANNON:
+                    if squares[square + second_step] == cannon:
+                        return True
+
+        return False
@@ -0,0 +1,1078 @@
+# Description:
+#     The board core used by JanggiGame. The board is kept as a flat bytearray "mailbox" with a border of off-board
+#     squares around the 9x10 board, so a piece can step off the edge of the board and find the border instead of
+#     having to check the bounds in every direction. Each square holds a small integer code for its piece: the piece
+#     type in the low bits and the player in the next two bits. The border squares have both player bits set, so they
+#     look like a piece belonging to whoever is moving and can never be moved onto.
+#
+#     Squares are passed around as mailbox indices inside this module. The tables below convert between the mailbox
+#     indices, the 0 to 89 square indices (row * 9 + column) and the algebraic notation of the squares.
+
+import random
+import sys
+from operator import or_
+
+from JanggiEvaluation import PIECE_VALUES, SQUARE_TABLES
+
+# Tables for converting between the algebraic notation of the squares and their row and column indices. They are
+# built once here, so the pieces can look the squares up instead of converting them on every move. The names of the
+# squares are interned, so the same string is used for a square everywhere.
+COLUMN_NAMES = "abcdefghi"
+ROW_NAMES = ("1", "2", "3", "4", "5", "6", "7", "8", "9", "10")
+COLUMN_INDICES = {name: index for index, name in enumerate(COLUMN_NAMES)}
+ROW_INDICES = {name: index for index, name in enumerate(ROW_NAMES)}
+
+# SQUARE_NAMES and SQUARE_INDICES convert between the names of the 90 squares and their 0 to 89 index,
+# which is row * 9 + column.
+SQUARE_NAMES = tuple(sys.intern(column_name + row_name) for row_name in ROW_NAMES for column_name in COLUMN_NAMES)
+SQUARE_INDICES = {name: index for index, name in enumerate(SQUARE_NAMES)}
+
+# INDEX_ROW_COLUMNS and NAME_ROW_COLUMNS give the row and column of a square from its index or name, and
+# ROW_COLUMN_NAMES[row][column] gives the name of a square.
+INDEX_ROW_COLUMNS = tuple(divmod(index, 9) for index in range(90))
+NAME_ROW_COLUMNS = {name: INDEX_ROW_COLUMNS[index] for index, name in enumerate(SQUARE_NAMES)}
+ROW_COLUMN_NAMES = tuple(SQUARE_NAMES[row * 9:row * 9 + 9] for row in range(10))
+
+# The piece codes. A piece is its type plus the player it belongs to. An empty square is 0.
+EMPTY = 0
+GENERAL = 1
+GUARD = 2
+HORSE = 3
+ELEPHANT = 4
+CHARIOT = 5
+CANNON = 6
+SOLDIER = 7
+PIECE_TYPE = 7
+
+RED = 8
+BLUE = 16
+OFFBOARD = RED | BLUE
+
+PIECE_NAMES = {GENERAL: "general", GUARD: "guard", HORSE: "horse", ELEPHANT: "elephant",
+               CHARIOT: "chariot", CANNON: "cannon", SOLDIER: "soldier"}
+PIECE_TYPES = {name: piece_type for piece_type, name in PIECE_NAMES.items()}
+PLAYER_NAMES = {RED: "red", BLUE: "blue"}
+PLAYER_CODES = {name: player for player, name in PLAYER_NAMES.items()}
+
+# The mailbox has one border column on each side and one border row above and below the board. Every move is made
+# of single steps, so a piece never needs to look more than one square past the edge.
+MAILBOX_WIDTH = 11
+MAILBOX_SIZE = MAILBOX_WIDTH * 12
+TO_MAILBOX = tuple((row + 1) * MAILBOX_WIDTH + column + 1 for row, column in INDEX_ROW_COLUMNS)
+FROM_MAILBOX = tuple(TO_MAILBOX.index(mailbox) if mailbox in TO_MAILBOX else -1 for mailbox in range(MAILBOX_SIZE))
+MAILBOX_NAMES = tuple(SQUARE_NAMES[square] if square >= 0 else None for square in FROM_MAILBOX)
+
+# Steps between neighbouring squares. Going up a row moves towards row 10, which is the direction red moves in.
+ROW_STEP = MAILBOX_WIDTH
+COLUMN_STEP = 1
+ORTHOGONAL_STEPS = (-ROW_STEP, ROW_STEP, -COLUMN_STEP, COLUMN_STEP)
+
+# The horse and elephant first step one space orthogonally, and then diagonally forwards. For each orthogonal step,
+# these are the two diagonal steps that lead away from where the piece started.
+FORWARD_DIAGONAL_STEPS = {
+    -ROW_STEP: (-ROW_STEP - COLUMN_STEP, -ROW_STEP + COLUMN_STEP),
+    ROW_STEP: (ROW_STEP - COLUMN_STEP, ROW_STEP + COLUMN_STEP),
+    -COLUMN_STEP: (-COLUMN_STEP - ROW_STEP, -COLUMN_STEP + ROW_STEP),
+    COLUMN_STEP: (COLUMN_STEP - ROW_STEP, COLUMN_STEP + ROW_STEP)
+}
+
+# Soldiers move one space forward or one space horizontally.
+SOLDIER_STEPS = {RED: (ROW_STEP, -COLUMN_STEP, COLUMN_STEP), BLUE: (-ROW_STEP, -COLUMN_STEP, COLUMN_STEP)}
+
+
+def _build_palace_tables():
+    """
+    Builds the tables for moving inside the palaces.
+
+    Returns a dictionary of each player's palace squares and the moves a guard or general can make from each of them,
+    and a dictionary of the diagonal lines a chariot or cannon can move along from each palace square. Each diagonal
+    line is a tuple of the squares along it, moving away from the square.
+    """
+
+    palace_moves = {}
+    palace_diagonals = {}
+
+    for player, palace_top in ((RED, 0), (BLUE, 7)):
+        palace_squares = [TO_MAILBOX[row * 9 + column]
+                          for row in range(palace_top, palace_top + 3) for column in range(3, 6)]
+        center = TO_MAILBOX[(palace_top + 1) * 9 + 4]
+        corners = [square for square in palace_squares
+                   if FROM_MAILBOX[square] % 9 != 4 and FROM_MAILBOX[square] // 9 != palace_top + 1]
+        palace_moves[player] = {}
+
+        for square in palace_squares:
+            moves_list = [square + step for step in ORTHOGONAL_STEPS if square + step in palace_squares]
+
+            # The center is joined to each corner by the diagonal lines.
+            if square == center:
+                moves_list.extend(corners)
+                palace_diagonals[square] = tuple((corner,) for corner in corners)
+
+            elif square in corners:
+                moves_list.append(center)
+                palace_diagonals[square] = ((center, 2 * center - square),)
+
+            palace_moves[player][square] = tuple(moves_list)
+
+    return palace_moves, palace_diagonals
+
+
+def _build_jump_tables():
+    """
+    Builds the tables of horse and elephant moves. For every square, each move is listed together with the squares the
+    piece moves through, which must be empty for the move to be made.
+
+    Returns a tuple of every square's horse moves as (block square, new square) tuples, every square's elephant moves
+    as (first block square, second block square, new square) tuples, and the same two tables turned around: for every
+    square, the squares a horse or elephant could reach it from, with the block squares in the same order.
+    """
+
+    horse_jumps = [[] for _ in range(MAILBOX_SIZE)]
+    elephant_jumps = [[] for _ in range(MAILBOX_SIZE)]
+    horse_attacks = [[] for _ in range(MAILBOX_SIZE)]
+    elephant_attacks = [[] for _ in range(MAILBOX_SIZE)]
+
+    for square in TO_MAILBOX:
+        for step in ORTHOGONAL_STEPS:
+            for diagonal_step in FORWARD_DIAGONAL_STEPS[step]:
+                block_square = square + step
+                second_block_square = block_square + diagonal_step
+                elephant_square = second_block_square + diagonal_step
+
+                if FROM_MAILBOX[block_square] < 0 or FROM_MAILBOX[second_block_square] < 0:
+                    continue
+
+                horse_jumps[square].append((block_square, second_block_square))
+                horse_attacks[second_block_square].append((block_square, square))
+
+                if FROM_MAILBOX[elephant_square] >= 0:
+                    elephant_jumps[square].append((block_square, second_block_square, elephant_square))
+                    elephant_attacks[elephant_square].append((block_square, second_block_square, square))
+
+    return tuple(tuple(jumps) for jumps in horse_jumps), tuple(tuple(jumps) for jumps in elephant_jumps), \
+        tuple(tuple(jumps) for jumps in horse_attacks), tuple(tuple(jumps) for jumps in elephant_attacks)
+
+
+PALACE_MOVES, PALACE_DIAGONALS = _build_palace_tables()
+HORSE_JUMPS, ELEPHANT_JUMPS, HORSE_ATTACKS, ELEPHANT_ATTACKS = _build_jump_tables()
+
+# Random 64-bit Zobrist keys for hashing positions. The hash of a position is the XOR of the key of each piece code on
+# each square, ZOBRIST_KEYS[piece][square], along with ZOBRIST_RED_TO_MOVE when it is red's turn. The keys come from a
+# fixed seed, so the same position has the same hash every time the program runs.
+_zobrist_random = random.Random(0x4A616E6767)
+ZOBRIST_KEYS = tuple(tuple(_zobrist_random.getrandbits(64) if piece & OFFBOARD and piece & PIECE_TYPE else 0
+                           for _ in range(MAILBOX_SIZE)) for piece in range(OFFBOARD))
+ZOBRIST_RED_TO_MOVE = _zobrist_random.getrandbits(64)
+
+
+def _build_square_scores():
+    """
+    Builds the evaluation score of each piece code on each square, from the piece values and square tables. Blue's
+    pieces use the square tables turned around, since the tables are written from red's side.
+
+    Returns a tuple indexed by the piece code and then the square, where red's pieces have positive scores and blue's
+    pieces have negative scores.
+    """
+
+    square_scores = []
+
+    for piece in range(OFFBOARD):
+        piece_scores = [0] * MAILBOX_SIZE
+
+        if piece & OFFBOARD and piece & PIECE_TYPE:
+            piece_name = PIECE_NAMES[piece & PIECE_TYPE]
+
+            for square in TO_MAILBOX:
+                row, column = INDEX_ROW_COLUMNS[FROM_MAILBOX[square]]
+
+                if piece & RED:
+                    piece_scores[square] = PIECE_VALUES[piece_name] + SQUARE_TABLES[piece_name][row][column]
+
+                else:
+                    piece_scores[square] = -PIECE_VALUES[piece_name] - SQUARE_TABLES[piece_name][9 - row][column]
+
+        square_scores.append(tuple(piece_scores))
+
+    return tuple(square_scores)
+
+
+SQUARE_SCORES = _build_square_scores()
+
+# A position is packed into PACKED_SIZE bytes: two squares to a byte in square index order, with the first square in
+# the high four bits, followed by a byte that is 1 if it is red's turn. Each square is packed as 0 if it is empty, the
+# piece type for a red piece, and 8 plus the piece type for a blue piece.
+PACKED_SIZE = 46
+
+# A move taken off the board by pack_move_history is packed into MOVE_RECORD_SIZE bytes.
+MOVE_RECORD_SIZE = 4
+PIECE_NIBBLES = tuple(piece & PIECE_TYPE if piece & RED else 8 | piece & PIECE_TYPE if piece & BLUE else 0
+                      for piece in range(OFFBOARD))
+NIBBLE_PIECES = tuple(EMPTY if nibble & PIECE_TYPE == 0 else BLUE | nibble & PIECE_TYPE if nibble & 8
+                      else RED | nibble for nibble in range(16))
+
+# Tables for bytes.translate, which packs and unpacks a whole row of squares at once. The first two give the high and
+# low four bits of a packed byte for each piece code, and the last two give the piece code of the first and second
+# square of each packed byte.
+HIGH_NIBBLE_BYTES = bytes(PIECE_NIBBLES[piece] << 4 if piece < OFFBOARD else 0 for piece in range(256))
+LOW_NIBBLE_BYTES = bytes(PIECE_NIBBLES[piece] if piece < OFFBOARD else 0 for piece in range(256))
+FIRST_SQUARE_PIECES = bytes(NIBBLE_PIECES[packed_squares >> 4] for packed_squares in range(256))
+SECOND_SQUARE_PIECES = bytes(NIBBLE_PIECES[packed_squares & 15] for packed_squares in range(256))
+
+# The mailbox index of the first square of each row, and an empty mailbox board to copy new boards from.
+ROW_STARTS = tuple(TO_MAILBOX[row * 9] for row in range(10))
+EMPTY_MAILBOX = bytes(EMPTY if FROM_MAILBOX[square] >= 0 else OFFBOARD for square in range(MAILBOX_SIZE))
+
+# The letters of the pieces in a FEN position, red in lower case and blue in upper case, like the text format used
+# by other Janggi programs: k general, a guard, h horse, e elephant, r chariot, c cannon and p soldier.
+FEN_LETTERS = {GENERAL: "k", GUARD: "a", HORSE: "h", ELEPHANT: "e", CHARIOT: "r", CANNON: "c", SOLDIER: "p"}
+PIECE_LETTERS = tuple(FEN_LETTERS[piece & PIECE_TYPE] if piece & RED and piece & PIECE_TYPE
+                      else FEN_LETTERS[piece & PIECE_TYPE].upper() if piece & BLUE and piece & PIECE_TYPE else ""
+                      for piece in range(OFFBOARD))
+LETTER_PIECES = {letter: piece for piece, letter in enumerate(PIECE_LETTERS) if letter}
+FEN_SIDES = {BLUE: "b", RED: "r"}
+SIDE_CODES = {letter: player for player, letter in FEN_SIDES.items()}
+
+
+class JanggiBoard:
+    """
+    The pieces on a Janggi board and the player whose turn it is. Moves can be made and taken back with push_move and
+    pop_move. It finds the moves of the pieces and checks if squares are attacked.
+
+    Squares are given as mailbox indices. Use TO_MAILBOX and FROM_MAILBOX to convert them to and from the 0 to 89
+    square indices.
+    """
+
+    __slots__ = ("_squares", "_side_to_move", "_move_stack", "_hash", "_score", "_piece_squares", "_piece_indices",
+                 "_general_squares")
+
+    def __init__(self):
+        """
+        Creates an empty board with blue to move.
+        """
+
+        self._squares = bytearray(EMPTY_MAILBOX)
+        self._side_to_move = BLUE
+        self._move_stack = []
+        self._hash = 0
+        self._score = 0
+
+        # The squares of each player's pieces, the position of each piece's square in its player's list, and the
+        # square of each player's general.
+        self._piece_squares = {RED: [], BLUE: []}
+        self._piece_indices = bytearray(MAILBOX_SIZE)
+        self._general_squares = {RED: None, BLUE: None}
+
+    @classmethod
+    def from_game_board(cls, game_board, blues_turn=True):
+        """
+        Creates a board from a 10x9 list of rows of pieces, like the one returned by JanggiGame.get_game_board.
+
+        Takes the list of rows and whether it is blue's turn.
+        Returns the new board.
+        """
+
+        board = cls()
+
+        for row_index, row in enumerate(game_board):
+            for column_index, piece in enumerate(row):
+
+                if piece is not None:
+                    board.put_piece(TO_MAILBOX[row_index * 9 + column_index],
+                                    PLAYER_CODES[piece.get_player()] | PIECE_TYPES[piece.get_piece_name()])
+
+        if not blues_turn:
+            board._side_to_move = RED
+            board._hash ^= ZOBRIST_RED_TO_MOVE
+
+        return board
+
+    @classmethod
+    def from_bytes(cls, packed_position):
+        """
+        Creates a board from a position packed by to_bytes. The board has no moves to take back.
+
+        Takes the packed position.
+        Returns the new board. Raises ValueError if the packed position is not the right length, or if a player does
+        not have exactly one general or has a general or guard outside their palace.
+        """
+
+        if len(packed_position) != PACKED_SIZE:
+            raise ValueError("A packed position must be " + str(PACKED_SIZE) + " bytes long")
+
+        # Unpack the first and second square of every byte at once, then place the pieces in square index order.
+        packed_squares = packed_position[:45]
+        pieces = bytearray(90)
+        pieces[0::2] = packed_squares.translate(FIRST_SQUARE_PIECES)
+        pieces[1::2] = packed_squares.translate(SECOND_SQUARE_PIECES)
+
+        board = cls()
+
+        for square, piece in zip(TO_MAILBOX, pieces):
+            if piece:
+                board.put_piece(square, piece)
+
+        if packed_position[45]:
+            board._side_to_move = RED
+            board._hash ^= ZOBRIST_RED_TO_MOVE
+
+        board._check_palaces()
+
+        return board
+
+    def to_bytes(self):
+        """
+        Packs the pieces on the board and the player whose turn it is into PACKED_SIZE bytes, for sending the position
+        to another process, storing it or using it as a key. The moves on the undo stack are not packed.
+
+        Returns the packed position as bytes.
+        """
+
+        squares = self._squares
+        board_squares = b"".join([squares[start:start + 9] for start in ROW_STARTS])
+        packed_squares = bytes(map(or_, board_squares[0::2].translate(HIGH_NIBBLE_BYTES),
+                                   board_squares[1::2].translate(LOW_NIBBLE_BYTES)))
+
+        if self._side_to_move == RED:
+            return packed_squares + b"\x01"
+
+        return packed_squares + b"\x00"
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Creates a board from a snapshot made by to_snapshot, with its piece lists in the same order as the board it was
+        made from. The board has no moves to take back.
+
+        Takes the snapshot.
+        Returns the new board.
+        """
+
+        board = cls()
+
+        for index in range(1, len(snapshot), 2):
+            board.put_piece(TO_MAILBOX[snapshot[index]], snapshot[index + 1])
+
+        if snapshot[0]:
+            board._side_to_move = RED
+            board._hash ^= ZOBRIST_RED_TO_MOVE
+
+        return board
+
+    def to_snapshot(self):
+        """
+        Packs the board like to_bytes, but keeps the order of the piece lists, so that a board made from it finds its
+        moves in the same order as this one. The snapshot is a byte that is 1 if it is red's turn, followed by the
+        square index and piece code of each of red's pieces and then each of blue's pieces, in the order of their
+        lists. The moves on the undo stack are not packed.
+
+        Returns the snapshot as bytes.
+        """
+
+        squares = self._squares
+        snapshot = bytearray((self._side_to_move == RED,))
+
+        for player in (RED, BLUE):
+            for square in self._piece_squares[player]:
+                snapshot += bytes((FROM_MAILBOX[square], squares[square]))
+
+        return bytes(snapshot)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Creates a board from a position in FEN text, like the one returned by to_fen. The board has no moves to take
+        back.
+
+        Takes the FEN text.
+        Returns the new board. Raises ValueError if the text is not a valid position, including when a player does
+        not have exactly one general or has a general or guard outside their palace.
+        """
+
+        fields = fen.split()
+
+        if len(fields) != 2 or fields[1] not in SIDE_CODES:
+            raise ValueError("A FEN position must be the rows followed by b or r for the player to move: " + fen)
+
+        rows_list = fields[0].split("/")
+
+        if len(rows_list) != 10:
+            raise ValueError("A FEN position must have 10 rows: " + fen)
+
+        board = cls()
+
+        # The rows are written from row 10 down to row 1.
+        for row_index, row_text in zip(range(9, -1, -1), rows_list):
+            square = ROW_STARTS[row_index]
+            row_end = square + 9
+
+            for letter in row_text:
+                if letter in LETTER_PIECES:
+                    if square >= row_end:
+                        raise ValueError("Row " + ROW_NAMES[row_index] + " of a FEN position is too long: " + fen)
+
+                    board.put_piece(square, LETTER_PIECES[letter])
+                    square += 1
+
+                elif letter.isdigit():
+                    square += int(letter)
+
+                else:
+                    raise ValueError("Unknown piece letter " + letter + " in a FEN position: " + fen)
+
+            if square != row_end:
+                raise ValueError("Row " + ROW_NAMES[row_index] + " of a FEN position is not 9 squares long: " + fen)
+
+        if SIDE_CODES[fields[1]] == RED:
+            board._side_to_move = RED
+            board._hash ^= ZOBRIST_RED_TO_MOVE
+
+        try:
+            board._check_palaces()
+
+        except ValueError as error:
+            raise ValueError(str(error) + ": " + fen) from None
+
+        return board
+
+    def _check_palaces(self):
+        """
+        Checks that each player has exactly one general, and that their general and guards are in their palace, as
+        the rules keep them. The search and checkmate detection rely on this, so a position read from outside is
+        checked before it is used.
+
+        Raises ValueError if they are not.
+        """
+
+        for player in (RED, BLUE):
+            general_count = 0
+
+            for square in self._piece_squares[player]:
+                piece_type = self._squares[square] & PIECE_TYPE
+
+                if piece_type == GENERAL or piece_type == GUARD:
+                    if square not in PALACE_MOVES[player]:
+                        raise ValueError("The " + PLAYER_NAMES[player] + " " + PIECE_NAMES[piece_type] + " on " +
+                                         MAILBOX_NAMES[square] + " is outside its palace")
+
+                    general_count += piece_type == GENERAL
+
+            if general_count != 1:
+                raise ValueError("The " + PLAYER_NAMES[player] + " player must have exactly one general, not " +
+                                 str(general_count))
+
+    def to_fen(self):
+        """
+        Writes the pieces on the board and the player whose turn it is as FEN text. The rows are written from row 10
+        down to row 1, separated by "/", with each piece as its letter and each run of empty squares as its length.
+        They are followed by a space and "b" or "r" for the player whose turn it is. The moves on the undo stack are
+        not written. The beginning position is "REHA1AEHR/4K4/1C5C1/P1P1P1P1P/9/9/p1p1p1p1p/1c5c1/4k4/reha1aehr b".
+
+        Returns the FEN text.
+        """
+
+        squares = self._squares
+        rows_list = []
+
+        for start in reversed(ROW_STARTS):
+            row_text = ""
+            empty_squares = 0
+
+            for piece in squares[start:start + 9]:
+                if piece:
+                    if empty_squares:
+                        row_text += str(empty_squares)
+                        empty_squares = 0
+
+                    row_text += PIECE_LETTERS[piece]
+
+                else:
+                    empty_squares += 1
+
+            if empty_squares:
+                row_text += str(empty_squares)
+
+            rows_list.append(row_text)
+
+        return "/".join(rows_list) + " " + FEN_SIDES[self._side_to_move]
+
+    def get_game_board(self, pieces):
+        """
+        Creates a 10x9 list of rows holding a piece object for each piece on the board, and None for empty squares.
+
+        Takes a sequence of the piece object for each piece code, with None for EMPTY.
+        Returns the list of rows.
+        """
+
+        squares = self._squares
+
+        return [[pieces[squares[square]] for square in TO_MAILBOX[row * 9:row * 9 + 9]] for row in range(10)]
+
+    def get_piece(self, square):
+        """
+        Returns the code of the piece on the square, or EMPTY.
+        """
+
+        return self._squares[square]
+
+    def put_piece(self, square, piece):
+        """
+        Places a piece on an empty square, while setting up a board.
+
+        Takes the square and the code of the piece.
+        """
+
+        self._squares[square] = piece
+        self._hash ^= ZOBRIST_KEYS[piece][square]
+        self._score += SQUARE_SCORES[piece][square]
+
+        piece_squares = self._piece_squares[piece & OFFBOARD]
+        self._piece_indices[square] = len(piece_squares)
+        piece_squares.append(square)
+
+        if piece & PIECE_TYPE == GENERAL:
+            self._general_squares[piece & OFFBOARD] = square
+
+    def get_piece_squares(self, player):
+        """
+        Returns the list of the squares of the player's pieces. The list is kept up to date as moves are made and
+        taken back, so it must not be changed by the caller. Making and taking back a move leaves it in the same order
+        as before.
+        """
+
+        return self._piece_squares[player]
+
+    def get_side_to_move(self):
+        """
+        Returns the player whose turn it is.
+        """
+
+        return self._side_to_move
+
+    def get_move_count(self):
+        """
+        Returns the number of moves on the undo stack.
+        """
+
+        return len(self._move_stack)
+
+    def pack_move_history(self):
+        """
+        Packs the moves on the undo stack into MOVE_RECORD_SIZE bytes each, from the first move made to the last, so
+        that they can be kept without the board and taken back later with take_back_move. Each move is packed as the
+        square index moved from, the square index moved to, the code of the captured piece or EMPTY, and the position
+        of the captured piece in its player's list.
+
+        Returns the packed moves as bytes.
+        """
+
+        return bytes([packed_byte for piece_square, new_square, captured_piece, _, _, captured_index in self._move_stack
+                      for packed_byte in (FROM_MAILBOX[piece_square], FROM_MAILBOX[new_square], captured_piece,
+                                          captured_index)])
+
+    def get_hash(self):
+        """
+        Returns the 64-bit Zobrist hash of the position, which covers the pieces on the board and the player whose turn
+        it is.
+        """
+
+        return self._hash
+
+    def get_score(self):
+        """
+        Returns the evaluation score of the position from red's side, which is the value and square bonus of red's
+        pieces minus those of blue's pieces.
+        """
+
+        return self._score
+
+    def push_move(self, piece_square, new_square):
+        """
+        Moves a piece without checking if the move is valid, and records it on the undo stack so that it can be taken
+        back with pop_move. Passes the turn to the other player. Moving a piece onto its own square is a pass. The hash
+        and score are updated for just the squares that change, and the ones from before the move are kept on the
+        undo stack. The piece lists are updated along with the squares.
+
+        Takes the square of the piece to be moved and the square to move it to.
+        """
+
+        squares = self._squares
+        captured_piece = squares[new_square]
+        position_hash = self._hash
+        score = self._score
+        captured_index = 0
+
+        if piece_square != new_square:
+            piece = squares[piece_square]
+            piece_indices = self._piece_indices
+
+            # Take the captured piece out of its player's list by moving the last square of the list into its place.
+            if captured_piece != EMPTY:
+                captured_squares = self._piece_squares[captured_piece & OFFBOARD]
+                captured_index = piece_indices[new_square]
+                last_square = captured_squares.pop()
+
+                if last_square != new_square:
+                    captured_squares[captured_index] = last_square
+                    piece_indices[last_square] = captured_index
+
+                if captured_piece & PIECE_TYPE == GENERAL:
+                    self._general_squares[captured_piece & OFFBOARD] = None
+
+            piece_index = piece_indices[piece_square]
+            self._piece_squares[piece & OFFBOARD][piece_index] = new_square
+            piece_indices[new_square] = piece_index
+
+            if piece & PIECE_TYPE == GENERAL:
+                self._general_squares[piece & OFFBOARD] = new_square
+
+            squares[new_square] = piece
+            squares[piece_square] = EMPTY
+            piece_keys = ZOBRIST_KEYS[piece]
+            self._hash ^= piece_keys[piece_square] ^ piece_keys[new_square] ^ ZOBRIST_KEYS[captured_piece][new_square]
+            piece_scores = SQUARE_SCORES[piece]
+            self._score += piece_scores[new_square] - piece_scores[piece_square] - \
+                SQUARE_SCORES[captured_piece][new_square]
+
+        else:
+            captured_piece = EMPTY
+
+        self._move_stack.append((piece_square, new_square, captured_piece, position_hash, score, captured_index))
+        self._side_to_move = RED + BLUE - self._side_to_move
+        self._hash ^= ZOBRIST_RED_TO_MOVE
+
+    def pop_move(self):
+        """
+        Takes back the last move on the undo stack. Puts the moved piece and any captured piece back on their squares,
+        and gives the turn back along with the hash and score from before the move. The piece lists are put back in
+        the same order they were in before the move.
+        """
+
+        piece_square, new_square, captured_piece, self._hash, self._score, captured_index = self._move_stack.pop()
+
+        if piece_square != new_square:
+            squares = self._squares
+            piece = squares[new_square]
+            squares[piece_square] = piece
+            squares[new_square] = captured_piece
+            piece_indices = self._piece_indices
+
+            piece_index = piece_indices[new_square]
+            self._piece_squares[piece & OFFBOARD][piece_index] = piece_square
+            piece_indices[piece_square] = piece_index
+
+            if piece & PIECE_TYPE == GENERAL:
+                self._general_squares[piece & OFFBOARD] = piece_square
+
+            # Put the captured piece back where it was in its player's list, and the square that took its place back
+            # at the end.
+            if captured_piece != EMPTY:
+                captured_squares = self._piece_squares[captured_piece & OFFBOARD]
+
+                if captured_index == len(captured_squares):
+                    captured_squares.append(new_square)
+
+                else:
+                    last_square = captured_squares[captured_index]
+                    piece_indices[last_square] = len(captured_squares)
+                    captured_squares.append(last_square)
+                    captured_squares[captured_index] = new_square
+
+                piece_indices[new_square] = captured_index
+
+                if captured_piece & PIECE_TYPE == GENERAL:
+                    self._general_squares[captured_piece & OFFBOARD] = new_square
+
+        self._side_to_move = RED + BLUE - self._side_to_move
+
+    def take_back_move(self, packed_move):
+        """
+        Takes back a move that is not on the undo stack, such as one packed by pack_move_history before the board was
+        made. The hash and score from before the move are worked out from the move, and it is then taken back like
+        pop_move, so the board is the same as it was before the move was made.
+
+        Takes the MOVE_RECORD_SIZE bytes of the packed move.
+        """
+
+        piece_square = TO_MAILBOX[packed_move[0]]
+        new_square = TO_MAILBOX[packed_move[1]]
+        captured_piece = packed_move[2]
+        position_hash = self._hash ^ ZOBRIST_RED_TO_MOVE
+        score = self._score
+
+        if piece_square != new_square:
+            piece = self._squares[new_square]
+            piece_keys = ZOBRIST_KEYS[piece]
+            position_hash ^= piece_keys[piece_square] ^ piece_keys[new_square] ^ \
+                ZOBRIST_KEYS[captured_piece][new_square]
+            piece_scores = SQUARE_SCORES[piece]
+            score -= piece_scores[new_square] - piece_scores[piece_square] - SQUARE_SCORES[captured_piece][new_square]
+
+        self._move_stack.append((piece_square, new_square, captured_piece, position_hash, score, packed_move[3]))
+        self.pop_move()
+
+    def get_piece_movements(self, square):
+        """
+        Finds the squares the piece on the square can move to. Moves that would leave the player's general in check are
+        included.
+
+        Takes the square of the piece.
+        Returns a list of the squares it can move to.
+        """
+
+        squares = self._squares
+        piece = squares[square]
+        player = piece & OFFBOARD
+        piece_type = piece & PIECE_TYPE
+        movements_list = []
+
+        # A square can be moved onto if it is empty or holds an opponent's piece. The border squares have both player
+        # bits set, so they always count as the player's own piece.
+        if piece_type == SOLDIER:
+            for step in SOLDIER_STEPS[player]:
+                if not squares[square + step] & player:
+                    movements_list.append(square + step)
+
+        elif piece_type == GUARD or piece_type == GENERAL:
+            for new_square in PALACE_MOVES[player].get(square, ()):
+                if not squares[new_square] & player:
+                    movements_list.append(new_square)
+
+        elif piece_type == HORSE:
+            for block_square, new_square in HORSE_JUMPS[square]:
+                if squares[block_square] == EMPTY and not squares[new_square] & player:
+                    movements_list.append(new_square)
+
+        elif piece_type == ELEPHANT:
+            for block_square, second_block_square, new_square in ELEPHANT_JUMPS[square]:
+                if squares[block_square] == EMPTY and squares[second_block_square] == EMPTY:
+                    if not squares[new_square] & player:
+                        movements_list.append(new_square)
+
+        elif piece_type == CHARIOT:
+            self._add_chariot_movements(square, player, movements_list)
+
+        elif piece_type == CANNON:
+            self._add_cannon_movements(square, player, movements_list)
+
+        return movements_list
+
+    def _add_chariot_movements(self, square, player, movements_list):
+        """
+        Adds the squares a chariot can move to: each empty square up to the first piece in each direction, and that
+        piece's square if it belongs to the opponent. Chariots can also move along the diagonal lines of the palace.
+
+        Takes the square of the chariot, its player and the list to add the squares to.
+        """
+
+        squares = self._squares
+
+        for step in ORTHOGONAL_STEPS:
+            new_square = square + step
+
+            while squares[new_square] == EMPTY:
+                movements_list.append(new_square)
+                new_square += step
+
+            if not squares[new_square] & player:
+                movements_list.append(new_square)
+
+        for line in PALACE_DIAGONALS.get(square, ()):
+            for new_square in line:
+                if squares[new_square] == EMPTY:
+                    movements_list.append(new_square)
+
+                else:
+                    if not squares[new_square] & player:
+                        movements_list.append(new_square)
+
+                    break
+
+    def _add_cannon_movements(self, square, player, movements_list):
+        """
+        Adds the squares a cannon can move to by jumping over exactly one piece that is not a cannon. It cannot
+        capture other cannons, except from a corner of the palace, where it can jump over a piece in the middle to the
+        opposite corner.
+
+        Takes the square of the cannon, its player and the list to add the squares to.
+        """
+
+        squares = self._squares
+
+        for step in ORTHOGONAL_STEPS:
+            screen_square = square + step
+
+            while squares[screen_square] == EMPTY:
+                screen_square += step
+
+            # The cannon needs a piece to jump over, which cannot be another cannon.
+            if squares[screen_square] == OFFBOARD or squares[screen_square] & PIECE_TYPE == CANNON:
+                continue
+
+            new_square = screen_square + step
+
+            while squares[new_square] == EMPTY:
+                movements_list.append(new_square)
+                new_square += step
+
+            if not squares[new_square] & player and squares[new_square] & PIECE_TYPE != CANNON:
+                movements_list.append(new_square)
+
+        for line in PALACE_DIAGONALS.get(square, ()):
+            if len(line) == 2 and squares[line[0]] != EMPTY and squares[line[0]] & PIECE_TYPE != CANNON:
+                if not squares[line[1]] & player:
+                    movements_list.append(line[1])
+
+    def find_general(self, player):
+        """
+        Returns the square of the player's general, or None if the player has no general. The square is kept up to
+        date as moves are made, so the board does not have to be searched for it.
+        """
+
+        return self._general_squares[player]
+
+    def is_in_check(self, player):
+        """
+        Returns True if the player's general could be captured by the opponent on their next move.
+        """
+
+        general_square = self.find_general(player)
+
+        if general_square is None:
+            return False
+
+        return self.is_attacked(general_square, RED + BLUE - player)
+
+    def is_attacked(self, square, by_player):
+        """
+        Checks if any of a player's pieces could move onto a square on their next move. Instead of finding all the
+        moves of the player's pieces, it looks outward from the square along the chariot and cannon lines and the
+        palace diagonals, and checks the squares a horse, elephant, soldier, guard or general would move from.
+
+        Takes the square and the attacking player.
+        Returns True if the square is attacked by the player.
+        """
+
+        squares = self._squares
+        target = squares[square]
+
+        # A player cannot move onto their own piece.
+        if target & by_player:
+            return False
+
+        chariot = by_player | CHARIOT
+        cannon = by_player | CANNON
+
+        if self._is_attacked_on_lines(square, by_player, target & PIECE_TYPE == CANNON):
+            return True
+
+        # Chariots and cannons can also move along the diagonal lines of the palace. Along a line from a corner, a
+        # cannon can jump over a piece in the middle that is not a cannon. Unlike the other cannon moves, this one can
+        # land on a cannon.
+        for line in PALACE_DIAGONALS.get(square, ()):
+            piece = squares[line[0]]
+
+            if piece == chariot:
+                return True
+
+            if len(line) == 2:
+                if piece == EMPTY:
+                    if squares[line[1]] == chariot:
+                        return True
+
+                elif piece & PIECE_TYPE != CANNON and squares[line[1]] == cannon:
+                    return True
+
+        # Horses and elephants attack from the squares in the jump tables, if the squares they move through are empty.
+        horse = by_player | HORSE
+        elephant = by_player | ELEPHANT
+
+        for block_square, horse_square in HORSE_ATTACKS[square]:
+            if squares[horse_square] == horse and squares[block_square] == EMPTY:
+                return True
+
+        for block_square, second_block_square, elephant_square in ELEPHANT_ATTACKS[square]:
+            if squares[elephant_square] == elephant and squares[block_square] == EMPTY and \
+                    squares[second_block_square] == EMPTY:
+                return True
+
+        soldier = by_player | SOLDIER
+
+        for step in SOLDIER_STEPS[by_player]:
+            if squares[square - step] == soldier:
+                return True
+
+        # Guards and generals can only reach squares inside their own palace.
+        guard = by_player | GUARD
+        general = by_player | GENERAL
+
+        for palace_square in PALACE_MOVES[by_player].get(square, ()):
+            if squares[palace_square] == guard or squares[palace_square] == general:
+                return True
+
+        return False
+
+    def _is_attacked_on_lines(self, square, by_player, target_is_cannon):
+        """
+        Looks along each line from the square for the first piece. A chariot attacks if it is the first piece, and a
+        cannon attacks if it is the first piece after a screen that is not a cannon. Cannons cannot capture other
+        cannons.
+
+        Takes the square, the attacking player and whether there is a cannon on the square.
+        Returns True if a chariot or cannon attacks the square vertically or horizontally.
+        """
+
+        squares = self._squares
+        chariot = by_player | CHARIOT
+        cannon = by_player | CANNON
+
+        for step in ORTHOGONAL_STEPS:
+            current_square = square + step
+
+            while squares[current_square] == EMPTY:
+                current_square += step
+
+            piece = squares[current_square]
+
+            if piece == chariot:
+                return True
+
+            if piece == OFFBOARD or piece & PIECE_TYPE == CANNON or target_is_cannon:
+                continue
+
+            current_square += step
+
+            while squares[current_square] == EMPTY:
+                current_square += step
+
+            if squares[current_square] == cannon:
+                return True
+
+        return False
+
+    def legal_movements(self, player):
+        """
+        Finds the player's moves that do not leave their general in check, one at a time. Each move is tried on the
+        board and taken back before it is yielded, so the board is the same as before whenever the caller gets a move.
+        The pass is yielded last, as the general moving onto its own square, if the player is not in check.
+
+        Takes the player.
+        Yields (square, new square) tuples.
+        """
+
+        for piece_square in self._piece_squares[player]:
+            for new_square in self.get_piece_movements(piece_square):
+                self.push_move(piece_square, new_square)
+                in_check = self.is_in_check(player)
+                self.pop_move()
+
+                if not in_check:
+                    yield piece_square, new_square
+
+        general_square = self.find_general(player)
+
+        if general_square is not None and not self.is_in_check(player):
+            yield general_square, general_square
+
+    def is_checkmated(self, player):
+        """
+        Looks for a move that gets the player out of check. The player is checkmated if there isn't one. Moves by the
+        general are tried first, then moves that capture a checking piece or block a check line, and then the rest.
+        The search stops at the first move that gets the player out of check.
+
+        Returns True if the player is checkmated.
+        """
+
+        opponent = RED + BLUE - player
+        general_square = self.find_general(player)
+
+        if general_square is None:
+            return False
+
+        # Try the general's moves first, since the check is often escaped by stepping out of it.
+        for new_square in self.get_piece_movements(general_square):
+            if self._is_escape(general_square, new_square, new_square, opponent):
+                return False
+
+        # The squares of the checking pieces, and the squares in between them and the general.
+        checking_squares, blocking_squares = self._check_lines(general_square, opponent)
+
+        # Try the captures of checking pieces and the blocks first, and only then the rest of the moves.
+        other_moves_list = []
+
+        for piece_square in self._piece_squares[player]:
+            if piece_square != general_square:
+                for new_square in self.get_piece_movements(piece_square):
+
+                    if new_square not in checking_squares and new_square not in blocking_squares:
+                        other_moves_list.append((piece_square, new_square))
+
+                    elif self._is_escape(piece_square, new_square, general_square, opponent):
+                        return False
+
+        for piece_square, new_square in other_moves_list:
+            if self._is_escape(piece_square, new_square, general_square, opponent):
+                return False
+
+        return True
+
+    def _is_escape(self, piece_square, new_square, general_square, opponent):
+        """
+        Tries a move on the board and checks if the general is attacked afterwards, then takes the move back.
+
+        Takes the square of the piece and the square to move it to, the square of the general after the move, and the
+        opponent.
+        Returns True if the general is not attacked after the move.
+        """
+
+        self.push_move(piece_square, new_square)
+        escaped = not self.is_attacked(general_square, opponent)
+        self.pop_move()
+
+        return escaped
+
+    def _check_lines(self, general_square, opponent):
+        """
+        Finds the opponent's pieces that are checking the general, and the squares a piece could move onto to block
+        them. The block squares are the squares between a chariot or cannon and the general, including a cannon's
+        screen, and the squares a horse or elephant has to move through.
+
+        Takes the square of the general and the opponent.
+        Returns a set of the checking squares and a set of the blocking squares.
+        """
+
+        checking_squares = set()
+        blocking_squares = set()
+        general_row, general_column = INDEX_ROW_COLUMNS[FROM_MAILBOX[general_square]]
+
+        for square in self._piece_squares[opponent]:
+            row, column = INDEX_ROW_COLUMNS[FROM_MAILBOX[square]]
+            row_distance = general_row - row
+            column_distance = general_column - column
+            row_step = ((row_distance > 0) - (row_distance < 0)) * ROW_STEP
+            column_step = (column_distance > 0) - (column_distance < 0)
+
+            # Only the pieces lined up with the general, or a horse or elephant jump away, can be checking it.
+            if row_distance == 0 or column_distance == 0 or abs(row_distance) == abs(column_distance):
+                squares_list = [square + (row_step + column_step) * distance
+                                for distance in range(1, max(abs(row_distance), abs(column_distance)))]
+
+            elif sorted((abs(row_distance), abs(column_distance))) in ([1, 2], [2, 3]):
+
+                # The piece first moves one space along the longer direction, then diagonally towards the general.
+                if abs(row_distance) > abs(column_distance):
+                    squares_list = [square + row_step]
+
+                else:
+                    squares_list = [square + column_step]
+
+                if abs(row_distance) + abs(column_distance) == 5:
+                    squares_list.append(squares_list[0] + row_step + column_step)
+
+            else:
+                continue
+
+            if general_square in self.get_piece_movements(square):
+                checking_squares.add(square)
+                blocking_squares.update(squares_list)
+
+        return checking_squares, blocking_squares
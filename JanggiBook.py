@@ -0,0 +1,254 @@
+# Description:
+#     An opening book of the moves played from positions near the start of the game, so that the opening does not
+#     have to be searched from scratch in every game. The book is a flat binary file of records sorted by position
+#     hash and then by move, each holding:
+#
+#         the 64-bit Zobrist hash of the position, from JanggiGame.position_hash
+#         the move, as the square index moved from times 256 plus the square index moved to
+#         the weight of the move, which is 2 for each game won and 1 for each game not finished by the player who made
+#         the move, up to 65535
+#         the number of games the move was played in, up to 4294967295
+#
+#     The records are packed little endian with RECORD_FORMAT. The file is opened with mmap and searched with a binary
+#     search on the hashes, so it is never read into memory, and processes that open the same book share its pages
+#     through the page cache.
+#
+#     Usage: python JanggiBook.py build [log file] --book FILE [--plies N] [--bitboards]
+#            python JanggiBook.py probe --book FILE [locations ...]
+#
+#     The builder reads a move log in the format read by JanggiReplay. The probe lists the book moves of the position
+#     reached by the moves given as locations.
+
+import argparse
+import random
+import struct
+import sys
+
+from JanggiBoard import BLUE, RED, SQUARE_INDICES, SQUARE_NAMES
+from JanggiGame import JanggiGame
+from JanggiMappedFile import MappedFile
+from JanggiReplay import read_games
+
+RECORD_FORMAT = "<QHHI"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+MAXIMUM_WEIGHT = 65535
+MAXIMUM_COUNT = 4294967295
+
+# The game state when each player has won.
+WINNING_STATES = {BLUE: "BLUE_WON", RED: "RED_WON"}
+
+# The number of moves from the start of each game that go into the book by default.
+DEFAULT_PLIES = 20
+
+
+class OpeningBook(MappedFile):
+    """
+    A read-only opening book file, mapped into memory. Looking up a position is a binary search over the records, so
+    it reads only the pages it needs.
+
+    The book can be sent to other processes, which open the same file again.
+    """
+
+    __slots__ = ("_record_count",)
+
+    def __init__(self, path):
+        """
+        Opens the book file and maps it into memory.
+
+        Takes the path of the book file. Raises ValueError if the file is not a whole number of records long.
+        """
+
+        super().__init__(path)
+
+        if self.get_size() % RECORD_SIZE:
+            self.close()
+            raise ValueError("An opening book must be a whole number of " + str(RECORD_SIZE) + " byte records")
+
+        # An empty book has no map, and no records to look up anyway.
+        self._record_count = self.get_size() // RECORD_SIZE
+
+    def get_record_count(self):
+        """
+        Returns the number of records in the book.
+        """
+
+        return self._record_count
+
+    def lookup(self, position_hash):
+        """
+        Finds the book moves of a position.
+
+        Takes the 64-bit hash of the position.
+        Returns a list of (piece square index, new square index, weight, count) tuples, in the order of the moves,
+        which is empty if the position is not in the book.
+        """
+
+        book_map = self._map
+        low = 0
+        high = self._record_count
+
+        # Find the first record with the hash.
+        while low < high:
+            middle = (low + high) // 2
+
+            if struct.unpack_from("<Q", book_map, middle * RECORD_SIZE)[0] < position_hash:
+                low = middle + 1
+
+            else:
+                high = middle
+
+        moves_list = []
+
+        while low < self._record_count:
+            record_hash, move, weight, count = struct.unpack_from(RECORD_FORMAT, book_map, low * RECORD_SIZE)
+
+            if record_hash != position_hash:
+                break
+
+            moves_list.append((move >> 8, move & 255, weight, count))
+            low += 1
+
+        return moves_list
+
+    def get_moves(self, game):
+        """
+        Returns a list of (piece location, new location, weight, count) tuples for the book moves of the game's
+        position, which is empty if the position is not in the book.
+        """
+
+        return [(SQUARE_NAMES[piece_index], SQUARE_NAMES[new_index], weight, count)
+                for piece_index, new_index, weight, count in self.lookup(game.position_hash())]
+
+    def choose_move(self, game, random_generator=random):
+        """
+        Picks one of the book moves of the game's position at random, where each move is picked in proportion to its
+        weight. Moves with no weight are only picked if no move has any weight.
+
+        Takes the game and the random number generator to use.
+        Returns the move as a (piece location, new location) tuple, or None if the position is not in the book.
+        """
+
+        moves_list = self.get_moves(game)
+
+        if not moves_list:
+            return None
+
+        weights_list = [weight for _, _, weight, _ in moves_list]
+
+        if not any(weights_list):
+            weights_list = None
+
+        piece_location, new_location = random_generator.choices(moves_list, weights_list)[0][:2]
+
+        return piece_location, new_location
+
+
+def build_book(games, path, maximum_plies=DEFAULT_PLIES, use_bitboards=False):
+    """
+    Builds a book file from recorded games. Each game is replayed to find its result, and its first moves are
+    counted for the player who made them. A game stops at its first move that cannot be made.
+
+    Takes an iterable of the lists of locations of the games' moves, like the ones yielded by JanggiReplay.read_games,
+    the path to write the book to, the number of moves from the start of each game to put in the book, and whether
+    to use the bitboard board core.
+    Returns the number of games and the number of records written.
+    """
+
+    # The [weight, count] of each (hash, move) pair.
+    move_totals = {}
+    game_count = 0
+
+    for locations_list in games:
+        game = JanggiGame(use_bitboards)
+        book_moves = []
+
+        for move_number in range(len(locations_list) // 2):
+            piece_location = locations_list[2 * move_number].lower()
+            new_location = locations_list[2 * move_number + 1].lower()
+            position_hash = game.position_hash()
+            player = game.get_board().get_side_to_move()
+
+            if not game.make_move(piece_location, new_location):
+                break
+
+            if move_number < maximum_plies:
+                move = SQUARE_INDICES[piece_location] << 8 | SQUARE_INDICES[new_location]
+                book_moves.append((position_hash, move, player))
+
+        game_state = game.get_game_state()
+        game_count += 1
+
+        for position_hash, move, player in book_moves:
+            totals = move_totals.setdefault((position_hash, move), [0, 0])
+
+            if game_state == "UNFINISHED":
+                totals[0] += 1
+
+            elif game_state == WINNING_STATES[player]:
+                totals[0] += 2
+
+            totals[1] += 1
+
+    record = struct.Struct(RECORD_FORMAT)
+
+    with open(path, "wb") as book_file:
+        for (position_hash, move), (weight, count) in sorted(move_totals.items()):
+            book_file.write(record.pack(position_hash, move, min(weight, MAXIMUM_WEIGHT), min(count, MAXIMUM_COUNT)))
+
+    return game_count, len(move_totals)
+
+
+def main():
+    """
+    Builds a book from a move log, or lists the book moves of a position.
+    """
+
+    parser = argparse.ArgumentParser(description="Build or probe an opening book.")
+    parser.add_argument("mode", choices=("build", "probe"), help="whether to build a book or look up a position")
+    parser.add_argument("arguments", nargs="*", help="for build, the move log file (default: the standard input); "
+                                                     "for probe, the locations of the moves to the position")
+    parser.add_argument("--book", required=True, help="the book file")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES, help="the number of moves from the start of "
+                                                                         "each game to put in the book (default: "
+                                                                         + str(DEFAULT_PLIES) + ")")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard board core")
+    arguments = parser.parse_intermixed_args()
+
+    if arguments.mode == "build":
+        if len(arguments.arguments) > 1:
+            parser.error("build takes at most one move log file")
+
+        if not arguments.arguments or arguments.arguments[0] == "-":
+            log_file = sys.stdin
+
+        else:
+            log_file = open(arguments.arguments[0])
+
+        try:
+            game_count, record_count = build_book((locations_list for _, locations_list in read_games(log_file)),
+                                                  arguments.book, arguments.plies, arguments.bitboards)
+
+        finally:
+            if log_file is not sys.stdin:
+                log_file.close()
+
+        print("%d games, %d records" % (game_count, record_count))
+        return
+
+    game = JanggiGame(arguments.bitboards)
+    locations_list = arguments.arguments
+
+    if len(locations_list) % 2:
+        parser.error("the locations must come in pairs")
+
+    for move_number in range(len(locations_list) // 2):
+        if not game.make_move(locations_list[2 * move_number], locations_list[2 * move_number + 1]):
+            parser.error("move %d cannot be made" % (move_number + 1))
+
+    with OpeningBook(arguments.book) as book:
+        for piece_location, new_location, weight, count in book.get_moves(game):
+            print("%s %s\tweight %d\tcount %d" % (piece_location, new_location, weight, count))
+
+
+if __name__ == "__main__":
+    main()
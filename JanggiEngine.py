@@ -0,0 +1,391 @@
+# Description:
+#     A search engine for playing Janggi. It searches the moves of the player whose turn it is with negamax alpha-beta
+#     search, one depth at a time (iterative deepening), and keeps the best move of each position in a transposition
+#     table. The best move from the last depth is searched first at the next depth, which is what lets alpha-beta cut
+#     off most of the other moves. At the end of the search, only captures are searched until the position is quiet,
+#     so that a position is not scored in the middle of an exchange.
+#
+#     The search is stopped when the time limit runs out, and the best move found so far is used.
+
+import time
+
+from JanggiBoard import EMPTY, PIECE_NAMES, PIECE_TYPE, RED
+from JanggiEvaluation import PIECE_VALUES
+from JanggiTranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+# The value of each piece type, indexed by its code, for ordering the captures.
+PIECE_TYPE_VALUES = tuple(PIECE_VALUES.get(PIECE_NAMES.get(piece_type), 0) for piece_type in range(PIECE_TYPE + 1))
+
+# The score of being checkmated. Scores near it are checkmates, and the number of plies to the checkmate is taken
+# off of it, so that the quickest checkmate has the best score.
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+
+# The depth searched if there is no depth or time limit, and the deepest the search can go.
+DEFAULT_DEPTH = 3
+MAXIMUM_PLY = 64
+
+# The number of nodes searched between checks of the time limit.
+TIME_CHECK_NODES = 1024
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time limit runs out.
+    """
+
+    pass
+
+
+class JanggiEngine:
+    """
+    Searches the board core it is given for the best move of the player whose turn it is. The board is changed while
+    searching, but it is always the same as before once a search is finished.
+    """
+
+    def __init__(self, board, memory_budget=16 * 1024 * 1024, transposition_table=None):
+        """
+        Creates an engine for a board core. The transposition table is only created by the first search, so that
+        games that never search do not use its memory.
+
+        Takes the board core, the memory budget of the transposition table in bytes, and a transposition table to use
+        instead of creating one, or None.
+        """
+
+        self._board = board
+        self._memory_budget = memory_budget
+        self._transposition_table = transposition_table
+        self._killer_moves = [[None, None] for _ in range(MAXIMUM_PLY + 1)]
+        self._root_move = None
+        self._principal_move = None
+        self._nodes = 0
+        self._deadline = None
+
+    def get_nodes(self):
+        """
+        Returns the number of positions visited by the last search.
+        """
+
+        return self._nodes
+
+    def get_transposition_table(self):
+        """
+        Returns the transposition table, or None if there has not been a search yet.
+        """
+
+        return self._transposition_table
+
+    def search(self, depth=None, time_limit=None, beta=INFINITY):
+        """
+        Searches one depth at a time, up to the depth or until the time limit runs out. If neither is given, the
+        search goes to DEFAULT_DEPTH. If only the time limit is given, it goes as deep as it can in that time.
+
+        The search can be given a beta bound, when a score of at least beta is already known to be enough. The search
+        then stops looking at moves once it finds one that scores at least beta, and a score at or above beta is only
+        a lower bound on the true score.
+
+        Takes the depth in plies, the time limit in seconds, and the beta bound.
+        Returns a tuple of the best move as a (square, new square) tuple, its score for the player whose turn it is,
+        and the last depth that was fully searched. The move is None if the player has no legal moves.
+        """
+
+        if depth is None:
+            depth = DEFAULT_DEPTH if time_limit is None else MAXIMUM_PLY
+
+        if self._transposition_table is None:
+            self._transposition_table = TranspositionTable(self._memory_budget)
+
+        self._transposition_table.new_search()
+        self._killer_moves = [[None, None] for _ in range(MAXIMUM_PLY + 1)]
+        self._principal_move = None
+        self._nodes = 0
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        board = self._board
+        move_count = board.get_move_count()
+        best_move = None
+        best_score = 0
+        completed_depth = 0
+
+        for current_depth in range(1, min(depth, MAXIMUM_PLY) + 1):
+            self._root_move = None
+
+            try:
+                score = self._negamax(current_depth, -INFINITY, beta, 0)
+
+            except SearchTimeout:
+                # Take back the moves the search was in the middle of.
+                while board.get_move_count() > move_count:
+                    board.pop_move()
+
+                # The best move from the last depth is searched first, so a different move found at this depth has
+                # already been shown to be better.
+                if self._root_move is not None:
+                    best_move = self._root_move
+
+                break
+
+            best_move = self._root_move
+            best_score = score
+            completed_depth = current_depth
+            self._principal_move = best_move
+
+            # Stop once a checkmate has been found, since searching deeper cannot find a better move.
+            if abs(score) > MATE_BOUND:
+                break
+
+        # If the time ran out before any move was searched, use the first legal move.
+        if best_move is None and completed_depth == 0:
+            best_move = next(board.legal_movements(board.get_side_to_move()), None)
+
+        return best_move, best_score, completed_depth
+
+    def _evaluate(self):
+        """
+        Returns the score of the position for the player whose turn it is. The board core keeps the score from red's
+        side up to date, so it only has to be turned around for blue.
+        """
+
+        if self._board.get_side_to_move() == RED:
+            return self._board.get_score()
+
+        return -self._board.get_score()
+
+    def _ordered_moves(self, player, best_move, ply, captures_only):
+        """
+        Finds the player's moves, including moves that leave their general in check, in the order they should be
+        searched. The best move from the transposition table comes first, then captures of the most valuable pieces
+        by the least valuable pieces, then the killer moves that caused cut-offs at the same ply, and then the rest.
+
+        Takes the player, the best move from the transposition table or None, the ply, and whether to only find
+        captures.
+        Returns a list of (square, new square) tuples.
+        """
+
+        board = self._board
+        killer_moves = self._killer_moves[ply]
+        scored_moves_list = []
+
+        for piece_square in board.get_piece_squares(player):
+            piece = board.get_piece(piece_square)
+            attacker_value = PIECE_TYPE_VALUES[piece & PIECE_TYPE]
+
+            for new_square in board.get_piece_movements(piece_square):
+                captured_piece = board.get_piece(new_square)
+
+                if captured_piece != EMPTY:
+                    order = 100000 + PIECE_TYPE_VALUES[captured_piece & PIECE_TYPE] * 16 - attacker_value // 100
+
+                elif captures_only:
+                    continue
+
+                elif (piece_square, new_square) in killer_moves:
+                    order = 50000
+
+                else:
+                    order = 0
+
+                scored_moves_list.append((order, piece_square, new_square))
+
+        scored_moves_list.sort(reverse=True)
+        moves_list = [(piece_square, new_square) for _, piece_square, new_square in scored_moves_list]
+
+        if best_move is not None and best_move in moves_list:
+            moves_list.remove(best_move)
+            moves_list.insert(0, best_move)
+
+        return moves_list
+
+    def _check_time(self):
+        """
+        Counts a node, and raises SearchTimeout if the time limit has run out.
+        """
+
+        self._nodes += 1
+
+        if self._nodes % TIME_CHECK_NODES == 0 and self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+    def _negamax(self, depth, alpha, beta, ply):
+        """
+        Searches the position to the depth with alpha-beta search. A player in check has their search extended by one
+        ply, so that checks and checkmates are not cut off by the depth.
+
+        Takes the depth left, the alpha and beta bounds, and the ply from the root of the search.
+        Returns the score of the position for the player whose turn it is.
+        """
+
+        self._check_time()
+        board = self._board
+        player = board.get_side_to_move()
+        in_check = board.is_in_check(player)
+
+        if in_check:
+            depth += 1
+
+        if depth <= 0 or ply >= MAXIMUM_PLY:
+            return self._quiesce(alpha, beta, ply, in_check)
+
+        key = board.get_hash()
+        entry = self._transposition_table.probe(key)
+        best_move = None
+
+        if entry is not None:
+            entry_depth, entry_score, bound, best_move = entry
+
+            if entry_depth >= depth and ply > 0:
+                entry_score = _score_from_table(entry_score, ply)
+
+                if bound == EXACT or (bound == LOWER_BOUND and entry_score >= beta) or \
+                        (bound == UPPER_BOUND and entry_score <= alpha):
+                    return entry_score
+
+        # At the root, the best move from the last depth is always searched first, even if its entry was replaced.
+        if ply == 0 and self._principal_move is not None:
+            best_move = self._principal_move
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move_found = None
+        moves_list = self._ordered_moves(player, best_move, ply, False)
+
+        # The pass is searched last, and only if the player is not in check.
+        if not in_check:
+            general_square = board.find_general(player)
+
+            if general_square is not None:
+                moves_list.append((general_square, general_square))
+
+        for move in moves_list:
+            board.push_move(move[0], move[1])
+
+            if board.is_in_check(player):
+                board.pop_move()
+                continue
+
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.pop_move()
+
+            if score > best_score:
+                best_score = score
+                best_move_found = move
+
+                if ply == 0:
+                    self._root_move = move
+
+                if score > alpha:
+                    alpha = score
+
+                    if alpha >= beta:
+                        if board.get_piece(move[1]) == EMPTY and move not in self._killer_moves[ply]:
+                            self._killer_moves[ply][1] = self._killer_moves[ply][0]
+                            self._killer_moves[ply][0] = move
+
+                        break
+
+        # A player with no legal moves is checkmated, since they could pass if they were not in check.
+        if best_move_found is None:
+            return -MATE_SCORE + ply
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+
+        else:
+            bound = EXACT
+
+        self._transposition_table.store(key, depth, _score_to_table(best_score, ply), bound, best_move_found)
+
+        return best_score
+
+    def _quiesce(self, alpha, beta, ply, in_check=None):
+        """
+        Searches only the captures until the position is quiet. The player can choose not to capture, so the score of
+        the position as it stands is a lower bound. A player in check has to get out of it, so all their moves are
+        searched instead.
+
+        Takes the alpha and beta bounds, the ply from the root of the search, and whether the player is in check, or
+        None to find out.
+        Returns the score of the position for the player whose turn it is.
+        """
+
+        self._check_time()
+        board = self._board
+        player = board.get_side_to_move()
+
+        if ply >= MAXIMUM_PLY:
+            return self._evaluate()
+
+        if in_check is None:
+            in_check = board.is_in_check(player)
+
+        if in_check:
+            best_score = -INFINITY
+
+        else:
+            best_score = self._evaluate()
+
+            if best_score >= beta:
+                return best_score
+
+            if best_score > alpha:
+                alpha = best_score
+
+        has_legal_move = False
+
+        for piece_square, new_square in self._ordered_moves(player, None, ply, not in_check):
+            board.push_move(piece_square, new_square)
+
+            if board.is_in_check(player):
+                board.pop_move()
+                continue
+
+            has_legal_move = True
+            score = -self._quiesce(-beta, -alpha, ply + 1)
+            board.pop_move()
+
+            if score > best_score:
+                best_score = score
+
+                if score > alpha:
+                    alpha = score
+
+                    if alpha >= beta:
+                        break
+
+        if in_check and not has_legal_move:
+            return -MATE_SCORE + ply
+
+        return best_score
+
+
+def _score_to_table(score, ply):
+    """
+    Converts a score to be stored in the transposition table. Checkmate scores are stored as the number of plies to
+    the checkmate from the position, instead of from the root of the search.
+    """
+
+    if score > MATE_BOUND:
+        return score + ply
+
+    if score < -MATE_BOUND:
+        return score - ply
+
+    return score
+
+
+def _score_from_table(score, ply):
+    """
+    Converts a score from the transposition table back to a score from the root of the search.
+    """
+
+    if score > MATE_BOUND:
+        return score - ply
+
+    if score < -MATE_BOUND:
+        return score + ply
+
+    return score
@@ -0,0 +1,114 @@
+# Description:
+#     The static evaluation of a Janggi position: the values of the pieces and a table of bonuses for each piece type
+#     on each square. The score of a position is the sum of the value and square bonus of each red piece, minus the
+#     same for each blue piece. The board core keeps the score up to date as moves are made and taken back, so it
+#     never has to be added up from the whole board during a search.
+#
+#     The scores are in hundredths of a point. The tables are written from red's side of the board, with red's back
+#     row first, and are turned around for blue.
+
+# The standard Janggi piece values. The general cannot be captured, so it has no value.
+PIECE_VALUES = {"general": 0, "guard": 300, "horse": 500, "elephant": 300, "chariot": 1300, "cannon": 700,
+                "soldier": 200}
+
+# The bonus for each piece type on each square, with one row of nine columns for each of the rows 1 to 10.
+SQUARE_TABLES = {
+    # The general is safest in the middle of the palace, where it can step away from a check in any direction.
+    "general": (
+        (0, 0, 0, -10, -5, -10, 0, 0, 0),
+        (0, 0, 0, -5, 10, -5, 0, 0, 0),
+        (0, 0, 0, -10, -5, -10, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0)
+    ),
+
+    # The guards guard the general best from the squares next to the middle of the palace.
+    "guard": (
+        (0, 0, 0, 0, 5, 0, 0, 0, 0),
+        (0, 0, 0, 5, 10, 5, 0, 0, 0),
+        (0, 0, 0, 0, 5, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0)
+    ),
+
+    # The horse has the most moves in the middle of the board, and the fewest along the edges.
+    "horse": (
+        (-20, -10, -5, -5, -5, -5, -5, -10, -20),
+        (-10, 0, 5, 5, 0, 5, 5, 0, -10),
+        (-10, 5, 10, 10, 10, 10, 10, 5, -10),
+        (-5, 5, 15, 15, 15, 15, 15, 5, -5),
+        (-5, 10, 15, 20, 20, 20, 15, 10, -5),
+        (-5, 10, 20, 25, 25, 25, 20, 10, -5),
+        (-5, 10, 20, 30, 25, 30, 20, 10, -5),
+        (-5, 10, 20, 25, 30, 25, 20, 10, -5),
+        (-10, 5, 10, 15, 15, 15, 10, 5, -10),
+        (-20, -10, -5, -5, -5, -5, -5, -10, -20)
+    ),
+
+    # The elephant is slow, and is best kept in the middle of its own side where it defends.
+    "elephant": (
+        (-10, -5, 0, 0, 0, 0, 0, -5, -10),
+        (-5, 0, 5, 5, 5, 5, 5, 0, -5),
+        (-5, 5, 10, 10, 15, 10, 10, 5, -5),
+        (0, 5, 10, 15, 15, 15, 10, 5, 0),
+        (0, 5, 10, 15, 15, 15, 10, 5, 0),
+        (0, 5, 10, 10, 10, 10, 10, 5, 0),
+        (-5, 0, 5, 10, 10, 10, 5, 0, -5),
+        (-5, 0, 5, 5, 5, 5, 5, 0, -5),
+        (-10, -5, 0, 0, 0, 0, 0, -5, -10),
+        (-10, -10, -5, -5, -5, -5, -5, -10, -10)
+    ),
+
+    # The chariot is strongest on the middle columns and in the opponent's palace, where it attacks the general.
+    "chariot": (
+        (-5, 0, 0, 5, 5, 5, 0, 0, -5),
+        (0, 0, 0, 5, 5, 5, 0, 0, 0),
+        (0, 0, 0, 5, 5, 5, 0, 0, 0),
+        (0, 5, 5, 10, 10, 10, 5, 5, 0),
+        (5, 5, 5, 10, 10, 10, 5, 5, 5),
+        (5, 10, 10, 10, 10, 10, 10, 10, 5),
+        (5, 10, 10, 15, 15, 15, 10, 10, 5),
+        (5, 10, 10, 25, 25, 25, 10, 10, 5),
+        (10, 15, 15, 30, 35, 30, 15, 15, 10),
+        (5, 10, 10, 20, 20, 20, 10, 10, 5)
+    ),
+
+    # The cannon defends from the middle of its own palace, and attacks the general from the opponent's palace.
+    "cannon": (
+        (0, 0, 5, 5, 10, 5, 5, 0, 0),
+        (0, 0, 5, 5, 15, 5, 5, 0, 0),
+        (0, 5, 5, 5, 10, 5, 5, 5, 0),
+        (0, 0, 0, 5, 5, 5, 0, 0, 0),
+        (0, 0, 0, 5, 5, 5, 0, 0, 0),
+        (0, 0, 5, 5, 5, 5, 5, 0, 0),
+        (0, 0, 5, 10, 10, 10, 5, 0, 0),
+        (0, 5, 5, 15, 20, 15, 5, 5, 0),
+        (0, 0, 5, 15, 25, 15, 5, 0, 0),
+        (0, 0, 0, 10, 15, 10, 0, 0, 0)
+    ),
+
+    # Soldiers become stronger as they move forward, and strongest when they reach the opponent's palace. A soldier on
+    # the last row can only move sideways, so it is worth less there.
+    "soldier": (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 5, 0, 0, 0, 0),
+        (5, 5, 10, 10, 15, 10, 10, 5, 5),
+        (10, 15, 20, 25, 30, 25, 20, 15, 10),
+        (15, 20, 30, 40, 45, 40, 30, 20, 15),
+        (20, 25, 35, 60, 70, 60, 35, 25, 20),
+        (20, 25, 35, 70, 90, 70, 35, 25, 20),
+        (5, 10, 15, 40, 50, 40, 15, 10, 5)
+    )
+}
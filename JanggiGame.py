@@ -27,7 +27,11 @@
 #
 #     The player must checkmate the opposing general in order to win.
 
-import copy
+from JanggiBoard import JanggiBoard, BLUE, CANNON, CHARIOT, COLUMN_INDICES, COLUMN_NAMES, ELEPHANT, GENERAL, GUARD, \
+    HORSE, MAILBOX_NAMES, MOVE_RECORD_SIZE, OFFBOARD, PIECE_TYPE, PLAYER_CODES, PLAYER_NAMES, ROW_COLUMN_NAMES, \
+    ROW_INDICES, ROW_NAMES, SOLDIER, SQUARE_INDICES, TO_MAILBOX
+from JanggiBitboard import JanggiBitboard
+from JanggiEngine import JanggiEngine
 
 
 class JanggiGame:
@@ -59,31 +63,60 @@ class JanggiGame:
     The player must checkmate the opposing general in order to win.
     """
 
-    def __init__(self):
+    __slots__ = ("_game_state", "_mate_pending", "_board", "_engine", "_snapshot", "_packed_history",
+                 "_hibernation_manager")
+
+    def __init__(self, use_bitboards=False, board=None):
         """
         Sets up the beginning of the game. Initializes the game state to unfinished. Set it to be the blue player's
         turn. Lastly, initializes the board and pieces to their beginning positions.
+
+        The board core keeps the board as a mailbox. If use_bitboards is True, it also keeps bitboards of the pieces,
+        which it uses for the chariot and cannon moves. If a board core is given, the game is played on it from its
+        position instead, and use_bitboards is not used.
         """
 
         self._game_state = "UNFINISHED"
-        self._blues_turn = True
 
-        self._game_board = [
-            [Chariot("red", "a1"), Elephant("red", "b1"), Horse("red", "c1"),
-             Guard("red", "d1"), None, Guard("red", "f1"),
-             Elephant("red", "g1"), Horse("red", "h1"), Chariot("red", "i1")],
+        # Set when the last move put the opponent in check, until it is known whether it was checkmate.
+        self._mate_pending = False
+
+        # The engine used by best_move, which searches on the same board core. It is only created by the first
+        # search, so that games that never search do not hold one.
+        self._engine = None
+
+        # While the game is hibernating, the board core is None and the game is kept as the bytes of a snapshot. The
+        # manager, if there is one, is told whenever the game is used, so it can choose which games to hibernate.
+        self._snapshot = None
+        self._hibernation_manager = None
+
+        # The moves made before the game last woke up, packed by the board core, which are no longer on its undo
+        # stack. They are taken back from here once the board core has none of its own left.
+        self._packed_history = bytearray()
+
+        if board is not None:
+            self._board = board
+
+            # The position may start in check, so look for checkmate the first time the game state is asked for.
+            self._mate_pending = board.is_in_check(board.get_side_to_move())
+            return
+
+        self._board = _board_class(use_bitboards).from_game_board([
+            [Chariot("red"), Elephant("red"), Horse("red"),
+             Guard("red"), None, Guard("red"),
+             Elephant("red"), Horse("red"), Chariot("red")],
 
             [None, None, None,
-             None, General("red", "e2"), None,
+             None, General("red"), None,
              None, None, None],
 
-            [None, Cannon("red", "b3"), None,
+            [None, Cannon("red"), None,
              None, None, None,
-             None, Cannon("red", "h3"), None],
+             None, Cannon("red"), None],
 
-            [Soldier("red", "a4"), None, Soldier("red", "c4"),
-             None, Soldier("red", "e4"), None,
-             Soldier("red", "g4"), None, Soldier("red", "i4")],
+            [Soldier("red"), None, Soldier("red"),
+             None, Soldier("red"), None,
+             Soldier("red"), None, Soldier("red")],
 
             [None, None, None,
              None, None, None,
@@ -93,37 +126,129 @@ class JanggiGame:
              None, None, None,
              None, None, None],
 
-            [Soldier("blue", "a7"), None, Soldier("blue", "c7"),
-             None, Soldier("blue", "e7"), None,
-             Soldier("blue", "g7"), None, Soldier("blue", "i7")],
+            [Soldier("blue"), None, Soldier("blue"),
+             None, Soldier("blue"), None,
+             Soldier("blue"), None, Soldier("blue")],
 
-            [None, Cannon("blue", "b8"), None,
+            [None, Cannon("blue"), None,
              None, None, None,
-             None, Cannon("blue", "h8"), None],
+             None, Cannon("blue"), None],
 
             [None, None, None,
-             None, General("blue", "e9"), None,
+             None, General("blue"), None,
              None, None, None],
 
-            [Chariot("blue", "a10"), Elephant("blue", "b10"), Horse("blue", "c10"),
-             Guard("blue", "d10"), None, Guard("blue", "f10"),
-             Elephant("blue", "g10"), Horse("blue", "h10"), Chariot("blue", "i10")]
-        ]
+            [Chariot("blue"), Elephant("blue"), Horse("blue"),
+             Guard("blue"), None, Guard("blue"),
+             Elephant("blue"), Horse("blue"), Chariot("blue")]
+        ])
+
+    @classmethod
+    def from_fen(cls, fen, use_bitboards=False):
+        """
+        Creates a game from a position in FEN text, like the one returned by to_fen. The game state is unfinished
+        until a checkmate is found, and there are no moves to undo.
+
+        Takes the FEN text and whether to use the bitboard board core.
+        Returns the new game. Raises ValueError if the text is not a valid position.
+        """
+
+        return cls(board=_board_class(use_bitboards).from_fen(fen))
+
+    @classmethod
+    def from_bytes(cls, packed_position, use_bitboards=False):
+        """
+        Creates a game from a position packed by to_bytes. The game state is unfinished until a checkmate is found,
+        and there are no moves to undo.
+
+        Takes the packed position and whether to use the bitboard board core.
+        Returns the new game. Raises ValueError if the packed position is not the right length.
+        """
+
+        return cls(board=_board_class(use_bitboards).from_bytes(packed_position))
+
+    def to_fen(self):
+        """
+        Returns the position as FEN text: the rows from row 10 down to row 1 separated by "/", with red's pieces as
+        the lower case letters k, a, h, e, r, c and p, blue's pieces as upper case letters, and each run of empty
+        squares as its length, followed by "b" or "r" for the player whose turn it is.
+        """
+
+        return self._live_board().to_fen()
+
+    def to_bytes(self):
+        """
+        Returns the position packed into 46 bytes: four bits for each square and a byte for the player whose turn it
+        is. Two games with the same pieces on the same squares and the same player to move pack to the same bytes, so
+        they can be used as keys or stored on disk.
+        """
+
+        return self._live_board().to_bytes()
 
     def get_game_board(self):
         """
-        Returns the game board.
+        Returns the game board as a 10x9 list of rows of pieces. The list is created from the board core each time, so
+        changing it does not change the game.
+        """
+
+        return self._live_board().get_game_board(PIECES)
+
+    def get_board(self):
+        """
+        Returns the board core the game is played on. Moves made on it directly are not checked, and do not change
+        the game state. Hibernating the game replaces the board core, so it should not be kept.
         """
 
-        return self._game_board
+        return self._live_board()
 
     def get_game_state(self):
         """
-        Returns the game state.
+        Returns the game state. If the last move put the opponent in check, this is where it is found out whether it
+        was checkmate. Asking a hibernating game for its state only wakes it up if it has to look for checkmate, so
+        otherwise the manager is not told that the game was used.
         """
 
+        if self._board is not None and self._hibernation_manager is not None:
+            self._hibernation_manager.touch(self)
+
+        if self._mate_pending:
+            self._mate_pending = False
+            board = self._live_board()
+            player = board.get_side_to_move()
+
+            if board.is_checkmated(player):
+                if player == BLUE:
+                    self._game_state = "RED_WON"
+
+                else:
+                    self._game_state = "BLUE_WON"
+
         return self._game_state
 
+    def position_hash(self):
+        """
+        Returns a 64-bit Zobrist hash of the position, which covers where the pieces are and whose turn it is. It is
+        kept up to date as moves, passes and undos are made, so reading it does not walk the board. Two positions with
+        the same hash are almost certainly the same position.
+        """
+
+        return self._live_board().get_hash()
+
+    def evaluate(self):
+        """
+        Returns the evaluation score of the position for the player whose turn it is, in hundredths of a point. It is
+        the value of the player's pieces and the bonuses for the squares they are on, minus the same for the
+        opponent's pieces. The score is kept up to date as moves are made and taken back, so it is read without
+        walking the board.
+        """
+
+        board = self._live_board()
+
+        if board.get_side_to_move() == BLUE:
+            return -board.get_score()
+
+        return board.get_score()
+
     def make_move(self, piece_location, new_location):
         """
         Attempts to move the piece specified to a new location on the board. A player is not allowed to leave their
@@ -136,615 +261,465 @@ class JanggiGame:
         finished.
         """
 
-        dummy_piece = JanggiPiece(None, None)  # Used to use the class methods.
-        piece_row = dummy_piece.numeric_to_index(piece_location.lower())
-        piece_column = dummy_piece.alphabetic_to_index(piece_location.lower())
-        new_row = dummy_piece.numeric_to_index(new_location.lower())
-        new_column = dummy_piece.alphabetic_to_index(new_location.lower())
-        piece_to_be_moved = self._game_board[piece_row][piece_column]
-        game_board_copy = copy.deepcopy(self._game_board)
+        piece_location = piece_location.lower()
+        new_location = new_location.lower()
+
+        # Return False if either location is not on the board.
+        if piece_location not in SQUARE_INDICES or new_location not in SQUARE_INDICES:
+            return False
+
+        piece_square = TO_MAILBOX[SQUARE_INDICES[piece_location]]
+        new_square = TO_MAILBOX[SQUARE_INDICES[new_location]]
+        board = self._live_board()
+        player = board.get_side_to_move()
 
         # Return False if the game is over.
         if self._game_state != "UNFINISHED":
             return False
 
-        # Return False if there is no piece in the location.
-        if piece_to_be_moved is None:
+        # Return False if there is no piece in the location, or if it's not the current player's piece.
+        if not board.get_piece(piece_square) & player:
             return False
 
-        # Return False if it's not the current player's piece.
-        if self._blues_turn:
-            if piece_to_be_moved.get_player() != "blue":
+        # The user passing their turn only available if they're not in check.
+        if piece_square == new_square:
+            if board.is_in_check(player):
                 return False
 
-        if not self._blues_turn:
-            if piece_to_be_moved.get_player() != "red":
-                return False
+            board.push_move(piece_square, new_square)
 
-        # The user passing their turn only available if they're not in check.
-        if self._blues_turn:
-            if not self.is_in_check("blue"):
-                if piece_location == new_location:
-                    self._blues_turn = not self._blues_turn
-                    return True
-
-        elif not self._blues_turn:
-            if not self.is_in_check("red"):
-                if piece_location == new_location:
-                    self._blues_turn = not self._blues_turn
-                    return True
+            return True
 
         # Return False if the movement is invalid.
-        if new_location not in piece_to_be_moved.valid_movements(self._game_board):
+        if new_square not in board.get_piece_movements(piece_square):
             return False
 
-        # Move the piece into the new position, and remove the piece from the old position. Update its position.
-        self._game_board[new_row][new_column] = piece_to_be_moved
-        self._game_board[piece_row][piece_column] = None
-        self._game_board[new_row][new_column].set_position(
-            piece_to_be_moved.indices_to_algebraic_notation(new_column, new_row))
-
-        # Return False if the move will make the player be in check. Reset the board back to its previous state if so.
-        if self._blues_turn:
-            if self.is_in_check("blue"):
-                self._game_board = copy.deepcopy(game_board_copy)
+        # Move the piece into the new position. The move is recorded on the undo stack, which also passes the turn.
+        board.push_move(piece_square, new_square)
 
-                return False
-
-            if self.is_in_check("red"):
-                if self.is_checkmated("red"):
-                    self._game_state = "BLUE_WON"
-
-        else:
-            if self.is_in_check("red"):
-                self._game_board = copy.deepcopy(game_board_copy)
+        # Return False if the move will make the player be in check. Take the move back off the stack if so.
+        if board.is_in_check(player):
+            board.pop_move()
 
-                return False
-
-            if self.is_in_check("blue"):
-                if self.is_checkmated("blue"):
-                    self._game_state = "RED_WON"
+            return False
 
-        self._blues_turn = not self._blues_turn
+        # Checkmate is only looked for when the game state is asked for. A checkmated player has no legal moves, so
+        # any move they try fails anyway, and a move that succeeds shows they were not checkmated.
+        self._mate_pending = board.is_in_check(board.get_side_to_move())
 
         return True
 
-    def is_in_check(self, player_color):
+    def legal_moves(self, player=None):
         """
-        Checks for all possible moves for the opponent's pieces. The current player's general is in check if the their
-        general's location is a valid move for any of the opponent's pieces.
+        Finds the moves a player can make, one at a time, so that finding the first move or counting them does not
+        need a list of all of them. Each move is tried and taken back before it is given, and the game is the same as
+        before whenever a move is given. No moves should be made while the moves are being gone through.
 
-        Returns True if the player's general is in check.
+        Takes the color of the player, or None for the player whose turn it is.
+        Yields (piece location, new location) tuples in algebraic notation. The pass is given last, as the general's
+        location twice, if the player is not in check. Nothing is given if the game is finished.
         """
 
-        opponent_movements_set = set()
-        general_location = None
+        if self.get_game_state() != "UNFINISHED":
+            return
 
-        for row in self._game_board:
-            for column in row:
+        board = self._live_board()
 
-                if column is not None:
-                    if column.get_player() != player_color:
-                        opponent_movements_set.update(column.valid_movements(self._game_board))
+        if player is None:
+            player_code = board.get_side_to_move()
 
-                    else:
-                        if column.get_piece_name() == "general":
-                            general_location = column.get_position()
+        elif player in PLAYER_CODES:
+            player_code = PLAYER_CODES[player]
 
-        if general_location in opponent_movements_set:
-            return True
+        else:
+            return
 
-        return False
+        for piece_square, new_square in board.legal_movements(player_code):
+            yield MAILBOX_NAMES[piece_square], MAILBOX_NAMES[new_square]
 
-    def is_checkmated(self, player_color):
+    def best_move(self, depth=None, time_limit=None):
         """
-        Checks for all possible moves for the player's pieces. The player is checkmated if they have no possible moves
-        to get them out of check.
+        Searches for the best move of the player whose turn it is. The search goes one depth at a time, up to the
+        depth, or for as long as it can within the time limit. If the time runs out, the best move found so far is
+        returned. With neither a depth nor a time limit, the search goes to a depth of 3. The game is the same as
+        before once the search is finished.
 
-        Returns True if the player is checkmated.
-        """
+        Takes the depth in plies and the time limit in seconds.
+        Returns the best move as a (piece location, new location) tuple in algebraic notation, which is the general's
+        location twice for a pass. Returns None if the game is finished or the player has no moves.
 
-        possible_movements_set = set()
-        pieces_set = set()
-        game_board_copy = copy.deepcopy(self._game_board)
+        The engine's transposition table is kept by the game between searches, within ENGINE_MEMORY_BUDGET, and is
+        freed when the game hibernates.
+        """
 
-        # Iterate through the board.
-        for row in self._game_board:
-            for column in row:
+        if self.get_game_state() != "UNFINISHED":
+            return None
 
-                # Look for the player's pieces.
-                if column is not None:
-                    if column.get_player() == player_color:
-                        pieces_set.add(column)
+        board = self._live_board()
 
-        # Test each available movement the player can do. If the move will make the player go out of
-        # check, add it to the set of possible moves.
-        for piece in pieces_set:
-            for position in piece.valid_movements(self._game_board):
+        if self._engine is None:
+            self._engine = JanggiEngine(board, ENGINE_MEMORY_BUDGET)
 
-                # Reset the board back to normal.
-                self._game_board = copy.deepcopy(game_board_copy)
+        move = self._engine.search(depth, time_limit)[0]
 
-                piece_row = piece.numeric_to_index(piece.get_position())
-                piece_column = piece.alphabetic_to_index(piece.get_position())
-                new_row = piece.numeric_to_index(position)
-                new_column = piece.alphabetic_to_index(position)
+        if move is None:
+            return None
 
-                self._game_board[new_row][new_column] = piece
-                self._game_board[piece_row][piece_column] = None
-                piece.set_position(position)
+        return MAILBOX_NAMES[move[0]], MAILBOX_NAMES[move[1]]
 
-                if not self.is_in_check(player_color):
-                    possible_movements_set.add(position)
+    def undo_move(self):
+        """
+        Takes back the last move or pass made with make_move. The captured piece and the turn are restored to what
+        they were before that move, and a finished game becomes unfinished again.
 
-        self._game_board = copy.deepcopy(game_board_copy)
+        Returns True if a move was taken back. Returns False if no moves have been made.
+        """
 
-        # If the player has no available moves, the player is checkmated.
-        if possible_movements_set == set():
-            return True
+        board = self._live_board()
 
-        return False
+        if board.get_move_count():
+            board.pop_move()
 
+        elif self._packed_history:
+            board.take_back_move(self._packed_history[-MOVE_RECORD_SIZE:])
+            del self._packed_history[-MOVE_RECORD_SIZE:]
 
-class JanggiPiece:
-    """
-    A Janggi piece belonging a player and it has position on the board.
+        else:
+            return False
+        self._game_state = "UNFINISHED"
+        self._mate_pending = False
 
-    All pieces will inherit from JanggiPiece, since all pieces need to belong to a player and be at a position.
-    """
+        return True
 
-    def __init__(self, player, position):
-        """
-        Creates a Janggi piece belonging to a player's color and initialize its position on the board.
+    def is_in_check(self, player_color):
         """
+        Checks if any of the opponent's pieces could move onto the square of the player's general.
 
-        self._player = player
-        self._position = position
-        self._piece_type = "Generic Janggi Piece"
-
-    def get_player(self):
-        """
-        Returns the player who owns this piece.
+        Returns True if the player's general is in check.
         """
 
-        return self._player
-
-    def get_piece_name(self):
-        """
-        Returns the name of the piece.
-        """
+        if player_color not in PLAYER_CODES:
+            return False
 
-        return self._piece_type
+        return self._live_board().is_in_check(PLAYER_CODES[player_color])
 
-    def get_position(self):
+    def is_square_attacked(self, square, by_player):
         """
-        Returns the position of the piece.
-        """
-
-        return self._position
+        Checks if any of a player's pieces could move onto a square on their next move. Instead of finding all the
+        moves of the player's pieces, it looks outward from the square for the pieces that could reach it.
 
-    def set_position(self, position):
-        """
-        Sets the position of the piece to a new location.
+        Takes the algebraic notation of the square and the color of the attacking player.
+        Returns True if the square is attacked by the player.
         """
 
-        self._position = position
+        return self._live_board().is_attacked(TO_MAILBOX[SQUARE_INDICES[square.lower()]], PLAYER_CODES[by_player])
 
-    def alphabetic_to_index(self, algebraic_notation):
+    def is_checkmated(self, player_color):
         """
-        Converts the alphabetic part of the algebraic notation to its index notation for columns.
+        Looks for a move that gets the player out of check. The player is checkmated if there isn't one. The search
+        stops at the first move that gets the player out of check.
 
-        Takes an algebraic notation from a1 to i10.
-        Returns the index of the alphabetical part.
+        Returns True if the player is checkmated.
         """
 
-        alpha_dict = {
-            "a": 0, "b": 1, "c": 2,
-            "d": 3, "e": 4, "f": 5,
-            "g": 6, "h": 7, "i": 8
-        }
+        if player_color not in PLAYER_CODES:
+            return False
 
-        return alpha_dict.get(algebraic_notation[0])
+        return self._live_board().is_checkmated(PLAYER_CODES[player_color])
 
-    def numeric_to_index(self, algebraic_notation):
+    def hibernate(self):
         """
-        Converts the numeric part of the algebraic notation to its index notation for rows.
-
-        Takes an algebraic notation from a1 to i10.
-        Returns the index of the numerical part.
+        Puts an idle game to sleep to save memory. The board core, and the engine if there is one, are replaced by a
+        snapshot of a few bytes: the game state and the position packed by the board core's to_snapshot. The moves on
+        the board core's undo stack are packed onto the end of the game's move history, so they can still be undone.
+        The board core itself is not changed, so anything still holding it sees the same position as before. The game
+        wakes up by itself the next time it is used, on a new board core made from the snapshot.
         """
 
-        algebraic_notation.lower()
+        board = self._board
 
-        num_dict = {
-            "1": 0, "2": 1, "3": 2,
-            "4": 3, "5": 4, "6": 5,
-            "7": 6, "8": 7, "9": 8, "10": 9
-        }
+        if board is None:
+            return
 
-        return num_dict.get(algebraic_notation[1:])
+        flags = isinstance(board, JanggiBitboard) | self._mate_pending << 1
+        self._snapshot = bytes((flags, GAME_STATES.index(self._game_state))) + board.to_snapshot()
+        self._packed_history += board.pack_move_history()
+        self._board = None
+        self._engine = None
 
-    def index_to_alphabetic(self, index):
-        """
-        Converts the index for columns to the alphabetical part of the algebraic notation.
+        if self._hibernation_manager is not None:
+            self._hibernation_manager.release(self)
 
-        Takes an index from 0 to 8.
-        Returns the string of the letter corresponding to the alphabetic part of the algebraic notation.
+    def is_hibernating(self):
+        """
+        Returns True if the game is hibernating.
         """
 
-        alpha_dict = {
-            0: "a", 1: "b", 2: "c",
-            3: "d", 4: "e", 5: "f",
-            6: "g", 7: "h", 8: "i"
-        }
-
-        return alpha_dict.get(index)
+        return self._board is None
 
-    def index_to_numeric(self, index):
+    def get_snapshot_size(self):
         """
-        Converts the index for rows to the numeric part of the algebraic notation.
-
-        Takes an index from 0 to 9.
-        Returns the string of the number corresponding to the numeric part of the algebraic notation.
+        Returns the number of bytes the game is kept in while hibernating, which is the snapshot and the packed move
+        history, or 0 if the game is not hibernating.
         """
 
-        num_dict = {
-            0: "1", 1: "2", 2: "3",
-            3: "4", 4: "5", 5: "6",
-            6: "7", 7: "8", 8: "9", 9: "10"
-        }
+        if self._snapshot is None:
+            return 0
 
-        return num_dict.get(index)
+        return len(self._snapshot) + len(self._packed_history)
 
-    def algebraic_notation_convertor(self, algebraic_notation):
+    def set_hibernation_manager(self, manager):
         """
-        Converts algebraic notation to its index notation.
-
-        Takes an algebraic expression from a1 to i10.
-        Returns a tuple containing the index of the column and row.
+        Sets the manager that is told each time the game is used, or None for no manager. The manager must have a
+        touch method, which is given the game, and a release method, which is given the game when it hibernates.
         """
 
-        return [self.alphabetic_to_index(algebraic_notation), self.numeric_to_index(algebraic_notation)]
+        self._hibernation_manager = manager
 
-    def indices_to_algebraic_notation(self, columns, rows):
+    def get_hibernation_manager(self):
         """
-        Converts the indices to its algebraic notation.
-
-        Takes the index for the columns and then rows.
-        Returns the string of the algebraic notation.
+        Returns the manager that is told each time the game is used, or None if there is no manager.
         """
 
-        return self.index_to_alphabetic(columns) + self.index_to_numeric(rows)
+        return self._hibernation_manager
 
-    def horizontal_movement_check(self, game_board, h_lo_bound=0, h_hi_bound=8):
+    def _live_board(self):
         """
-        Checks if the piece is able to move left or right one space.
-
-        Takes the game board, and lower and upper boundary of the horizontal limits.
-        Returns a list of positions it can move to.
+        Returns the board core, waking the game up first if it is hibernating. Waking up only places the pieces of the
+        snapshot, however many moves have been made. Tells the manager that the game was used.
         """
 
-        # Changes the current piece's location from algebraic notation to list indices.
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        h_movements_set = set()
-
-        # The piece is not at the edge.
-        if column != h_lo_bound and column != h_hi_bound:
-
-            # The if statements checks to see if the square is empty.
-            # If the square is not empty, check to see if the piece there is the current player's piece.
-            # Add it to the list of valid moves if the square is empty or the piece is not the player's piece.
+        board = self._board
 
-            if game_board[row][column + 1] is None:
-                h_movements_set.add(self.indices_to_algebraic_notation(column + 1, row))
+        if board is None:
+            snapshot = self._snapshot
+            board = _board_class(snapshot[0] & 1).from_snapshot(snapshot[2:])
+            self._mate_pending = bool(snapshot[0] & 2)
+            self._game_state = GAME_STATES[snapshot[1]]
+            self._board = board
+            self._snapshot = None
 
-            elif game_board[row][column + 1].get_player() != self.get_player():
-                h_movements_set.add(self.indices_to_algebraic_notation(column + 1, row))
+        if self._hibernation_manager is not None:
+            self._hibernation_manager.touch(self)
 
-            if game_board[row][column - 1] is None:
-                h_movements_set.add(self.indices_to_algebraic_notation(column - 1, row))
+        return board
 
-            elif game_board[row][column - 1].get_player() != self.get_player():
-                h_movements_set.add(self.indices_to_algebraic_notation(column - 1, row))
 
-        # Piece is at the edge of the lower boundary.
-        if column == h_lo_bound:
-            if game_board[row][column + 1] is None:
-                h_movements_set.add(self.indices_to_algebraic_notation(column + 1, row))
-
-            elif game_board[row][column + 1].get_player() != self.get_player():
-                h_movements_set.add(self.indices_to_algebraic_notation(column + 1, row))
-
-        # Piece is at the edge of the upper boundary.
-        if column == h_hi_bound:
-            if game_board[row][column - 1] is None:
-                h_movements_set.add(self.indices_to_algebraic_notation(column - 1, row))
-
-            elif game_board[row][column - 1].get_player() != self.get_player():
-                h_movements_set.add(self.indices_to_algebraic_notation(column - 1, row))
-
-        return h_movements_set
-
-    def vertical_movement_check(self, game_board, v_lo_bound=0, v_hi_bound=9):
-        """
-        Checks if the piece is able to move up or down one space.
+def _board_class(use_bitboards):
+    """
+    Returns the bitboard board core class if use_bitboards is True, or else the mailbox board core class.
+    """
 
-        Takes the game board, and lower and upper boundary of the vertical limits.
-        Returns a list of positions it can move to.
-        """
+    if use_bitboards:
+        return JanggiBitboard
 
-        # Changes algebraic notation to list indices.
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        v_movements_set = set()
+    return JanggiBoard
 
-        # If the piece's movement is limited to only horizontal movements.
-        if row == v_lo_bound and row == v_hi_bound:
-            return v_movements_set
 
-        # The piece is not at the edge.
-        if row != v_lo_bound and row != v_hi_bound:
+class JanggiPiece:
+    """
+    A Janggi piece belonging to a player. The position of the piece is kept by the board, not by the piece, so there
+    is only ever one piece object for each player and piece type, which is shared by every board. Creating a piece
+    returns the shared one, and copying a piece returns the piece itself. Since it is shared, a piece cannot be
+    changed once it is created. For the same reason, pieces have no get_position or set_position, and the location of
+    a piece is its place in the rows of JanggiGame.get_game_board.
 
-            # The if statements checks to see if the square is empty.
-            # If the square is not empty, check to see if the piece there is the current player's piece.
-            # Add it to the list of valid moves if the square is empty or the piece is not the player's piece.
+    All pieces will inherit from JanggiPiece, since all pieces need to belong to a player.
+    """
 
-            if game_board[row + 1][column] is None:
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row + 1))
+    __slots__ = ("_player", "_piece_type")
 
-            elif game_board[row + 1][column].get_player() != self.get_player():
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row + 1))
+    # The shared piece for each piece class and player.
+    _shared_pieces = {}
 
-            if game_board[row - 1][column] is None:
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row - 1))
+    # The name of the pieces of the class.
+    _piece_name = "Generic Janggi Piece"
 
-            elif game_board[row - 1][column].get_player() != self.get_player():
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row - 1))
+    def __new__(cls, player):
+        """
+        Returns the shared piece of the class for the player, creating it the first time. The piece's player and name
+        are only set when it is created.
+        """
 
-        # Piece is at the edge of the lower boundary.
-        if row == v_lo_bound:
-            if game_board[row + 1][column] is None:
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row + 1))
+        piece = JanggiPiece._shared_pieces.get((cls, player))
 
-            elif game_board[row + 1][column].get_player() != self.get_player():
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row + 1))
+        if piece is None:
+            piece = super().__new__(cls)
+            object.__setattr__(piece, "_player", player)
+            object.__setattr__(piece, "_piece_type", cls._piece_name)
+            JanggiPiece._shared_pieces[(cls, player)] = piece
 
-        # Piece is at the edge of the upper boundary.
-        if row == v_hi_bound:
-            if game_board[row - 1][column] is None:
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row - 1))
+        return piece
 
-            elif game_board[row - 1][column].get_player() != self.get_player():
-                v_movements_set.add(self.indices_to_algebraic_notation(column, row - 1))
+    def __init__(self, player):
+        """
+        Creates a Janggi piece belonging to a player's color. The shared piece returned by __new__ already has its
+        player and name, so nothing is changed here.
+        """
 
-        return v_movements_set
+        pass
 
-    def diagonal_movement_check(self, game_board, h_lo_bound=0, h_hi_bound=8, v_lo_bound=0, v_hi_bound=9):
+    def __setattr__(self, name, value):
         """
-        Checks if the piece is able to diagonally one space.
-
-        Takes the game board, and lower and upper boundary of the horizontal and vertical limits
-        Returns a list of positions it can move to.
+        Raises AttributeError, since pieces are shared and never changed.
         """
 
-        # Changes algebraic notation to list indices.
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        d_movements_set = set()
+        raise AttributeError("A Janggi piece cannot be changed, since it is shared")
 
-        # Executes if the piece is not at any of the edges.
-        if v_lo_bound < row < v_hi_bound and h_lo_bound < column < h_hi_bound:
-
-            # The if statements checks to see if the square is empty.
-            # If the square is not empty, check to see if the piece there is the current player's piece.
-            # Add it to the list of valid moves if the square is empty or the piece is not the player's piece.
+    def __delattr__(self, name):
+        """
+        Raises AttributeError, since pieces are shared and never changed.
+        """
 
-            # Move top left
-            if game_board[row - 1][column - 1] is None:
-                d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row - 1))
+        raise AttributeError("A Janggi piece cannot be changed, since it is shared")
 
-            elif game_board[row - 1][column - 1].get_player() != self.get_player():
-                d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row - 1))
+    def __copy__(self):
+        """
+        Returns the piece itself, since pieces are shared and never changed.
+        """
 
-            # Move top right
-            if game_board[row - 1][column + 1] is None:
-                d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row - 1))
+        return self
 
-            elif game_board[row - 1][column + 1].get_player() != self.get_player():
-                d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row - 1))
+    def __deepcopy__(self, memo):
+        """
+        Returns the piece itself, since pieces are shared and never changed.
+        """
 
-            # Move bottom right
-            if game_board[row + 1][column + 1] is None:
-                d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row + 1))
+        return self
 
-            elif game_board[row + 1][column + 1].get_player() != self.get_player():
-                d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row + 1))
+    def __reduce__(self):
+        """
+        Pickles the piece as its class and player, so that unpickling it returns the shared piece.
+        """
 
-            # Move bottom left
-            if game_board[row + 1][column - 1] is None:
-                d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row + 1))
+        return self.__class__, (self._player,)
 
-            elif game_board[row + 1][column - 1].get_player() != self.get_player():
-                d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row + 1))
+    def get_player(self):
+        """
+        Returns the player who owns this piece.
+        """
 
-        # If the piece is on the top edge.
-        if row == v_lo_bound:
+        return self._player
 
-            # If the piece is not in the right corner
-            if column != h_hi_bound:
+    def get_piece_name(self):
+        """
+        Returns the name of the piece.
+        """
 
-                # Move bottom right
-                if game_board[row + 1][column + 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row + 1))
+        return self._piece_type
 
-                elif game_board[row + 1][column + 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row + 1))
+    def alphabetic_to_index(self, algebraic_notation):
+        """
+        Converts the alphabetic part of the algebraic notation to its index notation for columns.
 
-            # If the piece is not in the left corner.
-            if column != h_lo_bound:
+        Takes an algebraic notation from a1 to i10.
+        Returns the index of the alphabetical part.
+        """
 
-                # Move bottom left
-                if game_board[row + 1][column - 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row + 1))
+        return COLUMN_INDICES.get(algebraic_notation[0])
 
-                elif game_board[row + 1][column - 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row + 1))
+    def numeric_to_index(self, algebraic_notation):
+        """
+        Converts the numeric part of the algebraic notation to its index notation for rows.
 
-        # If the piece is on the bottom edge.
-        if row == v_hi_bound:
+        Takes an algebraic notation from a1 to i10.
+        Returns the index of the numerical part.
+        """
 
-            # If the piece is not in the right corner.
-            if column != h_hi_bound:
+        return ROW_INDICES.get(algebraic_notation[1:])
 
-                # Move top right
-                if game_board[row - 1][column + 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row - 1))
+    def index_to_alphabetic(self, index):
+        """
+        Converts the index for columns to the alphabetical part of the algebraic notation.
 
-                elif game_board[row - 1][column + 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row - 1))
+        Takes an index from 0 to 8.
+        Returns the string of the letter corresponding to the alphabetic part of the algebraic notation.
+        """
 
-            # If the piece is not in the left corner.
-            if column != h_lo_bound:
+        if 0 <= index <= 8:
+            return COLUMN_NAMES[index]
 
-                # Move top left
-                if game_board[row - 1][column - 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row - 1))
+        return None
 
-                elif game_board[row - 1][column - 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row - 1))
+    def index_to_numeric(self, index):
+        """
+        Converts the index for rows to the numeric part of the algebraic notation.
 
-        # If the piece is on the left edge
-        if column == h_lo_bound:
+        Takes an index from 0 to 9.
+        Returns the string of the number corresponding to the numeric part of the algebraic notation.
+        """
 
-            # If the piece is not in the top corner.
-            if row != v_lo_bound:
+        if 0 <= index <= 9:
+            return ROW_NAMES[index]
 
-                # Move top right
-                if game_board[row - 1][column + 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row - 1))
+        return None
 
-                elif game_board[row - 1][column + 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row - 1))
+    def algebraic_notation_convertor(self, algebraic_notation):
+        """
+        Converts algebraic notation to its index notation.
 
-            # If the piece is not in the bottom corner.
-            if row != v_hi_bound:
+        Takes an algebraic expression from a1 to i10.
+        Returns a tuple containing the index of the column and row.
+        """
 
-                # Move bottom right
-                if game_board[row + 1][column + 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row + 1))
+        return [self.alphabetic_to_index(algebraic_notation), self.numeric_to_index(algebraic_notation)]
 
-                elif game_board[row + 1][column + 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column + 1, row + 1))
+    def indices_to_algebraic_notation(self, columns, rows):
+        """
+        Converts the indices to its algebraic notation.
 
-        # If the piece is on the right edge
-        if column == h_hi_bound:
+        Takes the index for the columns and then rows.
+        Returns the string of the algebraic notation.
+        """
 
-            # If the piece is not in the top corner.
-            if row != v_lo_bound:
+        return ROW_COLUMN_NAMES[rows][columns]
 
-                # Move top left
-                if game_board[row - 1][column - 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row - 1))
+    def valid_movements(self, game_board, position):
+        """
+        Checks all possible movements on the game board and returns a set of only valid movements. The moves are found
+        by the board core. A board core, such as the one from JanggiGame.get_board, is used as it is. A 10x9 list of
+        rows is first copied into a new board core, which costs as much as setting up a whole board, so callers
+        finding the moves of many pieces should pass the board core instead.
 
-                elif game_board[row - 1][column - 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row - 1))
+        Takes the board core or the list of rows, and the location of the piece on it, since pieces do not keep their
+        own positions.
+        """
 
-            # If the piece is not in the bottom corner.
-            if row != v_hi_bound:
+        if isinstance(game_board, JanggiBoard):
+            board = game_board
 
-                # Move bottom left
-                if game_board[row + 1][column - 1] is None:
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row + 1))
+        else:
+            board = JanggiBoard.from_game_board(game_board)
 
-                elif game_board[row + 1][column - 1].get_player() != self.get_player():
-                    d_movements_set.add(self.indices_to_algebraic_notation(column - 1, row + 1))
+        piece_square = TO_MAILBOX[SQUARE_INDICES[position]]
 
-        return d_movements_set
+        return {MAILBOX_NAMES[new_square] for new_square in board.get_piece_movements(piece_square)}
 
 
 class Soldier(JanggiPiece):
     """
     A soldier JanggiPiece that can move one space forward or one space horizontally. It cannot go backwards.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes a soldier piece to belong to a player and sets its position on the board.
-        """
+    __slots__ = ()
 
-        super().__init__(player, position)
-        self._piece_type = "soldier"
-
-    def valid_movements(self, game_board):
-        """
-        Checks all possible movements on the game board and returns a set of only valid movements.
-        """
-
-        valid_movements_set = self.horizontal_movement_check(game_board)
-
-        # Red can only move to a higher index (down the board), while blue can only move to a lower index (up the board)
-        # Stop running if the piece is already at the top/bottom edge.
-        if self.get_player() == "red":
-            valid_movements_set.update(
-                self.vertical_movement_check(game_board, self.numeric_to_index(self.get_position()), 9))
-
-        else:
-            valid_movements_set.update(
-                self.vertical_movement_check(game_board, 0, self.numeric_to_index(self.get_position())))
-
-        return valid_movements_set
+    # The name of the pieces of the class.
+    _piece_name = "soldier"
 
 
 class Guard(JanggiPiece):
     """
     A guard JanggiPiece that can move one space vertically or horizontally. It is only able to move within the palace.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes a guard piece to belong to a player and sets its position on the board.
-        """
-
-        super().__init__(player, position)
-        self._piece_type = "guard"
-
-    def valid_movements(self, game_board):
-        """
-        Checks all possible movements on the game board and returns a set of only valid movements.
-        """
-
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        valid_movements_set = self.horizontal_movement_check(game_board, 3, 5)
-
-        if self.get_player() == "red":
-            valid_movements_set.update(self.vertical_movement_check(game_board, 0, 2))
-
-            # If the piece is in the corners of the red palace.
-            if (row == 0 or row == 2) and (column == 3 or column == 5):
-                valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 0, 2))
-
-            # If the piece is in the middle of the red palace.
-            elif row == 1 and column == 4:
-                valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 0, 2))
-
-        else:
-            valid_movements_set.update(self.vertical_movement_check(game_board, 7, 9))
-
-            # If the piece is in the corners of the blue palace.
-            if (row == 7 or row == 9) and (column == 3 or column == 5):
-                valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 7, 9))
-
-            # If the piece is in the middle of the blue palace.
-            elif row == 8 and column == 4:
-                valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 7, 9))
+    __slots__ = ()
 
-        return valid_movements_set
+    # The name of the pieces of the class.
+    _piece_name = "guard"
 
 
 class General(Guard):
@@ -752,17 +727,14 @@ class General(Guard):
     A general JanggiPiece that can move one space vertically or horizontally. It is only able to move within the palace.
     The player loses if his general is checkmated.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
-    This class also inherits from Guard, since they are have the same move set restrictions.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
+    This class also inherits from Guard, since they have the same move set restrictions.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes a general piece to belong to a player and sets its position on the board.
-        """
+    __slots__ = ()
 
-        super().__init__(player, position)
-        self._piece_type = "general"
+    # The name of the pieces of the class.
+    _piece_name = "general"
 
 
 class Horse(JanggiPiece):
@@ -770,41 +742,13 @@ class Horse(JanggiPiece):
     A horse JanggiPiece that can move one space vertically or horizontally and then one space diagonally forwards.
     This piece cannot jump over other pieces. It cannot move in a direction if there is a piece blocking it.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes a horse piece to belong to a player and sets its position on the board.
-        """
-
-        super().__init__(player, position)
-        self._piece_type = "horse"
-
-    def valid_movements(self, game_board):
-        """
-        Checks all possible movements on the game board and returns a set of only valid movements.
-        """
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        valid_movements_set = set()
-
-        # Positions the horse piece is able to move horizontally and vertically.
-        hv_movements_set = self.horizontal_movement_check(game_board)
-        hv_movements_set.update(self.vertical_movement_check(game_board))
-
-        # Add to a set all the possible diagonal movements at each empty vertical/horizontal location.
-        for position in hv_movements_set:
-            if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)] is None:
-                temp_piece = Horse(self.get_player(), position)
-                valid_movements_set.update(temp_piece.diagonal_movement_check(game_board))
+    __slots__ = ()
 
-        # The piece cannot move backwards diagonally. If it shares the same row or column, remove it from the set.
-        for position in valid_movements_set.copy():
-            if row == self.numeric_to_index(position) or column == self.alphabetic_to_index(position):
-                valid_movements_set.remove(position)
-
-        return valid_movements_set
+    # The name of the pieces of the class.
+    _piece_name = "horse"
 
 
 class Elephant(Horse):
@@ -812,48 +756,15 @@ class Elephant(Horse):
     An elephant JanggiPiece that can move one space vertically or horizontally and then two spaces diagonally forward.
     This piece cannot jump over other pieces. It cannot move in a direction if there is a piece blocking it.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
     This class also inherits from Horse, since an elephant piece uses a slightly modified version of the horse's
     movement.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes an elephant piece to belong to a player and sets its position on the board.
-        """
-
-        super().__init__(player, position)
-        self._piece_type = "elephant"
-
-    def valid_movements(self, game_board):
-        """
-        Checks all possible movements on the game board and returns a set of only valid movements.
-        """
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        valid_movements_set = set()
-        horse_movements_set = super().valid_movements(game_board)
-        hv_movements_set = self.horizontal_movement_check(game_board)
-        hv_movements_set.update(self.vertical_movement_check(game_board))
+    __slots__ = ()
 
-        # Add to a set all the possible diagonal movements at each empty location.
-        for position in horse_movements_set.copy():
-            if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)] is None:
-                temp_piece = Elephant(self.get_player(), position)
-                valid_movements_set.update(temp_piece.diagonal_movement_check(game_board))
-
-        # Removes invalid diagonal movements.
-        for position in valid_movements_set.copy():
-            if row == self.numeric_to_index(position) or column == self.alphabetic_to_index(position):
-                valid_movements_set.remove(position)
-
-            else:
-                for hv_position in hv_movements_set:
-                    if self.numeric_to_index(hv_position) == self.numeric_to_index(
-                            position) or self.alphabetic_to_index(hv_position) == self.alphabetic_to_index(position):
-                        valid_movements_set.remove(position)
-
-        return valid_movements_set
+    # The name of the pieces of the class.
+    _piece_name = "elephant"
 
 
 class Chariot(JanggiPiece):
@@ -861,135 +772,13 @@ class Chariot(JanggiPiece):
     A chariot JanggiPiece that can move an the length of the board vertically or horizontally. The chariot can also move
     along the diagonal lines when in the palace.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes a chariot piece to belong to a player and sets its position on the board.
-        """
-
-        super().__init__(player, position)
-        self._piece_type = "chariot"
-
-    def inf_hv_movement(self, game_board):
-        """
-        Adds each space up, down, left, and right from the piece to a set until it reaches the edge or another piece.
-        If it reaches a piece, it will also add its position to the set.
-
-        Takes the game board in order to check piece positions.
-        Returns a set of all positions found to be None and the first piece that is encountered in each direction.
-        """
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        hv_movements_set = set()
-
-        # Iterate left from piece if the first space to the left is not a piece.
-        if column > 0 and game_board[row][column - 1] is not None:
-            hv_movements_set.add(self.indices_to_algebraic_notation(column - 1, row))
-        else:
-            while column > 0 and game_board[row][column - 1] is None:
-                column -= 1
-                hv_movements_set.add(self.indices_to_algebraic_notation(column, row))
-                if column > 0 and game_board[row][column - 1] is not None:
-                    hv_movements_set.add(self.indices_to_algebraic_notation(column - 1, row))
-
-        column = self.alphabetic_to_index(self.get_position())
-
-        # Iterate right from piece if the first space to the right is not a piece.
-        if column < 8 and game_board[row][column + 1] is not None:
-            hv_movements_set.add(self.indices_to_algebraic_notation(column + 1, row))
-        else:
-            while column < 8 and game_board[row][column + 1] is None:
-                column += 1
-                hv_movements_set.add(self.indices_to_algebraic_notation(column, row))
-                if column < 8 and game_board[row][column + 1] is not None:
-                    hv_movements_set.add(self.indices_to_algebraic_notation(column + 1, row))
-
-        column = self.alphabetic_to_index(self.get_position())
-
-        # Iterate up from piece if the first space up is not a piece.
-        if row > 0 and game_board[row - 1][column] is not None:
-            hv_movements_set.add(self.indices_to_algebraic_notation(column, row - 1))
-        else:
-            while row > 0 and game_board[row - 1][column] is None:
-                row -= 1
-                hv_movements_set.add(self.indices_to_algebraic_notation(column, row))
-                if row > 0 and game_board[row - 1][column] is not None:
-                    hv_movements_set.add(self.indices_to_algebraic_notation(column, row - 1))
-
-        row = self.numeric_to_index(self.get_position())
+    __slots__ = ()
 
-        # Iterate down from piece if the first space down is not a piece.
-        if row < 9 and game_board[row + 1][column] is not None:
-            hv_movements_set.add(self.indices_to_algebraic_notation(column, row + 1))
-        else:
-            while row < 9 and game_board[row + 1][column] is None:
-                row += 1
-                hv_movements_set.add(self.indices_to_algebraic_notation(column, row))
-                if row < 9 and game_board[row + 1][column] is not None:
-                    hv_movements_set.add(self.indices_to_algebraic_notation(column, row + 1))
-
-        return hv_movements_set
-
-    def valid_movements(self, game_board):
-        """
-        Checks all possible movements on the game board and returns a set of only valid movements.
-        """
-
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        valid_movements_set = self.inf_hv_movement(game_board)
-
-        # Look for positions with a piece in it. If it is the player's piece, remove it from the set.
-        for position in valid_movements_set.copy():
-            if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)] is not None:
-                if game_board[self.numeric_to_index(position)][
-                    self.alphabetic_to_index(position)].get_player() == self.get_player():
-                    valid_movements_set.remove(position)
-
-        # Diagonal movements available when inside a palace.
-        # If the piece is in the corners of the red palace.
-        if (row == 0 or row == 2) and (column == 3 or column == 5):
-            valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 0, 2))
-
-            # Possible for the piece to move an additional space diagonally if the middle of the palace is empty.
-            if game_board[1][4] is None:
-                temp_piece = Chariot(self.get_player(), "e2")
-                temp_set = temp_piece.diagonal_movement_check(game_board)
-
-                # Removes invalid diagonal movements.
-                for temp_position in temp_set.copy():
-                    if row == self.numeric_to_index(temp_position) or column == self.alphabetic_to_index(temp_position):
-                        temp_set.remove(temp_position)
-
-                valid_movements_set.update(temp_set)
-
-        # If the piece is in the middle of the red palace.
-        elif row == 1 and column == 4:
-            valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 0, 2))
-
-        # If the piece is in the corners of the blue palace.
-        if (row == 7 or row == 9) and (column == 3 or column == 5):
-            valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 7, 9))
-
-            # Possible for the piece to move an additional space diagonally if the middle of the palace is empty.
-            if game_board[8][4] is None:
-                temp_piece = Chariot(self.get_player(), "e9")
-                temp_set = temp_piece.diagonal_movement_check(game_board)
-
-                # Removes invalid diagonal movements.
-                for temp_position in temp_set.copy():
-                    if row == self.numeric_to_index(temp_position) or column == self.alphabetic_to_index(temp_position):
-                        temp_set.remove(temp_position)
-
-                valid_movements_set.update(temp_set)
-
-        # If the piece is in the middle of the blue palace.
-        elif row == 8 and column == 4:
-            valid_movements_set.update(self.diagonal_movement_check(game_board, 3, 5, 7, 9))
-
-        return valid_movements_set
+    # The name of the pieces of the class.
+    _piece_name = "chariot"
 
 
 class Cannon(Chariot):
@@ -998,99 +787,26 @@ class Cannon(Chariot):
     it can jump over. It can move any distance provided the previous requirement is met. It cannot capture other cannon
     pieces. It cannot jump over two pieces. The cannon can also move along the diagonal lines when in the palace.
 
-    This class inherits from JanggiPiece, since all pieces need to belong to a player and be at a position.
+    This class inherits from JanggiPiece, since all pieces need to belong to a player.
     This class also inherits from Chariot, since a cannon piece uses a slightly modified version of the chariot's
     movement.
     """
 
-    def __init__(self, player, position):
-        """
-        Initializes a cannon piece to belong to a player and sets its position on the board.
-        """
-
-        super().__init__(player, position)
-        self._piece_type = "cannon"
-
-    def valid_movements(self, game_board):
-        """
-        Checks all possible movements on the game board and returns a set of only valid movements.
-        """
-        column = self.alphabetic_to_index(self.get_position())
-        row = self.numeric_to_index(self.get_position())
-        piece_location_set = self.inf_hv_movement(game_board)
-        valid_movements_set = set()
-
-        # Look for squares with pieces.
-        for position in piece_location_set.copy():
-            if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)] is None:
-                piece_location_set.remove(position)
-
-            # Unable to jump over other cannons
-            if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)] is not None:
-                if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)].get_piece_name() == "cannon":
-                    piece_location_set.remove(position)
-
-        # Create a temporary piece in each location and get its vertical and horizontal movements.
-        for position in piece_location_set:
-            temp_piece = Cannon(self.get_player(), position)
-            temp_set = temp_piece.inf_hv_movement(game_board)
-
-            for temp_position in temp_set:
-
-                # The cannon must move to a space within the same row or column.
-                # The space must also be after the piece, since the cannon is jumping over it.
-                if row == self.numeric_to_index(temp_position):
-
-                    if self.alphabetic_to_index(temp_position) < self.alphabetic_to_index(position) < column:
-                        valid_movements_set.add(temp_position)
-
-                    elif self.alphabetic_to_index(temp_position) > self.alphabetic_to_index(position) > column:
-                        valid_movements_set.add(temp_position)
-
-                if column == self.alphabetic_to_index(position):
-
-                    if self.numeric_to_index(temp_position) < self.numeric_to_index(position) < row:
-                        valid_movements_set.add(temp_position)
-
-                    if self.numeric_to_index(temp_position) > self.numeric_to_index(position) > row:
-                        valid_movements_set.add(temp_position)
-
-        # Cannot capture your own pieces.
-        for position in valid_movements_set.copy():
-            if game_board[self.numeric_to_index(position)][self.alphabetic_to_index(position)] is not None:
-                if game_board[self.numeric_to_index(position)][
-                    self.alphabetic_to_index(position)].get_player() == self.get_player():
-                    valid_movements_set.remove(position)
-
-                # Cannot capture enemy cannons.
-                else:
-                    if game_board[self.numeric_to_index(position)][
-                    self.alphabetic_to_index(position)].get_piece_name() == "cannon":
-                        valid_movements_set.remove(position)
-
-        # Diagonal movements available when inside a palace.
-        # If the piece is in the corners of the red palace.
-        if (row == 0 or row == 2) and (column == 3 or column == 5):
-            if game_board[1][4] is not None and game_board[1][4].get_piece_name() != "cannon":
-                temp_piece = Cannon(self.get_player(), "e2")
-                temp_set = temp_piece.diagonal_movement_check(game_board)
-
-                for temp_position in temp_set.copy():
-                    if row == self.numeric_to_index(temp_position) or column == self.alphabetic_to_index(temp_position):
-                        temp_set.remove(temp_position)
+    __slots__ = ()
 
-                valid_movements_set.update(temp_set)
+    # The name of the pieces of the class.
+    _piece_name = "cannon"
 
-        # If the piece is in the corners of the blue palace.
-        if (row == 7 or row == 9) and (column == 3 or column == 5):
-            if game_board[8][4] is not None and game_board[8][4].get_piece_name() != "cannon":
-                temp_piece = Cannon(self.get_player(), "e9")
-                temp_set = temp_piece.diagonal_movement_check(game_board)
 
-                for temp_position in temp_set.copy():
-                    if row == self.numeric_to_index(temp_position) or column == self.alphabetic_to_index(temp_position):
-                        temp_set.remove(temp_position)
+# The memory budget of the transposition table of each game's engine, in bytes. It is kept small, since a program
+# hosting many games may have an engine for each of them.
+ENGINE_MEMORY_BUDGET = 1024 * 1024
 
-                valid_movements_set.update(temp_set)
+# The game states, in the order they are numbered in a hibernation snapshot.
+GAME_STATES = ("UNFINISHED", "RED_WON", "BLUE_WON")
 
-        return valid_movements_set
+# The piece class for each piece type, and the shared piece for each piece code, used to fill in the game board.
+PIECE_CLASSES = {GENERAL: General, GUARD: Guard, HORSE: Horse, ELEPHANT: Elephant,
+                 CHARIOT: Chariot, CANNON: Cannon, SOLDIER: Soldier}
+PIECES = tuple(PIECE_CLASSES[piece & PIECE_TYPE](PLAYER_NAMES[piece & OFFBOARD])
+               if piece & PIECE_TYPE and piece & OFFBOARD else None for piece in range(OFFBOARD))
@@ -0,0 +1,134 @@
+# Description:
+#     Keeps only the most recently used games awake, for a program hosting many games that sit idle between moves. A
+#     hibernating JanggiGame is a snapshot of a few bytes instead of a board core, and wakes up by itself the next time
+#     it is used. The manager is told each time one of its games is used, and when more games are awake than its
+#     budget allows, it puts the least recently used ones to sleep.
+#
+#     The manager and its games must be used from one thread, since waking one game can put another to sleep.
+
+from collections import OrderedDict
+
+DEFAULT_RESIDENT_BUDGET = 1000
+
+
+class HibernationManager:
+    """
+    Decides which games stay awake, by hibernating the least recently used game whenever more than the resident
+    budget of games are awake.
+    """
+
+    __slots__ = ("_resident_budget", "_resident_games", "_game_count", "_hibernations")
+
+    def __init__(self, resident_budget=DEFAULT_RESIDENT_BUDGET):
+        """
+        Creates a manager with no games.
+
+        Takes the largest number of games to keep awake, which must be at least 1.
+        """
+
+        if resident_budget < 1:
+            raise ValueError("The resident budget must be at least 1")
+
+        self._resident_budget = resident_budget
+
+        # The games that are awake, by id, from the least recently used to the most recently used.
+        self._resident_games = OrderedDict()
+        self._game_count = 0
+        self._hibernations = 0
+
+    def add(self, game):
+        """
+        Starts managing a game. A game that is awake counts as just used. Raises ValueError if the game already has a
+        manager.
+        """
+
+        if game.get_hibernation_manager() is not None:
+            raise ValueError("The game already has a hibernation manager")
+
+        game.set_hibernation_manager(self)
+        self._game_count += 1
+
+        if not game.is_hibernating():
+            self.touch(game)
+
+    def remove(self, game):
+        """
+        Stops managing a game. The game is left awake or hibernating as it is. Raises ValueError if the game is not
+        managed by this manager.
+        """
+
+        if game.get_hibernation_manager() is not self:
+            raise ValueError("The game is not managed by this hibernation manager")
+
+        game.set_hibernation_manager(None)
+        self._resident_games.pop(id(game), None)
+        self._game_count -= 1
+
+    def touch(self, game):
+        """
+        Marks a game that is awake as the most recently used, and hibernates the least recently used games if there
+        are too many awake. Called by the game each time it is used.
+        """
+
+        resident_games = self._resident_games
+        game_id = id(game)
+
+        if game_id in resident_games:
+            resident_games.move_to_end(game_id)
+            return
+
+        resident_games[game_id] = game
+
+        while len(resident_games) > self._resident_budget:
+            self._hibernations += 1
+            resident_games.popitem(last=False)[1].hibernate()
+
+    def release(self, game):
+        """
+        Forgets that a game is awake. Called by the game when it hibernates.
+        """
+
+        self._resident_games.pop(id(game), None)
+
+    def set_resident_budget(self, resident_budget):
+        """
+        Changes the largest number of games to keep awake, hibernating the least recently used games if there are
+        too many awake.
+        """
+
+        if resident_budget < 1:
+            raise ValueError("The resident budget must be at least 1")
+
+        self._resident_budget = resident_budget
+
+        while len(self._resident_games) > resident_budget:
+            self._hibernations += 1
+            self._resident_games.popitem(last=False)[1].hibernate()
+
+    def get_resident_budget(self):
+        """
+        Returns the largest number of games kept awake.
+        """
+
+        return self._resident_budget
+
+    def get_resident_count(self):
+        """
+        Returns the number of games that are awake.
+        """
+
+        return len(self._resident_games)
+
+    def get_game_count(self):
+        """
+        Returns the number of games being managed.
+        """
+
+        return self._game_count
+
+    def get_hibernation_count(self):
+        """
+        Returns the number of times the manager has put a game to sleep.
+        """
+
+        return self._hibernations
@@ -0,0 +1,86 @@
+# Description:
+#     A read-only file mapped into memory with mmap, for the data files that are looked up in place instead of being
+#     read in, like the opening book and the endgame tablebases. Processes that open the same file share its pages
+#     through the page cache, and a mapped file sent to another process opens the same file again there.
+
+import mmap
+
+
+class MappedFile:
+    """
+    A read-only file mapped into memory. The classes for each kind of data file inherit from it, and check the
+    contents of the file after it is mapped.
+
+    The file can be used in a with statement, which closes it at the end, and can be sent to other processes, which
+    open the same file again.
+    """
+
+    __slots__ = ("_path", "_file", "_map")
+
+    def __init__(self, path):
+        """
+        Opens the file and maps it into memory. An empty file cannot be mapped, so its map is None.
+
+        Takes the path of the file.
+        """
+
+        self._path = path
+        self._file = open(path, "rb")
+        self._map = None
+
+        try:
+            if self._file.seek(0, 2):
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+
+    def __reduce__(self):
+        """
+        Returns the file's path, so that a copy of it in another process opens the same file.
+        """
+
+        return self.__class__, (self._path,)
+
+    def __enter__(self):
+        """
+        Returns the file, for use in a with statement.
+        """
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        """
+        Closes the file at the end of a with statement.
+        """
+
+        self.close()
+
+    def close(self):
+        """
+        Unmaps and closes the file.
+        """
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        self._file.close()
+
+    def get_path(self):
+        """
+        Returns the path of the file.
+        """
+
+        return self._path
+
+    def get_size(self):
+        """
+        Returns the number of bytes in the file.
+        """
+
+        if self._map is None:
+            return 0
+
+        return len(self._map)
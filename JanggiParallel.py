@@ -0,0 +1,288 @@
+# Description:
+#     Splits perft counts and fixed depth searches across a pool of worker processes. The moves from the position are
+#     split up into tasks, and each worker starts from the position packed into a few bytes by JanggiBoard.to_bytes,
+#     together with the moves that lead to its part of the tree.
+#
+#     The subtrees of different moves can be very different in size, so there are several tasks for each worker.
+#     Perft splits the moves again, one ply deeper, until there are enough tasks. The workers take the next task as
+#     soon as they finish one, so a worker that gets a large subtree does not hold up the others, and the results are
+#     merged back as they come in.
+#
+#     A search first searches the move that a shallower search found best, on its own. The other moves are then
+#     handed out with its score as a bound, so each worker can stop searching a move as soon as it finds a reply that
+#     shows the move is no better, like alpha-beta search does in one process. The shallower search and the first
+#     move are searched while the other workers wait, so the speedup of a search is limited by how long they take
+#     compared to the rest of the moves. Each worker keeps one transposition table for all of its tasks.
+#
+#     Usage: python JanggiParallel.py perft|search [position] [--depth N] [--workers W] [--bitboards]
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from JanggiBitboard import JanggiBitboard
+from JanggiBoard import JanggiBoard, MAILBOX_NAMES
+from JanggiEngine import JanggiEngine, INFINITY, MATE_BOUND
+from JanggiPerft import POSITIONS, load_position, perft
+from JanggiTranspositionTable import TranspositionTable
+
+# The number of tasks to split the work into for each worker.
+TASKS_PER_WORKER = 8
+
+# The memory budget of each worker's transposition table in bytes, if none is given.
+DEFAULT_WORKER_MEMORY_BUDGET = 4 * 1024 * 1024
+
+# The transposition table of the worker process, created by _initialize_search_worker.
+_worker_table = None
+
+
+def _initialize_search_worker(memory_budget):
+    """
+    Creates the transposition table of a search worker process, which its search tasks reuse.
+
+    Takes the memory budget of the table in bytes.
+    """
+
+    global _worker_table
+    _worker_table = TranspositionTable(memory_budget)
+
+
+def _load_board(packed_position, use_bitboards, moves_list):
+    """
+    Unpacks a position in a worker and makes the moves leading to the worker's part of the tree.
+
+    Takes the packed position, whether to use the bitboard board core, and a list of (square, new square) moves.
+    Returns the board core.
+    """
+
+    if use_bitboards:
+        board = JanggiBitboard.from_bytes(packed_position)
+
+    else:
+        board = JanggiBoard.from_bytes(packed_position)
+
+    for piece_square, new_square in moves_list:
+        board.push_move(piece_square, new_square)
+
+    return board
+
+
+def _perft_task(packed_position, use_bitboards, moves_list, depth):
+    """
+    Counts the positions of one part of the perft tree in a worker.
+
+    Takes the packed position, whether to use the bitboard board core, the moves leading to the part of the tree, and
+    the depth left to count.
+    Returns the moves and the number of positions.
+    """
+
+    board = _load_board(packed_position, use_bitboards, moves_list)
+
+    if depth == 0:
+        return moves_list, 1
+
+    return moves_list, perft(board, depth)
+
+
+def _search_task(packed_position, use_bitboards, move, depth, alpha=-INFINITY):
+    """
+    Searches the position after one move in a worker, with the worker's transposition table. The table is cleared
+    first, so the score does not depend on which tasks the worker did before. If the move is found to score no more
+    than alpha, the search stops there, and the score is only an upper bound.
+
+    Takes the packed position, whether to use the bitboard board core, the (square, new square) move, the depth to
+    search the position after the move to, and the score the move has to beat.
+    Returns the move and its score for the player making it.
+    """
+
+    board = _load_board(packed_position, use_bitboards, [move])
+
+    # The opponent only has to show that the move scores no more than alpha, with checkmate scores one ply nearer.
+    if alpha > MATE_BOUND:
+        alpha += 1
+
+    elif alpha < -MATE_BOUND:
+        alpha -= 1
+
+    _worker_table.clear()
+    score = -JanggiEngine(board, transposition_table=_worker_table).search(depth, beta=-alpha)[1]
+
+    # The checkmate scores count the plies from the position after the move, so they are one ply further away from
+    # the position the move is made in.
+    if score > MATE_BOUND:
+        score -= 1
+
+    elif score < -MATE_BOUND:
+        score += 1
+
+    return move, score
+
+
+def _split_perft(board, depth, task_count):
+    """
+    Splits a perft count into tasks, going one ply deeper at a time until there are at least task_count tasks or
+    only one ply is left to split.
+
+    Takes the board core, the perft depth and the number of tasks wanted.
+    Returns a list of the moves leading to each task.
+    """
+
+    tasks_list = [[]]
+    split_depth = 0
+
+    while len(tasks_list) < task_count and split_depth < depth - 1 or split_depth == 0:
+        next_tasks_list = []
+
+        for moves_list in tasks_list:
+            for piece_square, new_square in moves_list:
+                board.push_move(piece_square, new_square)
+
+            player = board.get_side_to_move()
+            next_tasks_list.extend(moves_list + [move] for move in board.legal_movements(player))
+
+            for _ in moves_list:
+                board.pop_move()
+
+        tasks_list = next_tasks_list
+        split_depth += 1
+
+    return tasks_list
+
+
+def _is_bitboard(board):
+    """
+    Returns True if the board core is a bitboard board core.
+    """
+
+    return isinstance(board, JanggiBitboard)
+
+
+def parallel_perft(board, depth, workers=None):
+    """
+    Counts the positions reached by every sequence of legal moves to the depth, across a pool of worker processes.
+
+    Takes the board core, the depth, which must be at least 1, and the number of worker processes or None for one
+    per CPU.
+    Returns the number of positions, and a list of (piece location, new location, number of positions) tuples for
+    each first move, like JanggiPerft.divide.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    packed_position = board.to_bytes()
+    tasks_list = _split_perft(board, depth, workers * TASKS_PER_WORKER)
+    split_depth = len(tasks_list[0]) if tasks_list else 1
+    root_counts = {}
+
+    # Keep the first moves in the order they are generated in.
+    for piece_square, new_square in board.legal_movements(board.get_side_to_move()):
+        root_counts[(piece_square, new_square)] = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures_list = [executor.submit(_perft_task, packed_position, _is_bitboard(board), moves_list,
+                                        depth - split_depth) for moves_list in tasks_list]
+
+        for future in as_completed(futures_list):
+            moves_list, nodes = future.result()
+            root_counts[moves_list[0]] += nodes
+
+    counts_list = [(MAILBOX_NAMES[piece_square], MAILBOX_NAMES[new_square], nodes)
+                   for (piece_square, new_square), nodes in root_counts.items()]
+
+    return sum(root_counts.values()), counts_list
+
+
+def parallel_search(board, depth, workers=None, memory_budget=DEFAULT_WORKER_MEMORY_BUDGET):
+    """
+    Searches for the best move of the player whose turn it is to a fixed depth. The move found best by a search one
+    ply shallower is searched first with a full window, and then every other move is searched by a worker process
+    with its score as the bound to beat. A depth of 1 is searched in this process. The shallower search and the
+    first move are only searched by one process at a time, so they limit the speedup.
+
+    Takes the board core, the depth, the number of worker processes or None for one per CPU, and the memory budget of
+    each worker's transposition table in bytes.
+    Returns the best move as a (square, new square) tuple and its score, or None and 0 if there are no legal moves.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if depth <= 1:
+        return JanggiEngine(board, memory_budget).search(depth)[:2]
+
+    player = board.get_side_to_move()
+    moves_list = list(board.legal_movements(player))
+
+    if not moves_list:
+        return None, 0
+
+    # Search the move that looks best first, since its score is the bound the other moves are searched with.
+    first_move = JanggiEngine(board, memory_budget).search(depth - 1)[0]
+    moves_list.remove(first_move)
+    moves_list.insert(0, first_move)
+
+    packed_position = board.to_bytes()
+    use_bitboards = _is_bitboard(board)
+    scores = {}
+
+    # Like the engine, search one ply deeper if the player is in check.
+    if board.is_in_check(player):
+        depth += 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_search_worker,
+                             initargs=(memory_budget,)) as executor:
+        first_score = executor.submit(_search_task, packed_position, use_bitboards, first_move, depth - 1).result()[1]
+        scores[first_move] = first_score
+        futures_list = [executor.submit(_search_task, packed_position, use_bitboards, move, depth - 1, first_score)
+                        for move in moves_list[1:]]
+
+        for future in as_completed(futures_list):
+            move, score = future.result()
+            scores[move] = score
+
+    # A move that is no better than the first move only has a bound on its score, so ties go to the move searched
+    # first, which also keeps the result from depending on which worker finished first.
+    best_move = max(moves_list, key=lambda move: (scores[move], -moves_list.index(move)))
+
+    return best_move, scores[best_move]
+
+
+def main():
+    """
+    Runs a parallel perft count or search on a saved position from JanggiPerft, and prints the result and the time
+    taken.
+    """
+
+    parser = argparse.ArgumentParser(description="Split a perft count or search across worker processes.")
+    parser.add_argument("mode", choices=("perft", "search"), help="whether to count positions or search")
+    parser.add_argument("position", nargs="?", default="start", help="the name of a saved position from JanggiPerft "
+                                                                     "(default: start)")
+    parser.add_argument("--depth", type=int, default=4, help="the depth to count or search to (default: 4)")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes (default: one "
+                                                                  "per CPU)")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard board core")
+    arguments = parser.parse_args()
+
+    if arguments.position not in POSITIONS:
+        parser.error("unknown position " + arguments.position)
+
+    board = load_position(POSITIONS[arguments.position][0], arguments.bitboards)
+    start_time = time.perf_counter()
+
+    if arguments.mode == "perft":
+        nodes = parallel_perft(board, arguments.depth, arguments.workers)[0]
+        result = "%d nodes" % nodes
+
+    else:
+        move, score = parallel_search(board, arguments.depth, arguments.workers)
+        result = "best move %s %s, score %d" % (MAILBOX_NAMES[move[0]], MAILBOX_NAMES[move[1]], score) \
+            if move is not None else "no legal moves"
+
+    print("%s depth %d: %s, %.2f s" % (arguments.position, arguments.depth, result,
+                                       time.perf_counter() - start_time))
+
+
+if __name__ == "__main__":
+    main()
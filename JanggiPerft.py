@@ -0,0 +1,172 @@
+# Description:
+#     Perft counts the positions reached by every sequence of legal moves to a given depth. The counts only depend on
+#     the rules, so they are checked against the known counts below to make sure that the move generator still finds
+#     exactly the same moves after it is changed or sped up. The time taken is also reported as nodes per second, so
+#     it doubles as a benchmark of the move generator.
+#
+#     Passes are counted as a move, once for each position where the player is not in check.
+#
+#     Usage: python JanggiPerft.py [position ...] [--depth N] [--divide] [--verify] [--bitboards]
+
+import argparse
+import sys
+import time
+
+from JanggiBoard import MAILBOX_NAMES
+from JanggiGame import JanggiGame
+
+# The saved positions, each given as the moves from the start of the game in algebraic notation, and their known
+# perft counts by depth. The counts to depth 3 were also checked against the original version of the game, by trying
+# every move with make_move.
+POSITIONS = {
+    "start": (
+        "",
+        {1: 32, 2: 1024, 3: 33506, 4: 1095844}
+    ),
+    "palace-check": (
+        "e7 e6 c1 d3 h10 g8 d3 e1 h8 f8 h1 g3 i10 i8 i4 h4 i7 i6 i1 i6 g8 h10 i6 e6 e9 d9 h3 h10 f10 e10 g3 i2 "
+        "i8 i2 e2 d3 e10 f10 h10 f10 i2 d2",
+        {1: 3, 2: 66, 3: 2776, 4: 67512}
+    ),
+    "cannon-check": (
+        "i10 i9 e2 e1 e9 d9 a4 a5 h10 g8 g4 h4 h8 d8 c4 c5 c7 d7 h3 h8 d8 d1 b1 d4 a7 a6 a5 a6 d1 f1 i1 i3 f1 h1 "
+        "g1 d3 a10 a6 h4 g4 h1 c1 a1 c1 i9 i10 d4 a6 i7 i6 c1 d1 f10 f9 i3 f3 g8 h10 f3 f9 d10 e9 f9 e9",
+        {1: 2, 2: 64, 3: 1300, 4: 42801}
+    ),
+    "middlegame": (
+        "e7 d7 c4 d4 c10 d8 i4 i5 g7 g6 i1 i3 b8 f8 h1 g3 f10 f9 a4 b4 d8 b9 d4 c4 i10 i8 e2 d2 d10 d9 g4 h4 "
+        "d9 d10 b3 b9",
+        {1: 26, 2: 1261, 3: 35817, 4: 1705542}
+    )
+}
+
+
+def load_position(moves, use_bitboards=False):
+    """
+    Plays a list of moves from the start of the game.
+
+    Takes the moves as a string of locations in algebraic notation, where each pair of locations is one move, and
+    whether to use the bitboard board core.
+    Returns the board core of the game after the moves.
+    """
+
+    game = JanggiGame(use_bitboards)
+    locations_list = moves.split()
+
+    for index in range(0, len(locations_list), 2):
+        if not game.make_move(locations_list[index], locations_list[index + 1]):
+            raise ValueError("Illegal move " + locations_list[index] + " " + locations_list[index + 1])
+
+    return game.get_board()
+
+
+def perft(board, depth):
+    """
+    Counts the positions reached by every sequence of legal moves of the given length, starting with the player whose
+    turn it is.
+
+    Takes the board core and the depth.
+    Returns the number of positions.
+    """
+
+    player = board.get_side_to_move()
+
+    if depth == 1:
+        return sum(1 for _ in board.legal_movements(player))
+
+    nodes = 0
+
+    for piece_square, new_square in board.legal_movements(player):
+        board.push_move(piece_square, new_square)
+        nodes += perft(board, depth - 1)
+        board.pop_move()
+
+    return nodes
+
+
+def divide(board, depth):
+    """
+    Splits the perft count up by the first move, which helps find the move whose count is wrong when two move
+    generators disagree.
+
+    Takes the board core and the depth, which must be at least 1.
+    Returns a list of (piece location, new location, number of positions) tuples.
+    """
+
+    counts_list = []
+
+    for piece_square, new_square in board.legal_movements(board.get_side_to_move()):
+        board.push_move(piece_square, new_square)
+
+        if depth == 1:
+            counts_list.append((MAILBOX_NAMES[piece_square], MAILBOX_NAMES[new_square], 1))
+
+        else:
+            counts_list.append((MAILBOX_NAMES[piece_square], MAILBOX_NAMES[new_square], perft(board, depth - 1)))
+
+        board.pop_move()
+
+    return counts_list
+
+
+def main():
+    """
+    Runs perft on the positions given on the command line, or on all the saved positions, and prints the counts and
+    the nodes per second. With --verify, the counts are checked against the known counts, and the exit status is 1
+    if any of them are wrong.
+    """
+
+    parser = argparse.ArgumentParser(description="Count the positions reached by legal moves to a depth.")
+    parser.add_argument("positions", nargs="*", help="names of saved positions (default: all of them)")
+    parser.add_argument("--depth", type=int, default=3, help="the depth to count to (default: 3)")
+    parser.add_argument("--divide", action="store_true", help="print the count for each first move")
+    parser.add_argument("--verify", action="store_true", help="check the counts against the known counts")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard board core")
+    arguments = parser.parse_args()
+
+    failures = 0
+
+    for name in arguments.positions or POSITIONS:
+        if name not in POSITIONS:
+            parser.error("unknown position " + name)
+
+        moves, known_counts = POSITIONS[name]
+        board = load_position(moves, arguments.bitboards)
+
+        for depth in range(1, arguments.depth + 1):
+            start_time = time.perf_counter()
+
+            if arguments.divide and depth == arguments.depth:
+                counts_list = divide(board, depth)
+
+                for piece_location, new_location, count in counts_list:
+                    print("  " + piece_location + " " + new_location + ": " + str(count))
+
+                nodes = sum(count for _, _, count in counts_list)
+
+            else:
+                nodes = perft(board, depth)
+
+            elapsed = time.perf_counter() - start_time
+            line = "%s depth %d: %d nodes, %.2f s, %.0f nodes/s" % (name, depth, nodes, elapsed,
+                                                                    nodes / elapsed if elapsed > 0 else 0)
+
+            if arguments.verify:
+                if depth not in known_counts:
+                    line += " (no known count)"
+
+                elif known_counts[depth] == nodes:
+                    line += " OK"
+
+                else:
+                    line += " FAILED, expected " + str(known_counts[depth])
+                    failures += 1
+
+            print(line)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
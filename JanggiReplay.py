@@ -0,0 +1,148 @@
+# Description:
+#     Replays recorded games from a move log, to check that every move in them is legal. Each line of the log is one
+#     game, written as the locations of its moves in algebraic notation separated by spaces, where each pair of
+#     locations is one move, for example "c7 c6 c1 d3 b10 c8". Blank lines and lines starting with "#" are skipped.
+#
+#     The log is read one line at a time and the results are written as each game is replayed, so that an archive of
+#     any size is replayed in the same amount of memory. The replay only looks for checkmate when a game's final state
+#     is asked for, instead of after every move that gives check.
+#
+#     Usage: python JanggiReplay.py [log file] [--output FILE] [--bitboards]
+#
+#     The results are written as tab separated lines of the log line number, the result ("valid", "illegal" or
+#     "malformed"), the final game state, the number of moves made, and the first move that could not be made.
+
+import argparse
+import sys
+import time
+
+from JanggiGame import JanggiGame
+
+RESULT_HEADER = "line\tresult\tstate\tmoves\tfirst_illegal_move"
+
+
+def read_games(lines):
+    """
+    Reads the games from the lines of a move log, one line at a time.
+
+    Takes an iterable of lines, such as an open file.
+    Yields a (line number, list of locations) tuple for each game, where line numbers start at 1.
+    """
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+
+        if line and not line.startswith("#"):
+            yield line_number, line.split()
+
+
+def replay_game(locations_list, use_bitboards=False):
+    """
+    Replays a game from the start, stopping at the first move that cannot be made.
+
+    Takes the list of the locations of the moves, where each pair of locations is one move, and whether to use the
+    bitboard board core.
+    Returns a tuple of the result, the final game state, the number of moves made, and the first move that could not
+    be made as a (move number, piece location, new location) tuple or None. The result is "valid" if every move was
+    made, "illegal" if a move could not be made, and "malformed" if the last move is missing its new location.
+    """
+
+    game = JanggiGame(use_bitboards)
+    move_count = len(locations_list) // 2
+
+    for move_number in range(move_count):
+        piece_location = locations_list[2 * move_number]
+        new_location = locations_list[2 * move_number + 1]
+
+        if not game.make_move(piece_location, new_location):
+            return "illegal", game.get_game_state(), move_number, (move_number + 1, piece_location, new_location)
+
+    if len(locations_list) % 2:
+        return "malformed", game.get_game_state(), move_count, (move_count + 1, locations_list[-1], "")
+
+    return "valid", game.get_game_state(), move_count, None
+
+
+def replay_games(lines, use_bitboards=False):
+    """
+    Replays each game of a move log, one at a time.
+
+    Takes an iterable of the lines of the log and whether to use the bitboard board core.
+    Yields a tuple of the line number followed by the result tuple from replay_game for each game.
+    """
+
+    for line_number, locations_list in read_games(lines):
+        yield (line_number,) + replay_game(locations_list, use_bitboards)
+
+
+def format_result(line_number, result, game_state, move_count, first_illegal_move):
+    """
+    Returns a replay result as a tab separated line, without the line ending.
+    """
+
+    if first_illegal_move is None:
+        illegal_move_text = ""
+
+    else:
+        illegal_move_text = "%d %s %s" % first_illegal_move
+
+    return "%d\t%s\t%s\t%d\t%s" % (line_number, result, game_state, move_count, illegal_move_text.rstrip())
+
+
+def main():
+    """
+    Replays the games of a move log file, or of the standard input, and writes a result line for each game. A summary
+    is written to the standard error. The exit status is 1 if any game was not valid.
+    """
+
+    parser = argparse.ArgumentParser(description="Replay recorded games and check that their moves are legal.")
+    parser.add_argument("log", nargs="?", default="-", help="the move log file (default: the standard input)")
+    parser.add_argument("--output", "-o", default="-", help="the file to write the results to (default: the "
+                                                            "standard output)")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard board core")
+    arguments = parser.parse_args()
+
+    if arguments.log == "-":
+        log_file = sys.stdin
+
+    else:
+        log_file = open(arguments.log)
+
+    if arguments.output == "-":
+        output_file = sys.stdout
+
+    else:
+        output_file = open(arguments.output, "w")
+
+    game_count = 0
+    valid_count = 0
+    start_time = time.perf_counter()
+
+    try:
+        output_file.write(RESULT_HEADER + "\n")
+
+        for replay_result in replay_games(log_file, arguments.bitboards):
+            output_file.write(format_result(*replay_result) + "\n")
+            game_count += 1
+
+            if replay_result[1] == "valid":
+                valid_count += 1
+
+    finally:
+        if log_file is not sys.stdin:
+            log_file.close()
+
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    elapsed = time.perf_counter() - start_time
+    sys.stderr.write("%d games, %d valid, %d not valid, %.2f s, %.0f games/s\n"
+                     % (game_count, valid_count, game_count - valid_count, elapsed,
+                        game_count / elapsed if elapsed > 0 else 0))
+
+    if valid_count != game_count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
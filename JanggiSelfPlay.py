@@ -0,0 +1,201 @@
+# Description:
+#     Plays many games at once across a pool of worker processes, for testing and for making training data. Each game
+#     is played on its own JanggiGame from its own seed, so any game can be played again exactly from its seed, no
+#     matter which worker played it or how many workers there were.
+#
+#     The games are sent to the workers in batches, and each batch comes back as one list of results, so that there is
+#     one round trip between processes per batch instead of per game. Only a few batches are waiting at a time, and
+#     the results are written out as each batch finishes, so memory does not grow with the number of games.
+#
+#     Usage: python JanggiSelfPlay.py [--games N] [--seed S] [--workers W] [--batch-size B] [--depth D]
+#                                     [--random-moves R] [--maximum-moves M] [--book FILE] [--output FILE]
+#                                     [--bitboards]
+#
+#     The results are written as tab separated lines of the seed, the final game state, the number of moves and the
+#     moves, in the move log format read by JanggiReplay.
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from JanggiBook import OpeningBook
+from JanggiGame import JanggiGame
+
+RESULT_HEADER = "seed\tstate\tmoves\tmove_log"
+
+
+def play_game(seed, depth=0, random_moves=0, maximum_moves=200, use_bitboards=False, book=None):
+    """
+    Plays one game. Moves are picked at random from the legal moves, or by the engine if a depth is given. The first
+    moves are always random, so that games searched by the engine do not all start the same way. If an opening book
+    is given, a book move is played whenever the position is in the book.
+
+    Takes the seed of the game, the depth for the engine to search to or 0 for random moves, the number of random
+    moves to start with, the number of moves to stop the game after, whether to use the bitboard board core, and the
+    OpeningBook or None.
+    Returns a tuple of the seed, the final game state, the number of moves made and the moves as a string of
+    locations.
+    """
+
+    random_generator = random.Random(seed)
+    game = JanggiGame(use_bitboards)
+    locations_list = []
+
+    for move_number in range(maximum_moves):
+        move = None
+
+        if book is not None:
+            move = book.choose_move(game, random_generator)
+
+        if move is None:
+            if depth > 0 and move_number >= random_moves:
+                move = game.best_move(depth)
+
+            else:
+                moves_list = list(game.legal_moves())
+                move = random_generator.choice(moves_list) if moves_list else None
+
+        # Book moves are found by the position hash, so in the rare case of two positions with the same hash, a book
+        # move may not be legal. The game stops there instead of recording it.
+        if move is None or not game.make_move(move[0], move[1]):
+            break
+
+        locations_list.extend(move)
+
+    return seed, game.get_game_state(), len(locations_list) // 2, " ".join(locations_list)
+
+
+def play_batch(seeds_list, depth=0, random_moves=0, maximum_moves=200, use_bitboards=False, book_path=None):
+    """
+    Plays a batch of games in a worker process.
+
+    Takes the list of the seeds of the games, followed by the same settings as play_game, except that the opening book
+    is given as the path of its file or None.
+    Returns a list of the result tuples from play_game.
+    """
+
+    if book_path is None:
+        return [play_game(seed, depth, random_moves, maximum_moves, use_bitboards) for seed in seeds_list]
+
+    with OpeningBook(book_path) as book:
+        return [play_game(seed, depth, random_moves, maximum_moves, use_bitboards, book) for seed in seeds_list]
+
+
+def play_games(seeds, workers=None, batch_size=16, depth=0, random_moves=0, maximum_moves=200, use_bitboards=False,
+               book_path=None):
+    """
+    Plays a game for each seed across a pool of worker processes. At most two batches per worker are waiting at a
+    time, and the results of each batch are given as soon as it finishes, so they are not in the order of the seeds.
+    With one worker, the games are played in this process.
+
+    Takes an iterable of seeds, the number of worker processes or None for one per CPU, the number of games in each
+    batch, followed by the same settings as play_batch.
+    Yields the result tuples from play_game.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    seeds_iterator = iter(seeds)
+    settings = (depth, random_moves, maximum_moves, use_bitboards, book_path)
+
+    if workers == 1:
+        batch = _next_batch(seeds_iterator, batch_size)
+
+        while batch:
+            yield from play_batch(batch, *settings)
+            batch = _next_batch(seeds_iterator, batch_size)
+
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        waiting_batches = set()
+
+        while True:
+            while len(waiting_batches) < 2 * workers:
+                batch = _next_batch(seeds_iterator, batch_size)
+
+                if not batch:
+                    break
+
+                waiting_batches.add(executor.submit(play_batch, batch, *settings))
+
+            if not waiting_batches:
+                break
+
+            finished_batches, waiting_batches = wait(waiting_batches, return_when=FIRST_COMPLETED)
+
+            for finished_batch in finished_batches:
+                yield from finished_batch.result()
+
+
+def _next_batch(seeds_iterator, batch_size):
+    """
+    Returns a list of the next seeds, up to the batch size, which is empty when there are no more.
+    """
+
+    return [seed for _, seed in zip(range(batch_size), seeds_iterator)]
+
+
+def main():
+    """
+    Plays the games given on the command line and writes a result line for each one as it finishes. A summary is
+    written to the standard error.
+    """
+
+    parser = argparse.ArgumentParser(description="Play many games across worker processes.")
+    parser.add_argument("--games", type=int, default=100, help="the number of games to play (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first game; the games use the seeds "
+                                                            "after it in order (default: 0)")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes (default: one "
+                                                                  "per CPU)")
+    parser.add_argument("--batch-size", type=int, default=16, help="the number of games in each batch (default: 16)")
+    parser.add_argument("--depth", type=int, default=0, help="the depth for the engine to search to, or 0 for "
+                                                             "random moves (default: 0)")
+    parser.add_argument("--random-moves", type=int, default=0, help="the number of random moves each game starts "
+                                                                    "with when the engine is used (default: 0)")
+    parser.add_argument("--maximum-moves", type=int, default=200, help="the number of moves to stop each game after "
+                                                                       "(default: 200)")
+    parser.add_argument("--book", default=None, help="an opening book file to play book moves from")
+    parser.add_argument("--output", "-o", default="-", help="the file to write the results to (default: the "
+                                                            "standard output)")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard board core")
+    arguments = parser.parse_args()
+
+    if arguments.output == "-":
+        output_file = sys.stdout
+
+    else:
+        output_file = open(arguments.output, "w")
+
+    game_states = {}
+    move_count = 0
+    start_time = time.perf_counter()
+
+    try:
+        output_file.write(RESULT_HEADER + "\n")
+
+        for seed, game_state, moves, move_log in play_games(range(arguments.seed, arguments.seed + arguments.games),
+                                                            arguments.workers, arguments.batch_size, arguments.depth,
+                                                            arguments.random_moves, arguments.maximum_moves,
+                                                            arguments.bitboards, arguments.book):
+            output_file.write("%d\t%s\t%d\t%s\n" % (seed, game_state, moves, move_log))
+            game_states[game_state] = game_states.get(game_state, 0) + 1
+            move_count += moves
+
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    elapsed = time.perf_counter() - start_time
+    sys.stderr.write("%d games, %s, %d moves, %.2f s, %.1f games/s\n"
+                     % (sum(game_states.values()),
+                        ", ".join("%d %s" % (count, state) for state, count in sorted(game_states.items())),
+                        move_count, elapsed, sum(game_states.values()) / elapsed if elapsed > 0 else 0))
+
+
+if __name__ == "__main__":
+    main()
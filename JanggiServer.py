@@ -0,0 +1,738 @@
+# Description:
+#     Hosts many games at once for clients that connect over TCP. Each request and response is one line of JSON, like
+#     the messages of a WebSocket connection, and each request has an "id" that is sent back with its response, so a
+#     client can have many requests waiting at once. The requests are:
+#
+#         {"id": 1, "op": "create", "bitboards": false, "fen": null}    creates a game, from a FEN position if given
+#         {"id": 2, "op": "move", "game": "1", "from": "c7", "to": "c6"}    makes a move
+#         {"id": 3, "op": "legal_moves", "game": "1"}                   lists the legal moves
+#         {"id": 4, "op": "state", "game": "1"}                         gets the state of a game
+#         {"id": 5, "op": "close", "game": "1"}                         removes a game
+#         {"id": 6, "op": "metrics"}                                    gets the latency of each kind of request
+#
+#     The server runs on one asyncio event loop. The work on a game, such as making a move and finding out if it was
+#     checkmate, is run on a bounded pool of worker threads, so a slow checkmate search never holds up the event loop
+#     and the other games. Each game has its own queue of work, which is done one item at a time in the order it came
+#     in, so moves on one game never run at the same time. The state of each game is kept as a snapshot that is
+#     updated after each move, so state requests are answered straight from the event loop.
+#
+#     Usage: python JanggiServer.py serve [--host HOST] [--port PORT] [--workers W]
+#            python JanggiServer.py bench [--sessions N ...] [--moves M] [--players P] [--workers W]
+#
+#     The benchmark starts a server with many sessions and plays random moves on them through test clients, and prints
+#     the move latencies for each number of sessions.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from JanggiBoard import PLAYER_NAMES
+from JanggiGame import JanggiGame
+
+# The number of items of work that can wait in a game's queue before more are turned away.
+DEFAULT_QUEUE_SIZE = 64
+
+# The number of latencies kept for each kind of request.
+DEFAULT_METRICS_WINDOW = 10000
+
+
+class LatencyMetrics:
+    """
+    Keeps the time taken by the most recent requests of each kind, and the number of requests of each kind.
+    """
+
+    __slots__ = ("_window", "_latencies", "_counts")
+
+    def __init__(self, window=DEFAULT_METRICS_WINDOW):
+        """
+        Creates empty metrics that keep the given number of latencies for each kind of request.
+        """
+
+        self._window = window
+        self._latencies = {}
+        self._counts = {}
+
+    def record(self, operation, seconds):
+        """
+        Records the time taken by a request.
+
+        Takes the kind of request and the time it took in seconds.
+        """
+
+        if operation not in self._latencies:
+            self._latencies[operation] = deque(maxlen=self._window)
+            self._counts[operation] = 0
+
+        self._latencies[operation].append(seconds)
+        self._counts[operation] += 1
+
+    def clear(self):
+        """
+        Forgets all of the recorded requests.
+        """
+
+        self._latencies.clear()
+        self._counts.clear()
+
+    def get_summary(self):
+        """
+        Returns a dictionary of a summary for each kind of request: the number of requests, and the median, 99th
+        percentile and largest of the recent latencies in milliseconds.
+        """
+
+        summary = {}
+
+        for operation, latencies in self._latencies.items():
+            sorted_latencies = sorted(latencies)
+            summary[operation] = {
+                "count": self._counts[operation],
+                "p50_ms": 1000 * sorted_latencies[len(sorted_latencies) // 2],
+                "p99_ms": 1000 * sorted_latencies[min(len(sorted_latencies) - 1, len(sorted_latencies) * 99 // 100)],
+                "max_ms": 1000 * sorted_latencies[-1]
+            }
+
+        return summary
+
+
+class GameSession:
+    """
+    One hosted game, with its queue of work and a snapshot of its state. The game is only used by the task that
+    works through the queue.
+    """
+
+    __slots__ = ("_game_id", "_game", "_queue", "_snapshot", "_task")
+
+    def __init__(self, game_id, game, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Creates a session for a game. The task that works through its queue is started by the server.
+
+        Takes the game's id, the game, and the number of items of work that can wait in its queue.
+        """
+
+        self._game_id = game_id
+        self._game = game
+        self._queue = asyncio.Queue(queue_size)
+        self._snapshot = None
+        self._task = None
+
+    def get_game_id(self):
+        """
+        Returns the game's id.
+        """
+
+        return self._game_id
+
+    def get_game(self):
+        """
+        Returns the game. It must only be used from the work on the session's queue.
+        """
+
+        return self._game
+
+    def get_queue(self):
+        """
+        Returns the queue of work on the game, which holds (function, arguments, future) tuples.
+        """
+
+        return self._queue
+
+    def get_snapshot(self):
+        """
+        Returns the latest snapshot of the game's state, as a dictionary.
+        """
+
+        return self._snapshot
+
+    def set_snapshot(self, snapshot):
+        """
+        Sets the snapshot of the game's state.
+        """
+
+        self._snapshot = snapshot
+
+    def get_task(self):
+        """
+        Returns the task that works through the queue, or None if it is not started.
+        """
+
+        return self._task
+
+    def set_task(self, task):
+        """
+        Sets the task that works through the queue.
+        """
+
+        self._task = task
+
+
+def _get_text(request, key):
+    """
+    Returns a string field of a request. Raises KeyError if the field is missing, or ValueError if it is not a string.
+    """
+
+    value = request[key]
+
+    if not isinstance(value, str):
+        raise ValueError(key + " must be a string")
+
+    return value
+
+
+def _take_snapshot(game_id, game):
+    """
+    Returns a dictionary of the state of a game: its id, game state, the player whose turn it is, the position as FEN
+    text, and the number of moves made. Finding the game state may look for checkmate, so it is run on a worker.
+    """
+
+    board = game.get_board()
+
+    return {"game": game_id, "state": game.get_game_state(), "turn": PLAYER_NAMES[board.get_side_to_move()],
+            "fen": game.to_fen(), "moves": board.get_move_count()}
+
+
+def _make_move(game_id, game, piece_location, new_location):
+    """
+    Makes a move on a worker, and returns whether it was made along with a snapshot of the game afterwards.
+    """
+
+    made = game.make_move(piece_location, new_location)
+
+    return made, _take_snapshot(game_id, game)
+
+
+def _legal_moves(game_id, game):
+    """
+    Returns a list of the legal moves of the player whose turn it is, on a worker.
+    """
+
+    return [list(move) for move in game.legal_moves()]
+
+
+class GameServer:
+    """
+    Hosts games for clients, with a registry of the games by id, a queue of work for each game, a bounded pool of
+    worker threads for the work, and latency metrics for each kind of request.
+    """
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, metrics_window=DEFAULT_METRICS_WINDOW):
+        """
+        Creates a server with no games.
+
+        Takes the number of worker threads or None for one per CPU, the number of items of work that can wait in each
+        game's queue, and the number of latencies kept for each kind of request.
+        """
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="janggi-worker")
+
+        # At most this many items of work are given to the pool at a time. The rest wait in their game's queue.
+        self._executor_slots = asyncio.Semaphore(2 * workers)
+        self._queue_size = queue_size
+        self._sessions = {}
+        self._next_game_id = 1
+        self._metrics = LatencyMetrics(metrics_window)
+        self._server = None
+
+    def get_metrics(self):
+        """
+        Returns the server's latency metrics.
+        """
+
+        return self._metrics
+
+    def get_game_ids(self):
+        """
+        Returns a list of the ids of the games being hosted.
+        """
+
+        return list(self._sessions)
+
+    def get_session_count(self):
+        """
+        Returns the number of games being hosted.
+        """
+
+        return len(self._sessions)
+
+    async def create_game(self, use_bitboards=False, fen=None):
+        """
+        Creates a game and starts the work on its queue.
+
+        Takes whether to use the bitboard board core, and FEN text of the position to start from or None for the
+        beginning of the game.
+        Returns the snapshot of the new game. Raises ValueError if the FEN text is not a valid position.
+        """
+
+        if fen is None:
+            game = JanggiGame(use_bitboards)
+
+        else:
+            game = JanggiGame.from_fen(fen, use_bitboards)
+
+        game_id = str(self._next_game_id)
+        self._next_game_id += 1
+
+        session = GameSession(game_id, game, self._queue_size)
+        session.set_snapshot(await self._run(_take_snapshot, game_id, game))
+        session.set_task(asyncio.get_running_loop().create_task(self._work_on_queue(session)))
+        self._sessions[game_id] = session
+
+        return session.get_snapshot()
+
+    async def submit_move(self, game_id, piece_location, new_location):
+        """
+        Queues a move on a game and waits for it to be made.
+
+        Takes the game's id and the locations of the move.
+        Returns whether the move was made and the snapshot of the game afterwards.
+        """
+
+        return await self._queue_work(game_id, _make_move, piece_location, new_location)
+
+    async def get_legal_moves(self, game_id):
+        """
+        Queues a request for the legal moves of a game, and returns the list of [location, new location] moves.
+        """
+
+        return await self._queue_work(game_id, _legal_moves)
+
+    def get_state(self, game_id):
+        """
+        Returns the latest snapshot of a game, without waiting for the work queued on it. Raises KeyError if there is
+        no game with the id.
+        """
+
+        return self._get_session(game_id).get_snapshot()
+
+    async def close_game(self, game_id):
+        """
+        Removes a game. Work still waiting in its queue fails with a ValueError.
+        """
+
+        session = self._sessions.pop(game_id, None)
+
+        if session is None:
+            raise KeyError("There is no game " + str(game_id))
+
+        session.get_task().cancel()
+
+        while not session.get_queue().empty():
+            future = session.get_queue().get_nowait()[2]
+
+            if not future.done():
+                future.set_exception(ValueError("The game was closed"))
+
+    async def handle_request(self, request):
+        """
+        Answers one request, and records how long it took.
+
+        Takes the request as a dictionary.
+        Returns the response as a dictionary, with "ok" False and an "error" if the request failed.
+        """
+
+        start_time = time.perf_counter()
+        operation = request.get("op")
+        response = {"id": request.get("id"), "ok": True}
+
+        try:
+            if operation == "create":
+                fen = request.get("fen")
+
+                if fen is not None and not isinstance(fen, str):
+                    raise ValueError("fen must be a string")
+
+                response.update(await self.create_game(bool(request.get("bitboards")), fen))
+
+            elif operation == "move":
+                made, snapshot = await self.submit_move(_get_text(request, "game"), _get_text(request, "from"),
+                                                        _get_text(request, "to"))
+                response.update(snapshot)
+                response["made"] = made
+
+            elif operation == "legal_moves":
+                response["game"] = _get_text(request, "game")
+                response["legal_moves"] = await self.get_legal_moves(response["game"])
+
+            elif operation == "state":
+                response.update(self.get_state(_get_text(request, "game")))
+
+            elif operation == "close":
+                response["game"] = _get_text(request, "game")
+                await self.close_game(response["game"])
+
+            elif operation == "metrics":
+                response["sessions"] = self.get_session_count()
+                response["metrics"] = self._metrics.get_summary()
+
+            else:
+                raise ValueError("Unknown operation " + str(operation))
+
+        except KeyError as error:
+            response = {"id": request.get("id"), "ok": False, "error": "missing or unknown " + str(error)}
+
+        except (ValueError, asyncio.QueueFull) as error:
+            response = {"id": request.get("id"), "ok": False, "error": str(error) or type(error).__name__}
+
+        # Any other failure is still answered, so that every request gets exactly one response.
+        except Exception as error:
+            response = {"id": request.get("id"), "ok": False, "error": type(error).__name__ + ": " + str(error)}
+
+        self._metrics.record(str(operation), time.perf_counter() - start_time)
+
+        return response
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Starts listening for connections.
+
+        Takes the host and the port to listen on, where port 0 picks a free port.
+        Returns the port being listened on.
+        """
+
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Answers connections until cancelled.
+        """
+
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening, removes every game and shuts down the worker threads.
+        """
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        for game_id in list(self._sessions):
+            await self.close_game(game_id)
+
+        self._executor.shutdown(wait=True)
+
+    def _get_session(self, game_id):
+        """
+        Returns the session of a game. Raises KeyError if there is no game with the id.
+        """
+
+        if game_id not in self._sessions:
+            raise KeyError("game " + str(game_id))
+
+        return self._sessions[game_id]
+
+    async def _queue_work(self, game_id, function, *arguments):
+        """
+        Queues work on a game and waits for it to be done. Raises asyncio.QueueFull if the game's queue is full.
+
+        Takes the game's id, the function to run, and its arguments after the game's id and the game.
+        Returns the function's result.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._get_session(game_id).get_queue().put_nowait((function, arguments, future))
+
+        return await future
+
+    async def _work_on_queue(self, session):
+        """
+        Works through a session's queue one item at a time, running each on the worker threads. A move updates the
+        snapshot before its result is given back.
+        """
+
+        queue = session.get_queue()
+
+        while True:
+            function, arguments, future = await queue.get()
+
+            if future.done():
+                continue
+
+            try:
+                result = await self._run(function, session.get_game_id(), session.get_game(), *arguments)
+
+            # The game was closed while the work was running.
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(ValueError("The game was closed"))
+
+                raise
+
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+
+                continue
+
+            if function is _make_move:
+                session.set_snapshot(result[1])
+
+            if not future.done():
+                future.set_result(result)
+
+    async def _run(self, function, *arguments):
+        """
+        Runs a function on the worker threads once one of the bounded slots is free, and returns its result.
+        """
+
+        async with self._executor_slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *arguments)
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Reads the requests of one connection, one line at a time, and answers each one in its own task, so that a
+        client can have requests on many games waiting at once.
+        """
+
+        tasks = set()
+
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be a JSON object")
+
+                except ValueError as error:
+                    writer.write((json.dumps({"id": None, "ok": False, "error": str(error)}) + "\n").encode())
+                    continue
+
+                task = asyncio.get_running_loop().create_task(self._answer(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        except ConnectionError:
+            pass
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            writer.close()
+
+    async def _answer(self, request, writer):
+        """
+        Answers a request and writes its response to the connection.
+        """
+
+        response = await self.handle_request(request)
+
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+
+class JanggiClient:
+    """
+    A client for the server, standing in for the real clients when testing. Requests are sent over one TCP
+    connection, and each response is matched to its request by its id, so many requests can wait at once.
+    """
+
+    def __init__(self):
+        """
+        Creates a client that is not connected.
+        """
+
+        self._reader = None
+        self._writer = None
+        self._next_id = 1
+        self._waiting = {}
+        self._reader_task = None
+
+    async def connect(self, host, port):
+        """
+        Connects to a server.
+        """
+
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_responses())
+
+    async def request(self, operation, **fields):
+        """
+        Sends a request and waits for its response.
+
+        Takes the operation and the other fields of the request.
+        Returns the response as a dictionary.
+        """
+
+        request_id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+
+        fields["id"] = request_id
+        fields["op"] = operation
+        self._writer.write((json.dumps(fields) + "\n").encode())
+        await self._writer.drain()
+
+        return await future
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._reader_task.cancel()
+
+    async def _read_responses(self):
+        """
+        Reads responses until the connection is closed, giving each to the request waiting for it.
+        """
+
+        while True:
+            line = await self._reader.readline()
+
+            if not line:
+                break
+
+            response = json.loads(line)
+            future = self._waiting.pop(response.get("id"), None)
+
+            if future is not None and not future.done():
+                future.set_result(response)
+
+        for future in self._waiting.values():
+            future.cancel()
+
+
+async def _play_random_moves(client, game_ids, moves, random_generator, latencies_list):
+    """
+    Plays random legal moves on games picked at random through a client, recording the latency of each move as seen
+    by the client. Games that are over are left out of the picking.
+    """
+
+    for _ in range(moves):
+        if not game_ids:
+            break
+
+        game_id = random_generator.choice(game_ids)
+        legal_moves = (await client.request("legal_moves", game=game_id)).get("legal_moves")
+
+        if not legal_moves:
+            game_ids.remove(game_id)
+            continue
+
+        piece_location, new_location = random_generator.choice(legal_moves)
+        start_time = time.perf_counter()
+        response = await client.request("move", game=game_id, **{"from": piece_location, "to": new_location})
+        latencies_list.append(time.perf_counter() - start_time)
+
+        if response.get("state") != "UNFINISHED" and game_id in game_ids:
+            game_ids.remove(game_id)
+
+
+async def run_benchmark(session_counts, moves=2000, players=16, workers=None, seed=0):
+    """
+    Starts a server, and for each number of sessions, creates that many games and plays the same number of random
+    moves on them, spread over a fixed number of players that each move on a game picked at random. Since the load
+    is the same for every number of sessions, the move latency should stay the same as the number of sessions grows.
+
+    Takes the list of the numbers of sessions, the number of moves to play, the number of players moving at once,
+    each with its own client connection, the number of worker threads or None for one per CPU, and the seed for the
+    random moves.
+    Returns a list of (sessions, number of moves, median, 99th percentile) tuples, with the latencies in milliseconds,
+    as seen by the clients.
+    """
+
+    server = GameServer(workers)
+    port = await server.start()
+    results_list = []
+
+    try:
+        for session_count in session_counts:
+            clients_list = []
+
+            for _ in range(players):
+                client = JanggiClient()
+                await client.connect("127.0.0.1", port)
+                clients_list.append(client)
+
+            game_ids = [(await clients_list[0].request("create"))["game"] for _ in range(session_count)]
+            random_generator = random.Random(seed)
+            latencies_list = []
+            await asyncio.gather(*(_play_random_moves(client, game_ids, moves // players, random_generator,
+                                                      latencies_list) for client in clients_list))
+
+            for game_id in server.get_game_ids():
+                await server.close_game(game_id)
+
+            for client in clients_list:
+                await client.close()
+
+            latencies_list.sort()
+            results_list.append((session_count, len(latencies_list),
+                                 1000 * latencies_list[len(latencies_list) // 2],
+                                 1000 * latencies_list[min(len(latencies_list) - 1, len(latencies_list) * 99 // 100)]))
+
+    finally:
+        await server.close()
+
+    return results_list
+
+
+def main():
+    """
+    Runs the server until interrupted, or runs the benchmark and prints its results.
+    """
+
+    parser = argparse.ArgumentParser(description="Host Janggi games for clients over TCP.")
+    parser.add_argument("mode", choices=("serve", "bench"), help="whether to run the server or the benchmark")
+    parser.add_argument("--host", default="127.0.0.1", help="the host to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="the port to listen on (default: 8765)")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker threads (default: one per "
+                                                                  "CPU)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 1000], help="the numbers of sessions to "
+                                                                                         "benchmark (default: 10 100 "
+                                                                                         "1000)")
+    parser.add_argument("--moves", type=int, default=2000, help="the number of moves to play in each benchmark round "
+                                                                "(default: 2000)")
+    parser.add_argument("--players", type=int, default=16, help="the number of benchmark players moving at once "
+                                                                "(default: 16)")
+    arguments = parser.parse_args()
+
+    if arguments.mode == "bench":
+        for session_count, move_count, median, percentile in asyncio.run(
+                run_benchmark(arguments.sessions, arguments.moves, arguments.players, arguments.workers)):
+            print("%d sessions: %d moves, p50 %.2f ms, p99 %.2f ms" % (session_count, move_count, median, percentile))
+
+        return
+
+    async def serve():
+        server = GameServer(arguments.workers)
+        port = await server.start(arguments.host, arguments.port)
+        print("listening on %s:%d" % (arguments.host, port))
+
+        try:
+            await server.serve_forever()
+
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+# Description:
+#     Endgame tablebases: every position of a small set of pieces solved ahead of time, so that the engine or a player
+#     can look up whether the player to move wins, loses or draws, and how many moves the checkmate takes, instead of
+#     searching for it.
+#
+#     A set of pieces is the pieces each player has besides their general, such as a chariot and a guard for red and
+#     nothing for blue. The generator places the pieces on every combination of squares they can stand on, with
+#     generals and guards inside their palace and soldiers on the rows they can reach, and finds the legal moves of
+#     each position with the board core, so the positions follow the same rules as JanggiGame. Since a player can
+#     pass whenever they are not in check, only a player in check can run out of moves, which is checkmate.
+#
+#     The positions are solved by retrograde analysis, working back from the checkmates. A position is won in one
+#     more move than the quickest of its moves to a lost position, and lost in one more move than the slowest of its
+#     moves if every move leads to a won position. A move that captures a piece leads to a smaller set of pieces,
+#     which is solved first. Positions that are never won or lost are draws.
+#
+#     The result of each position is one byte in an indexed file, where 0 is a draw, 255 is a position that cannot
+#     happen, and any other value is one more than the number of moves to checkmate. The player to move wins if that
+#     number is odd and loses if it is even. The position's index comes from the squares of its pieces, so the probe
+#     maps the file into memory and reads one byte.
+#
+#     Usage: python JanggiTablebase.py generate FILE [--red PIECE ...] [--blue PIECE ...]
+#            python JanggiTablebase.py probe FILE --fen FEN
+#            python JanggiTablebase.py verify FILE
+#
+#     Verify probes positions with a piece on a square it cannot stand on, in both colors, and exits with status 1 if
+#     any of them are found in the tablebase.
+#
+#     The number of positions is multiplied by up to 90 for each piece, so only sets of two or three pieces besides
+#     the generals are practical.
+
+import argparse
+import struct
+import sys
+import time
+from array import array
+from itertools import product
+
+from JanggiBoard import JanggiBoard, BLUE, FROM_MAILBOX, GENERAL, GUARD, OFFBOARD, PALACE_MOVES, PIECE_NAMES, \
+    PIECE_TYPE, PIECE_TYPES, RED, SOLDIER, TO_MAILBOX
+from JanggiMappedFile import MappedFile
+
+# The file starts with HEADER_FORMAT: the magic bytes, the length of the text naming the set of pieces, and the
+# number of positions. The text and the results follow.
+MAGIC = b"JGTB"
+HEADER_FORMAT = "<4sHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# The result bytes. The other values are one more than the number of moves to checkmate.
+DRAW_VALUE = 0
+INVALID_VALUE = 255
+MAXIMUM_DISTANCE = 253
+
+
+def _build_domains():
+    """
+    Builds the squares each piece can stand on. Generals and guards stay in their palace, and soldiers cannot go
+    back past the row they start on.
+
+    Returns a dictionary of the tuple of square indices for each piece code, and a dictionary of the position of each
+    square index in those tuples, or -1 for a square the piece cannot stand on.
+    """
+
+    domains = {}
+
+    for player in (RED, BLUE):
+        palace_squares = tuple(sorted(FROM_MAILBOX[square] for square in PALACE_MOVES[player]))
+
+        for piece_type in PIECE_NAMES:
+            if piece_type == GENERAL or piece_type == GUARD:
+                domains[player | piece_type] = palace_squares
+
+            elif piece_type == SOLDIER:
+                domains[player | piece_type] = tuple(index for index in range(90)
+                                                     if (index // 9 >= 3 if player == RED else index // 9 <= 6))
+
+            else:
+                domains[player | piece_type] = tuple(range(90))
+
+    domain_positions = {}
+
+    for piece, domain in domains.items():
+        positions = [-1] * 90
+
+        for position, index in enumerate(domain):
+            positions[index] = position
+
+        domain_positions[piece] = tuple(positions)
+
+    return domains, domain_positions
+
+
+DOMAINS, DOMAIN_POSITIONS = _build_domains()
+
+# The square index of each square seen from the other side of the board.
+MIRRORED_INDICES = tuple((9 - index // 9) * 9 + index % 9 for index in range(90))
+
+
+def make_material(red_pieces, blue_pieces):
+    """
+    Returns the set of pieces of an endgame as a sorted tuple of piece codes, including the generals. Sorting by code
+    puts red's pieces first, each player's general first, and the other pieces in the order of their types.
+
+    Takes a list of the names of each player's pieces besides their general, such as ["chariot", "guard"].
+    """
+
+    return tuple(sorted([RED | GENERAL, BLUE | GENERAL] + [RED | PIECE_TYPES[name] for name in red_pieces]
+                        + [BLUE | PIECE_TYPES[name] for name in blue_pieces]))
+
+
+def material_text(material):
+    """
+    Returns the text naming a set of pieces, which is the names of red's pieces besides the general separated by
+    commas, followed by "/" and the same for blue, such as "chariot,guard/".
+    """
+
+    return "/".join(",".join(PIECE_NAMES[piece & PIECE_TYPE] for piece in material
+                             if piece & OFFBOARD == player and piece & PIECE_TYPE != GENERAL)
+                    for player in (RED, BLUE))
+
+
+def _parse_material_text(text):
+    """
+    Returns the set of pieces named by the text from material_text.
+    """
+
+    red_text, blue_text = text.split("/")
+
+    return make_material([name for name in red_text.split(",") if name],
+                         [name for name in blue_text.split(",") if name])
+
+
+def _position_count(material):
+    """
+    Returns the number of positions of a set of pieces, which is two for each way of placing them.
+    """
+
+    count = 2
+
+    for piece in material:
+        count *= len(DOMAINS[piece])
+
+    return count
+
+
+def _position_index(material, pieces_list, red_to_move):
+    """
+    Finds the index of a position.
+
+    Takes the set of pieces, a list of (piece code, square index) tuples sorted in the same order as the set, and
+    whether it is red's turn.
+    Returns the index, or None if a piece is on a square it cannot stand on, so the position is not in the table.
+    """
+
+    index = 0
+
+    for piece, square_index in pieces_list:
+        position = DOMAIN_POSITIONS[piece][square_index]
+
+        if position < 0:
+            return None
+
+        index = index * len(DOMAINS[piece]) + position
+
+    return index * 2 + red_to_move
+
+
+def _board_pieces(board):
+    """
+    Returns a sorted list of (piece code, square index) tuples for the pieces on a board. Pieces of the same code are
+    sorted by square, which is the order the tablebase stores them in.
+    """
+
+    return sorted((board.get_piece(square), FROM_MAILBOX[square])
+                  for player in (RED, BLUE) for square in board.get_piece_squares(player))
+
+
+def _out_of_domain_boards(material):
+    """
+    Makes boards with the set of pieces, or with its colors swapped, where one piece is on a square it cannot stand
+    on, such as a general outside its palace. Every other piece is on the first free square it can stand on.
+
+    Takes the set of pieces.
+    Yields (description, board core) tuples.
+    """
+
+    for swap_colors in (False, True):
+        for number, outside_piece in enumerate(material):
+            if len(DOMAINS[outside_piece]) == 90:
+                continue
+
+            outside_index = next(index for index in range(90) if DOMAIN_POSITIONS[outside_piece][index] < 0)
+            used_indices = {outside_index}
+            pieces_list = [(outside_piece, outside_index)]
+
+            for piece in material[:number] + material[number + 1:]:
+                square_index = next(index for index in DOMAINS[piece] if index not in used_indices)
+                used_indices.add(square_index)
+                pieces_list.append((piece, square_index))
+
+            board = JanggiBoard()
+
+            for piece, square_index in pieces_list:
+                if swap_colors:
+                    piece, square_index = piece ^ OFFBOARD, MIRRORED_INDICES[square_index]
+
+                board.put_piece(TO_MAILBOX[square_index], piece)
+
+            description = PIECE_NAMES[outside_piece & PIECE_TYPE] + " outside its squares" + \
+                (", colors swapped" if swap_colors else "")
+
+            yield description, board
+
+
+def solve(material, solved_tables=None, progress=None):
+    """
+    Solves every position of a set of pieces by retrograde analysis, along with every smaller set of pieces that can
+    be reached by captures.
+
+    Takes the set of pieces from make_material, a dictionary of the sets already solved, which the new ones are added
+    to, and a function to call with the text of each set of pieces as it is started, or None.
+    Returns a bytearray of the result of each position.
+    """
+
+    if solved_tables is None:
+        solved_tables = {}
+
+    if material in solved_tables:
+        return solved_tables[material]
+
+    if progress is not None:
+        progress(material_text(material))
+
+    position_count = _position_count(material)
+    values = bytearray([INVALID_VALUE]) * position_count
+
+    # The moves from each position that stay in the same set of pieces, and the number of moves from each position
+    # that have not been found to lead to a won position.
+    edge_sources = array("I")
+    edge_targets = array("I")
+    remaining_moves = array("H", bytes(2 * position_count))
+
+    # The positions found to be lost or won, and the positions with a move to a won position, by distance.
+    lost_positions = [[] for _ in range(MAXIMUM_DISTANCE + 2)]
+    won_positions = [[] for _ in range(MAXIMUM_DISTANCE + 2)]
+    won_moves = [[] for _ in range(MAXIMUM_DISTANCE + 2)]
+
+    for square_indices in product(*(DOMAINS[piece] for piece in material)):
+        if len(set(square_indices)) != len(square_indices):
+            continue
+
+        # Pieces of the same code are only placed in order of their squares, so that each position is solved once.
+        if any(material[number] == material[number + 1] and square_indices[number] > square_indices[number + 1]
+               for number in range(len(material) - 1)):
+            continue
+
+        board = JanggiBoard()
+
+        for piece, square_index in zip(material, square_indices):
+            board.put_piece(TO_MAILBOX[square_index], piece)
+
+        pieces_list = list(zip(material, square_indices))
+
+        for player in (BLUE, RED):
+            opponent = RED + BLUE - player
+
+            # The player who just moved cannot be left in check.
+            if board.is_in_check(opponent):
+                continue
+
+            position_index = _position_index(material, pieces_list, player == RED)
+            values[position_index] = DRAW_VALUE
+            moves_list = list(board.legal_movements(player))
+
+            if not moves_list:
+                lost_positions[0].append(position_index)
+
+            for piece_square, new_square in moves_list:
+                board.push_move(piece_square, new_square)
+                new_pieces_list = _board_pieces(board)
+                board.pop_move()
+
+                if len(new_pieces_list) == len(material):
+                    edge_sources.append(position_index)
+                    edge_targets.append(_position_index(material, new_pieces_list, opponent == RED))
+                    remaining_moves[position_index] += 1
+                    continue
+
+                # The move captures a piece, so the position after it is in a smaller set of pieces.
+                new_material = tuple(piece for piece, _ in new_pieces_list)
+                value = solve(new_material, solved_tables, progress)[
+                    _position_index(new_material, new_pieces_list, opponent == RED)]
+
+                if value == DRAW_VALUE:
+                    remaining_moves[position_index] += 1
+
+                elif (value - 1) % 2 == 0:
+                    won_positions[value].append(position_index)
+
+                else:
+                    remaining_moves[position_index] += 1
+                    won_moves[value - 1].append(position_index)
+
+    # Sort the moves by the position they lead to, so that the moves into each position can be found.
+    first_edges = array("I", bytes(4 * (position_count + 1)))
+
+    for target in edge_targets:
+        first_edges[target + 1] += 1
+
+    for position_index in range(position_count):
+        first_edges[position_index + 1] += first_edges[position_index]
+
+    next_edges = array("I", first_edges)
+    predecessors = array("I", bytes(4 * len(edge_targets)))
+
+    for source, target in zip(edge_sources, edge_targets):
+        predecessors[next_edges[target]] = source
+        next_edges[target] += 1
+
+    del edge_sources, edge_targets, next_edges
+
+    # Work outward from the checkmates one distance at a time, so each position is reached first at its distance.
+    for distance in range(MAXIMUM_DISTANCE + 1):
+        for position_index in lost_positions[distance]:
+            if values[position_index] != DRAW_VALUE:
+                continue
+
+            values[position_index] = distance + 1
+
+            for predecessor in predecessors[first_edges[position_index]:first_edges[position_index + 1]]:
+                if values[predecessor] == DRAW_VALUE:
+                    won_positions[distance + 1].append(predecessor)
+
+        for position_index in won_positions[distance]:
+            if values[position_index] != DRAW_VALUE:
+                continue
+
+            values[position_index] = distance + 1
+            won_moves[distance].extend(predecessors[first_edges[position_index]:first_edges[position_index + 1]])
+
+        for predecessor in won_moves[distance]:
+            remaining_moves[predecessor] -= 1
+
+            if remaining_moves[predecessor] == 0 and values[predecessor] == DRAW_VALUE:
+                lost_positions[distance + 1].append(predecessor)
+
+    solved_tables[material] = values
+
+    return values
+
+
+def generate(material, path, progress=None):
+    """
+    Solves a set of pieces and writes its results to a tablebase file.
+
+    Takes the set of pieces from make_material, the path of the file, and a function to call with the text of each
+    set of pieces as it is started, or None.
+    Returns the bytearray of results.
+    """
+
+    values = solve(material, progress=progress)
+    text = material_text(material).encode("ascii")
+
+    with open(path, "wb") as tablebase_file:
+        tablebase_file.write(struct.pack(HEADER_FORMAT, MAGIC, len(text), len(values)))
+        tablebase_file.write(text)
+        tablebase_file.write(values)
+
+    return values
+
+
+class Tablebase(MappedFile):
+    """
+    A tablebase file of one set of pieces, mapped into memory. Probing a position reads one byte of the file, and
+    works for positions with the colors of the pieces swapped as well, by turning the board around.
+    """
+
+    __slots__ = ("_material", "_mirrored_material", "_data_offset")
+
+    def __init__(self, path):
+        """
+        Opens the tablebase file and maps it into memory.
+
+        Takes the path of the file. Raises ValueError if it is not a tablebase file.
+        """
+
+        super().__init__(path)
+
+        magic, text_length, position_count = struct.unpack_from(HEADER_FORMAT, self._map) \
+            if self.get_size() >= HEADER_SIZE else (None, 0, 0)
+        self._data_offset = HEADER_SIZE + text_length
+
+        if magic != MAGIC or self.get_size() != self._data_offset + position_count:
+            self.close()
+            raise ValueError(path + " is not a tablebase file")
+
+        self._material = _parse_material_text(self._map[HEADER_SIZE:self._data_offset].decode("ascii"))
+        self._mirrored_material = tuple(sorted(piece ^ OFFBOARD for piece in self._material))
+
+    def get_material(self):
+        """
+        Returns the set of pieces of the tablebase, as a sorted tuple of piece codes.
+        """
+
+        return self._material
+
+    def probe_board(self, board):
+        """
+        Looks up the position on a board core.
+
+        Takes the board core.
+        Returns a tuple of "WIN", "LOSS" or "DRAW" for the player whose turn it is and the number of moves to
+        checkmate, which is 0 for a draw. Returns None if the board does not have the tablebase's set of pieces, if a
+        general or guard is outside its palace or a soldier is behind the row it starts on, or if the position cannot
+        happen because the player who just moved is in check.
+        """
+
+        pieces_list = _board_pieces(board)
+        red_to_move = board.get_side_to_move() == RED
+        material = tuple(piece for piece, _ in pieces_list)
+
+        if material != self._material:
+            if material != self._mirrored_material:
+                return None
+
+            # Swap the colors and turn the board around, which leaves the result the same.
+            pieces_list = sorted((piece ^ OFFBOARD, MIRRORED_INDICES[square_index])
+                                 for piece, square_index in pieces_list)
+            red_to_move = not red_to_move
+
+        position_index = _position_index(self._material, pieces_list, red_to_move)
+
+        if position_index is None:
+            return None
+
+        value = self._map[self._data_offset + position_index]
+
+        if value == INVALID_VALUE:
+            return None
+
+        if value == DRAW_VALUE:
+            return "DRAW", 0
+
+        if (value - 1) % 2:
+            return "WIN", value - 1
+
+        return "LOSS", value - 1
+
+    def probe(self, game):
+        """
+        Looks up the position of a JanggiGame, like probe_board.
+        """
+
+        return self.probe_board(game.get_board())
+
+
+def main():
+    """
+    Generates a tablebase file, or looks up a position in one.
+    """
+
+    parser = argparse.ArgumentParser(description="Generate or probe an endgame tablebase.")
+    parser.add_argument("mode", choices=("generate", "probe", "verify"), help="whether to generate a tablebase, look "
+                                                                              "up a position or check the probe")
+    parser.add_argument("file", help="the tablebase file")
+    parser.add_argument("--red", nargs="*", default=[], choices=sorted(PIECE_TYPES), help="red's pieces besides "
+                                                                                          "the general")
+    parser.add_argument("--blue", nargs="*", default=[], choices=sorted(PIECE_TYPES), help="blue's pieces besides "
+                                                                                           "the general")
+    parser.add_argument("--fen", help="the position to look up, as FEN text")
+    arguments = parser.parse_args()
+
+    if arguments.mode == "generate":
+        if "general" in arguments.red or "general" in arguments.blue:
+            parser.error("each player has exactly one general, which is not listed")
+
+        start_time = time.perf_counter()
+        values = generate(make_material(arguments.red, arguments.blue), arguments.file,
+                          lambda text: print("solving " + text))
+        wins = sum(values.count(value) for value in range(2, MAXIMUM_DISTANCE + 2, 2))
+        losses = sum(values.count(value) for value in range(1, MAXIMUM_DISTANCE + 2, 2))
+        longest = max((value - 1 for value in values if value != INVALID_VALUE and value != DRAW_VALUE), default=0)
+        print("%d positions: %d won, %d lost, %d drawn, longest checkmate %d moves, %.1f s"
+              % (len(values) - values.count(INVALID_VALUE), wins, losses, values.count(DRAW_VALUE), longest,
+                 time.perf_counter() - start_time))
+        return
+
+    if arguments.mode == "verify":
+        failures = 0
+
+        with Tablebase(arguments.file) as tablebase:
+            for description, board in _out_of_domain_boards(tablebase.get_material()):
+                result = tablebase.probe_board(board)
+
+                if result is None:
+                    print("%s: OK" % description)
+
+                else:
+                    print("%s: FAILED, found %s" % (description, result))
+                    failures += 1
+
+        if failures:
+            sys.exit(1)
+
+        return
+
+    if arguments.fen is None:
+        parser.error("probe needs --fen")
+
+    try:
+        board = JanggiBoard.from_fen(arguments.fen)
+
+    except ValueError as error:
+        parser.error(str(error))
+
+    with Tablebase(arguments.file) as tablebase:
+        result = tablebase.probe_board(board)
+
+    if result is None:
+        print("not in the tablebase")
+
+    else:
+        print("%s in %d moves" % result if result[0] != "DRAW" else "DRAW")
+
+
+if __name__ == "__main__":
+    main()
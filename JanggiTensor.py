@@ -0,0 +1,181 @@
+# Description:
+#     Turns batches of positions into feature planes for training models, and back again. There is one plane for each
+#     piece type of each player on the 10x9 board, with a 1 on the squares that hold that piece, so a batch of N
+#     positions is an (N, PLANE_COUNT, 10, 9) array of uint8. Plane p holds the pieces with the code PLANE_PIECES[p]:
+#     red's general, guard, horse, elephant, chariot, cannon and soldier, followed by blue's in the same order.
+#
+#     The positions are given as an (N, PACKED_SIZE) array of uint8 with one position packed by JanggiGame.to_bytes
+#     in each row, which is the same packing used to store positions and send them between processes. The whole batch
+#     is encoded and decoded with NumPy operations on all of the rows at once, instead of a loop over every square of
+#     every position.
+#
+#     Needs NumPy.
+
+import numpy as np
+
+from JanggiBoard import BLUE, GENERAL, NIBBLE_PIECES, PACKED_SIZE, PIECE_NIBBLES, RED, SOLDIER
+from JanggiGame import JanggiGame
+
+# The piece code held by each plane, and the number of planes.
+PLANE_PIECES = tuple(player | piece_type for player in (RED, BLUE) for piece_type in range(GENERAL, SOLDIER + 1))
+PLANE_COUNT = len(PLANE_PIECES)
+
+# The packed four bit value of the piece held by each plane, and the plane of each packed value. Empty squares have
+# no plane, which is marked by PLANE_COUNT.
+PLANE_NIBBLES = np.array([PIECE_NIBBLES[piece] for piece in PLANE_PIECES], dtype=np.uint8)
+NIBBLE_PLANES = np.full(16, PLANE_COUNT, dtype=np.intp)
+NIBBLE_PLANES[PLANE_NIBBLES] = np.arange(PLANE_COUNT)
+
+# The piece code of each packed value, for unpacking into an array of piece codes.
+NIBBLE_PIECE_CODES = np.array(NIBBLE_PIECES, dtype=np.uint8)
+
+
+def pack_games(games):
+    """
+    Packs a batch of games into one array, for encoding or storing them.
+
+    Takes an iterable of JanggiGame objects.
+    Returns an (N, PACKED_SIZE) array of uint8 with the packed position of each game in a row.
+    """
+
+    packed_positions = b"".join(game.to_bytes() for game in games)
+
+    return np.frombuffer(packed_positions, dtype=np.uint8).reshape(-1, PACKED_SIZE).copy()
+
+
+def unpack_games(packed_positions, use_bitboards=False):
+    """
+    Creates a game from each row of an array of packed positions.
+
+    Takes the (N, PACKED_SIZE) array of packed positions and whether to use the bitboard board core.
+    Returns a list of the new games.
+    """
+
+    packed_positions = as_packed_array(packed_positions)
+
+    return [JanggiGame.from_bytes(packed_position.tobytes(), use_bitboards) for packed_position in packed_positions]
+
+
+def get_red_to_move(packed_positions):
+    """
+    Returns an (N,) array of bool which is True for each packed position where it is red's turn. The planes do not
+    hold the player whose turn it is, so it is kept apart from them.
+    """
+
+    return as_packed_array(packed_positions)[:, PACKED_SIZE - 1] != 0
+
+
+def unpack_pieces(packed_positions):
+    """
+    Unpacks a batch of packed positions into the piece code on each square, like JanggiBoard.get_piece.
+
+    Takes the (N, PACKED_SIZE) array of packed positions.
+    Returns an (N, 90) array of uint8 with the piece code on each square in square index order, or EMPTY.
+    """
+
+    packed_positions = as_packed_array(packed_positions)
+    pieces = np.empty((len(packed_positions), 90), dtype=np.uint8)
+    pieces[:, 0::2] = NIBBLE_PIECE_CODES[packed_positions[:, :45] >> 4]
+    pieces[:, 1::2] = NIBBLE_PIECE_CODES[packed_positions[:, :45] & 15]
+
+    return pieces
+
+
+def encode_positions(packed_positions, out=None):
+    """
+    Fills the feature planes of a batch of positions. Only the squares that hold a piece are written after the
+    array is cleared, so the time taken is about the same for any number of pieces.
+
+    Takes the (N, PACKED_SIZE) array of packed positions, and an (N, PLANE_COUNT, 10, 9) array of uint8 to fill, or
+    None to create a new one.
+    Returns the array of planes.
+    """
+
+    packed_positions = as_packed_array(packed_positions)
+    position_count = len(packed_positions)
+
+    if out is None:
+        out = np.empty((position_count, PLANE_COUNT, 10, 9), dtype=np.uint8)
+
+    elif out.shape != (position_count, PLANE_COUNT, 10, 9) or out.dtype != np.uint8:
+        raise ValueError("The planes array must be uint8 with the shape " + str((position_count, PLANE_COUNT, 10, 9))
+                         + ", not " + str(out.dtype) + " with the shape " + str(out.shape))
+
+    # Unpack the four bit values of the first and second square of each byte into one value per square.
+    nibbles = np.empty((position_count, 90), dtype=np.uint8)
+    nibbles[:, 0::2] = packed_positions[:, :45] >> 4
+    nibbles[:, 1::2] = packed_positions[:, :45] & 15
+
+    position_indices, squares = np.nonzero(nibbles)
+    planes = NIBBLE_PLANES[nibbles[position_indices, squares]]
+
+    if np.any(planes == PLANE_COUNT):
+        raise ValueError("A packed position holds a square that is not a piece")
+
+    out.fill(0)
+    out[position_indices, planes, squares // 9, squares % 9] = 1
+
+    return out
+
+
+def decode_positions(planes, red_to_move=None, out=None):
+    """
+    Packs the feature planes of a batch of positions back into packed positions.
+
+    Takes the (N, PLANE_COUNT, 10, 9) array of planes, an (N,) array of bool which is True for each position where it
+    is red's turn or None for blue's turn in all of them, and an (N, PACKED_SIZE) array of uint8 to fill, or None to
+    create a new one.
+    Returns the array of packed positions. Raises ValueError if a square holds more than one piece, or if the array
+    to fill is not the right shape and type.
+    """
+
+    planes = np.asarray(planes, dtype=np.uint8)
+    position_count = len(planes)
+
+    if planes.shape[1:] != (PLANE_COUNT, 10, 9):
+        raise ValueError("The planes array must have the shape (N, " + str(PLANE_COUNT) + ", 10, 9)")
+
+    if out is None:
+        out = np.empty((position_count, PACKED_SIZE), dtype=np.uint8)
+
+    elif out.shape != (position_count, PACKED_SIZE) or out.dtype != np.uint8:
+        raise ValueError("The packed positions array must be uint8 with the shape " + str((position_count, PACKED_SIZE))
+                         + ", not " + str(out.dtype) + " with the shape " + str(out.shape))
+
+    planes = planes.reshape(position_count, PLANE_COUNT, 90)
+
+    if np.any(planes.sum(axis=1) > 1):
+        raise ValueError("A square holds more than one piece in the planes")
+
+    # Each square holds at most one piece, so multiplying by the packed value of each plane and adding up the planes
+    # gives the packed value of the square.
+    nibbles = np.matmul(PLANE_NIBBLES, planes)
+    out[:, :45] = nibbles[:, 0::2] << 4 | nibbles[:, 1::2]
+
+    if red_to_move is None:
+        out[:, 45] = 0
+
+    else:
+        out[:, 45] = np.asarray(red_to_move, dtype=bool)
+
+    return out
+
+
+def as_packed_array(packed_positions):
+    """
+    Returns the packed positions as an (N, PACKED_SIZE) array of uint8. Takes an array, a list of the packed
+    positions, or all of them joined in one bytes object.
+    """
+
+    if isinstance(packed_positions, (bytes, bytearray)):
+        packed_positions = np.frombuffer(packed_positions, dtype=np.uint8)
+
+    elif isinstance(packed_positions, list):
+        packed_positions = np.frombuffer(b"".join(packed_positions), dtype=np.uint8)
+
+    packed_positions = np.asarray(packed_positions, dtype=np.uint8)
+
+    if packed_positions.size % PACKED_SIZE:
+        raise ValueError("Packed positions must be " + str(PACKED_SIZE) + " bytes each")
+
+    return packed_positions.reshape(-1, PACKED_SIZE)
@@ -0,0 +1,265 @@
+# Description:
+#     A fixed-size transposition table for keeping the results of analysing positions, keyed by the 64-bit Zobrist
+#     hash of each position. The entries are kept in flat arrays from the array module instead of a dictionary of
+#     objects, so the table takes the same amount of memory from when it is created for as long as it is used.
+#
+#     The table is split into buckets of a few entries each, and a position can only be stored in the bucket picked by
+#     the low bits of its hash. When a bucket is full, the entry replaced is one left over from an earlier search if
+#     there is one, and otherwise the one searched to the smallest depth.
+#
+#     Usage: python JanggiTranspositionTable.py
+#
+#     Run on its own, it stores and probes entries at the limits of what an entry can hold, and exits with status 1 if
+#     any of them are not found as stored.
+
+import sys
+from array import array
+
+# The kinds of score an entry can hold. An exact score is the score of the position. A lower bound means the position
+# is worth at least the score, and an upper bound means it is worth at most the score.
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# The number of entries in each bucket.
+BUCKET_SIZE = 4
+
+# The bytes used by one entry: the 8 byte hash, 4 byte score, 2 byte move, and 1 byte each for the depth, bound and
+# age.
+ENTRY_SIZE = 17
+
+# The deepest depth an entry can hold. Check extensions can make a search deeper than it was started with, so deeper
+# results are stored as this depth, which only makes them look shallower than they are.
+MAXIMUM_DEPTH = 255
+
+# The ages go from 1 to MAXIMUM_AGE. An age of 0 marks an empty entry. When the ages run out, every entry that is
+# not empty is given the age 1, and the ages start again from 2, so that old entries never look like new ones.
+MAXIMUM_AGE = 255
+OLD_AGES = bytes([0]) + bytes([1]) * MAXIMUM_AGE
+
+
+class TranspositionTable:
+    """
+    A transposition table of a fixed size. Each entry keeps the depth a position was searched to, its score, the kind
+    of score and the best move found, along with the hash of the position and the age of the search that stored it.
+    Moves are given as (square, new square) tuples of mailbox indices, or None.
+
+    It counts its hits, misses and collisions. A collision is when a position is stored over an entry for a different
+    position from the same search, so that a result still in use is lost because the table is too small.
+    """
+
+    def __init__(self, memory_budget=16 * 1024 * 1024):
+        """
+        Creates an empty table that fits in the memory budget. The number of buckets is rounded down to a power of
+        two, so the table always uses at most the budget.
+
+        Takes the memory budget in bytes.
+        """
+
+        bucket_count = 1
+
+        while bucket_count * 2 * BUCKET_SIZE * ENTRY_SIZE <= memory_budget:
+            bucket_count *= 2
+
+        self._bucket_mask = bucket_count - 1
+        self._entry_count = bucket_count * BUCKET_SIZE
+        self._keys = array("Q", bytes(8 * self._entry_count))
+        self._scores = array("i", bytes(4 * self._entry_count))
+        self._moves = array("H", bytes(2 * self._entry_count))
+        self._depths = array("B", bytes(self._entry_count))
+        self._bounds = array("B", bytes(self._entry_count))
+        self._ages = array("B", bytes(self._entry_count))
+        self._age = 1
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+
+    def get_entry_count(self):
+        """
+        Returns the number of entries the table can hold.
+        """
+
+        return self._entry_count
+
+    def get_memory_usage(self):
+        """
+        Returns the number of bytes used by the entries of the table.
+        """
+
+        return self._entry_count * ENTRY_SIZE
+
+    def get_hits(self):
+        """
+        Returns the number of times probe found the position it was looking for.
+        """
+
+        return self._hits
+
+    def get_misses(self):
+        """
+        Returns the number of times probe did not find the position it was looking for.
+        """
+
+        return self._misses
+
+    def get_collisions(self):
+        """
+        Returns the number of times an entry for a different position from the current search was replaced.
+        """
+
+        return self._collisions
+
+    def get_used_entries(self):
+        """
+        Returns the number of entries stored by the current search.
+        """
+
+        return self._ages.count(self._age)
+
+    def new_search(self):
+        """
+        Starts a new search. The entries stored before are kept and can still be found, but they are replaced first
+        when their buckets fill up.
+        """
+
+        if self._age == MAXIMUM_AGE:
+            self._ages = array("B", self._ages.tobytes().translate(OLD_AGES))
+            self._age = 1
+
+        self._age += 1
+
+    def clear(self):
+        """
+        Empties the table and resets its counters.
+        """
+
+        self._ages = array("B", bytes(self._entry_count))
+        self._age = 1
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+
+    def probe(self, key):
+        """
+        Looks a position up in the table. An entry that is found is marked as used by the current search, so that it
+        is kept like the entries stored by it.
+
+        Takes the hash of the position.
+        Returns a (depth, score, bound, move) tuple for the position, or None if it is not in the table.
+        """
+
+        first_index = (key & self._bucket_mask) * BUCKET_SIZE
+        keys = self._keys
+        ages = self._ages
+
+        for index in range(first_index, first_index + BUCKET_SIZE):
+            if keys[index] == key and ages[index] != 0:
+                self._hits += 1
+                ages[index] = self._age
+                move = self._moves[index]
+
+                return self._depths[index], self._scores[index], self._bounds[index], \
+                    (move >> 8, move & 255) if move else None
+
+        self._misses += 1
+
+        return None
+
+    def store(self, key, depth, score, bound, move=None):
+        """
+        Stores the result of searching a position. If the position is already in the table, its entry is only
+        replaced by a search at least as deep, or by an exact score, unless it is left over from an earlier search.
+        Otherwise the entry replaced is an empty one or one from an earlier search if there is one, and the one
+        searched to the smallest depth if there is not.
+
+        Takes the hash of the position, the depth it was searched to, its score, the kind of score, and the best move
+        found as a (square, new square) tuple or None. A depth deeper than MAXIMUM_DEPTH is stored as MAXIMUM_DEPTH.
+        """
+
+        if depth > MAXIMUM_DEPTH:
+            depth = MAXIMUM_DEPTH
+
+        first_index = (key & self._bucket_mask) * BUCKET_SIZE
+        keys = self._keys
+        ages = self._ages
+        depths = self._depths
+        age = self._age
+        replaced_index = None
+        replaced_priority = None
+
+        for index in range(first_index, first_index + BUCKET_SIZE):
+            if keys[index] == key and ages[index] != 0:
+                if depth < depths[index] and bound != EXACT and ages[index] == age:
+                    return
+
+                replaced_index = index
+                break
+
+            # Entries from earlier searches and empty entries come before any entry from this search.
+            priority = (ages[index] == age, depths[index])
+
+            if replaced_priority is None or priority < replaced_priority:
+                replaced_index = index
+                replaced_priority = priority
+
+        else:
+            if ages[replaced_index] == age:
+                self._collisions += 1
+
+        keys[replaced_index] = key
+        depths[replaced_index] = depth
+        self._scores[replaced_index] = score
+        self._bounds[replaced_index] = bound
+        self._moves[replaced_index] = move[0] << 8 | move[1] if move is not None else 0
+        ages[replaced_index] = age
+
+
+def main():
+    """
+    Stores entries at the limits of the depth, score and move in a small table, probes them back and prints whether
+    each one was found as stored. The exit status is 1 if any of them were not.
+    """
+
+    table = TranspositionTable(1024)
+    failures = 0
+
+    # Each check is the stored (depth, score, bound, move) and the entry probe should find.
+    checks_list = [((0, 0, EXACT, None), (0, 0, EXACT, None)),
+                   ((MAXIMUM_DEPTH, 100000, LOWER_BOUND, (119, 119)),
+                    (MAXIMUM_DEPTH, 100000, LOWER_BOUND, (119, 119))),
+                   ((MAXIMUM_DEPTH + 1, -100000, UPPER_BOUND, (12, 119)),
+                    (MAXIMUM_DEPTH, -100000, UPPER_BOUND, (12, 119))),
+                   ((1000, 5, EXACT, (24, 35)), (MAXIMUM_DEPTH, 5, EXACT, (24, 35)))]
+
+    for key, (stored_entry, expected_entry) in enumerate(checks_list, 1):
+        table.store(key, *stored_entry)
+        entry = table.probe(key)
+
+        if entry == expected_entry:
+            print("store %s: OK" % (stored_entry,))
+
+        else:
+            print("store %s: FAILED, found %s, expected %s" % (stored_entry, entry, expected_entry))
+            failures += 1
+
+    # An entry from many searches ago must not count as stored by the current search.
+    table.store(100, 1, 0, EXACT)
+
+    for _ in range(2 * MAXIMUM_AGE):
+        table.new_search()
+
+    used_entries = table.get_used_entries()
+
+    if used_entries == 0:
+        print("entries after %d searches: OK" % (2 * MAXIMUM_AGE))
+
+    else:
+        print("entries after %d searches: FAILED, %d still count as current" % (2 * MAXIMUM_AGE, used_entries))
+        failures += 1
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# Description:
+#     Checks whether moves are legal for large batches of (position, move) pairs at once, such as the moves found in
+#     player logs, without creating a JanggiGame for each one. The positions are given as an (N, PACKED_SIZE) array of
+#     positions packed by JanggiGame.to_bytes, and the moves as an (N, 2) array of the square indices moved from and
+#     to. For each pair it finds whether JanggiGame.make_move would accept the move, and whether the move puts the
+#     opponent in check.
+#
+#     Every rule is checked on the whole batch at once with NumPy, using tables built when the module is loaded from
+#     the same move tables as the board core. For each pair of squares there is a table of whether each piece can
+#     reach the second square from the first on an empty board, and of the squares between them that must be empty:
+#     the squares a horse or elephant moves through, and the squares along the line for a chariot or cannon. A cannon
+#     needs exactly one piece between, which cannot be a cannon. To find out if a general is in check, each line out
+#     from its square is gathered into an array, and the first and second pieces along it show whether a chariot or
+#     cannon attacks it. So no pair has to be checked one at a time, not even for the pieces that move along lines.
+#
+#     Needs NumPy.
+
+import numpy as np
+
+from JanggiBoard import BLUE, CANNON, CHARIOT, ELEPHANT, ELEPHANT_ATTACKS, ELEPHANT_JUMPS, FROM_MAILBOX, GENERAL, \
+    GUARD, HORSE, HORSE_ATTACKS, HORSE_JUMPS, OFFBOARD, ORTHOGONAL_STEPS, PALACE_DIAGONALS, PALACE_MOVES, PIECE_TYPE, \
+    RED, SOLDIER, SOLDIER_STEPS, SQUARE_INDICES, TO_MAILBOX
+from JanggiTensor import as_packed_array, get_red_to_move, unpack_pieces
+
+# An index past the last square, used to fill out the tables. It always holds EMPTY.
+NO_SQUARE = 90
+
+# The most squares that can be between two squares, and the most squares along one line from a square.
+MAXIMUM_BETWEEN = 8
+MAXIMUM_LINE = 9
+
+# The lines out from each square: the four directions, followed by the diagonal lines of the palace.
+LINE_COUNT = 8
+
+# The most pieces that can attack a square without moving along a line: eight horses, eight elephants, three
+# soldiers, and a guard or general from each of eight palace squares.
+MAXIMUM_ATTACKERS = 35
+
+
+def _build_move_tables():
+    """
+    Builds the tables for checking moves, with the square indices 0 to 89 and NO_SQUARE.
+
+    Returns an array of whether each piece code can move from each square to each other square on an empty board, an
+    array of the squares between each pair of squares that a piece has to move through, and an array of whether each
+    pair of squares is joined by a diagonal line of the palace.
+    """
+
+    reaches = np.zeros((OFFBOARD, NO_SQUARE + 1, NO_SQUARE + 1), dtype=bool)
+    between = np.full((NO_SQUARE + 1, NO_SQUARE + 1, MAXIMUM_BETWEEN), NO_SQUARE, dtype=np.intp)
+    diagonal_moves = np.zeros((NO_SQUARE + 1, NO_SQUARE + 1), dtype=bool)
+
+    for square in TO_MAILBOX:
+        index = FROM_MAILBOX[square]
+
+        for player in (RED, BLUE):
+            for step in SOLDIER_STEPS[player]:
+                if FROM_MAILBOX[square + step] >= 0:
+                    reaches[player | SOLDIER, index, FROM_MAILBOX[square + step]] = True
+
+            for new_square in PALACE_MOVES[player].get(square, ()):
+                reaches[player | GUARD, index, FROM_MAILBOX[new_square]] = True
+                reaches[player | GENERAL, index, FROM_MAILBOX[new_square]] = True
+
+        for block_square, new_square in HORSE_JUMPS[square]:
+            reaches[(RED | HORSE, BLUE | HORSE), index, FROM_MAILBOX[new_square]] = True
+            between[index, FROM_MAILBOX[new_square], 0] = FROM_MAILBOX[block_square]
+
+        for block_square, second_block_square, new_square in ELEPHANT_JUMPS[square]:
+            reaches[(RED | ELEPHANT, BLUE | ELEPHANT), index, FROM_MAILBOX[new_square]] = True
+            between[index, FROM_MAILBOX[new_square], :2] = (FROM_MAILBOX[block_square],
+                                                            FROM_MAILBOX[second_block_square])
+
+        lines_list = [_line_squares(square, step) for step in ORTHOGONAL_STEPS]
+        lines_list.extend([FROM_MAILBOX[line_square] for line_square in line]
+                          for line in PALACE_DIAGONALS.get(square, ()))
+
+        for line_number, line in enumerate(lines_list):
+            for distance, new_index in enumerate(line):
+                reaches[(RED | CHARIOT, BLUE | CHARIOT, RED | CANNON, BLUE | CANNON), index, new_index] = True
+                between[index, new_index, :distance] = line[:distance]
+                diagonal_moves[index, new_index] = line_number >= len(ORTHOGONAL_STEPS)
+
+    return reaches, between, diagonal_moves
+
+
+def _build_attack_tables():
+    """
+    Builds the tables for finding out if a square is attacked, with the square indices 0 to 89 and NO_SQUARE.
+
+    Returns an array of the lines out from each square, with the four directions first, and arrays of the squares a
+    horse, elephant, soldier, guard or general of each player could attack each square from, the piece type it would
+    have to be, and the squares that must be empty for it to attack. The players are in the order red, blue.
+    """
+
+    lines = np.full((NO_SQUARE + 1, LINE_COUNT, MAXIMUM_LINE), NO_SQUARE, dtype=np.intp)
+    attack_squares = np.full((2, NO_SQUARE + 1, MAXIMUM_ATTACKERS), NO_SQUARE, dtype=np.intp)
+    attack_types = np.zeros((2, NO_SQUARE + 1, MAXIMUM_ATTACKERS), dtype=np.uint8)
+    attack_blocks = np.full((2, NO_SQUARE + 1, MAXIMUM_ATTACKERS, 2), NO_SQUARE, dtype=np.intp)
+
+    for square in TO_MAILBOX:
+        index = FROM_MAILBOX[square]
+
+        for line_number, step in enumerate(ORTHOGONAL_STEPS):
+            line = _line_squares(square, step)
+            lines[index, line_number, :len(line)] = line
+
+        for line_number, line in enumerate(PALACE_DIAGONALS.get(square, ()), len(ORTHOGONAL_STEPS)):
+            lines[index, line_number, :len(line)] = [FROM_MAILBOX[line_square] for line_square in line]
+
+        for player_index, player in enumerate((RED, BLUE)):
+            attackers_list = [(HORSE, horse_square, (block_square,))
+                              for block_square, horse_square in HORSE_ATTACKS[square]]
+            attackers_list.extend((ELEPHANT, elephant_square, (block_square, second_block_square))
+                                  for block_square, second_block_square, elephant_square in ELEPHANT_ATTACKS[square])
+            attackers_list.extend((SOLDIER, square - step, ()) for step in SOLDIER_STEPS[player]
+                                  if FROM_MAILBOX[square - step] >= 0)
+
+            for palace_square in PALACE_MOVES[player].get(square, ()):
+                attackers_list.extend(((GUARD, palace_square, ()), (GENERAL, palace_square, ())))
+
+            for attacker_number, (piece_type, attacker_square, block_squares) in enumerate(attackers_list):
+                attack_squares[player_index, index, attacker_number] = FROM_MAILBOX[attacker_square]
+                attack_types[player_index, index, attacker_number] = piece_type
+                attack_blocks[player_index, index, attacker_number, :len(block_squares)] = \
+                    [FROM_MAILBOX[block_square] for block_square in block_squares]
+
+    return lines, attack_squares, attack_types, attack_blocks
+
+
+def _line_squares(square, step):
+    """
+    Returns a list of the square indices along the line from a mailbox square in the direction of the step, up to the
+    edge of the board.
+    """
+
+    line = []
+    square += step
+
+    while FROM_MAILBOX[square] >= 0:
+        line.append(FROM_MAILBOX[square])
+        square += step
+
+    return line
+
+
+PIECE_REACHES, BETWEEN_SQUARES, DIAGONAL_MOVES = _build_move_tables()
+LINES, ATTACK_SQUARES, ATTACK_TYPES, ATTACK_BLOCKS = _build_attack_tables()
+
+
+def parse_moves(moves):
+    """
+    Converts moves in algebraic notation into an array of square indices, for validate_moves.
+
+    Takes an iterable of (piece location, new location) pairs, such as ("c7", "c6").
+    Returns an (N, 2) array of the square indices, with -1 for a location that is not on the board.
+    """
+
+    return np.array([(SQUARE_INDICES.get(piece_location.lower(), -1), SQUARE_INDICES.get(new_location.lower(), -1))
+                     for piece_location, new_location in moves], dtype=np.intp).reshape(-1, 2)
+
+
+def validate_moves(packed_positions, moves):
+    """
+    Checks a batch of moves, each in its own position. A move is legal if JanggiGame.make_move would make it in the
+    position: the piece must belong to the player whose turn it is and be able to move to the new square, and the
+    move must not leave the player's general in check. A move from a square to itself is a pass, which is legal if
+    the square holds one of the player's pieces and the player is not in check.
+
+    Takes the (N, PACKED_SIZE) array of packed positions, and an (N, 2) array of the square indices of the piece and
+    the square to move it to.
+    Returns an (N,) array of bool which is True for each legal move, and an (N,) array of bool which is True for each
+    legal move that puts the opponent in check.
+    """
+
+    packed_positions = as_packed_array(packed_positions)
+    position_count = len(packed_positions)
+    moves = np.asarray(moves, dtype=np.intp).reshape(-1, 2)
+
+    if len(moves) != position_count:
+        raise ValueError("There must be one move for each position")
+
+    # The pieces on the squares, with an extra square at NO_SQUARE that is always empty.
+    pieces = np.zeros((position_count, NO_SQUARE + 1), dtype=np.uint8)
+    pieces[:, :NO_SQUARE] = unpack_pieces(packed_positions)
+
+    players = np.where(get_red_to_move(packed_positions), RED, BLUE).astype(np.uint8)
+    opponents = (RED + BLUE - players).astype(np.uint8)
+    rows = np.arange(position_count)
+
+    on_board = np.all((moves >= 0) & (moves < NO_SQUARE), axis=1)
+    piece_squares = np.where(on_board, moves[:, 0], NO_SQUARE)
+    new_squares = np.where(on_board, moves[:, 1], NO_SQUARE)
+    moved_pieces = pieces[rows, piece_squares]
+    targets = pieces[rows, new_squares]
+    is_own_piece = moved_pieces & players != 0
+    is_pass = on_board & (piece_squares == new_squares)
+
+    # Count the pieces on the squares between, and find the first of them, which is the screen a cannon jumps over.
+    between_pieces = pieces[rows[:, None], BETWEEN_SQUARES[piece_squares, new_squares]]
+    between_occupied = between_pieces != 0
+    between_count = between_occupied.sum(axis=1)
+    screens = between_pieces[rows, between_occupied.argmax(axis=1)]
+
+    is_cannon = moved_pieces & PIECE_TYPE == CANNON
+    cannon_clear = (between_count == 1) & (screens & PIECE_TYPE != CANNON) & \
+        ((targets & PIECE_TYPE != CANNON) | DIAGONAL_MOVES[piece_squares, new_squares])
+    is_clear = np.where(is_cannon, cannon_clear, between_count == 0)
+    is_moved = is_own_piece & PIECE_REACHES[moved_pieces, piece_squares, new_squares] & is_clear & \
+        (targets & players == 0)
+
+    # Make the moves on a copy of the pieces, then look for checks in the rows that are still legal.
+    moved_rows = np.nonzero(is_moved)[0]
+    pieces_after = pieces.copy()
+    pieces_after[moved_rows, new_squares[moved_rows]] = moved_pieces[moved_rows]
+    pieces_after[moved_rows, piece_squares[moved_rows]] = 0
+
+    legal_moves = is_moved | is_pass & is_own_piece
+    gives_check = np.zeros(position_count, dtype=bool)
+    candidate_rows = np.nonzero(legal_moves)[0]
+
+    if len(candidate_rows):
+        candidate_pieces = pieces_after[candidate_rows]
+        in_check = _are_attacked(candidate_pieces, _find_generals(candidate_pieces, players[candidate_rows]),
+                                 opponents[candidate_rows])
+        legal_moves[candidate_rows[in_check]] = False
+
+        candidate_rows = candidate_rows[~in_check]
+        candidate_pieces = candidate_pieces[~in_check]
+        gives_check[candidate_rows] = _are_attacked(candidate_pieces,
+                                                    _find_generals(candidate_pieces, opponents[candidate_rows]),
+                                                    players[candidate_rows])
+
+    return legal_moves, gives_check
+
+
+def _find_generals(pieces, players):
+    """
+    Finds the square of each player's general.
+
+    Takes the (M, NO_SQUARE + 1) array of pieces and the (M,) array of players.
+    Returns an (M,) array of the square index of each general, or NO_SQUARE where the player has no general.
+    """
+
+    is_general = pieces[:, :NO_SQUARE] == (players | GENERAL)[:, None]
+
+    return np.where(is_general.any(axis=1), is_general.argmax(axis=1), NO_SQUARE)
+
+
+def _are_attacked(pieces, squares, by_players):
+    """
+    Checks if a square in each row could be moved onto by a player, like JanggiBoard.is_attacked for a square that
+    does not hold a cannon.
+
+    Takes the (M, NO_SQUARE + 1) array of pieces, the (M,) array of the squares, where NO_SQUARE is never attacked,
+    and the (M,) array of the attacking players.
+    Returns an (M,) array of bool which is True where the square is attacked.
+    """
+
+    rows = np.arange(len(pieces))[:, None]
+    player_indices = (by_players == BLUE).astype(np.intp)
+
+    # Horses, elephants, soldiers, guards and generals attack from fixed squares, if the squares they move through
+    # are empty.
+    attack_squares = ATTACK_SQUARES[player_indices, squares]
+    attack_pieces = ATTACK_TYPES[player_indices, squares] | by_players[:, None]
+    blocks_empty = np.all(pieces[rows[:, :, None], ATTACK_BLOCKS[player_indices, squares]] == 0, axis=2)
+    attacked = np.any((pieces[rows, attack_squares] == attack_pieces) & blocks_empty, axis=1)
+
+    # A chariot attacks if it is the first piece along a line, and a cannon if it is the second piece along a line
+    # and the first is not a cannon.
+    line_pieces = pieces[rows[:, :, None], LINES[squares]]
+    occupied = line_pieces != 0
+    first_positions = occupied.argmax(axis=2)
+    first_pieces = np.take_along_axis(line_pieces, first_positions[:, :, None], axis=2)[:, :, 0]
+    occupied_after_first = occupied & (np.arange(MAXIMUM_LINE) > first_positions[:, :, None])
+    second_pieces = np.take_along_axis(line_pieces, occupied_after_first.argmax(axis=2)[:, :, None], axis=2)[:, :, 0]
+
+    chariot_attacks = first_pieces == (by_players | CHARIOT)[:, None]
+    cannon_attacks = (first_pieces != 0) & (first_pieces & PIECE_TYPE != CANNON) & \
+        occupied_after_first.any(axis=2) & (second_pieces == (by_players | CANNON)[:, None])
+
+    return attacked | np.any(chariot_attacks | cannon_attacks, axis=1)